@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module bench
+
+Performance benchmarks for the **configjson** and **configyaml** modules, and for the
+binary **configmsgpack** and **configcbor** modules when their codecs are installed.
+JSON and YAML are also benchmarked compressed, as the formats 'json.gz', 'yaml.xz'
+and so on -- see **COMPRESSIONS**.
+
+Each benchmark case times one operation -- constructing a Config from an existing
+**cfgfile**, **read()**, **write()**, a loop of write thru **cfg** assignments, and a
+YAML round-trip (typ='rt') read/write, and a worker's first read of a configuration
+published in shared memory by **configshm** -- against synthetic configurations of
+several sizes and nesting depths. The *import* case times importing each format's
+module in a fresh interpreter.
+
+Run it from the root of the project::
+
+    python -m benchmarks.bench                          # default sizes, all formats
+    python -m benchmarks.bench --sizes 1KB,100MB --formats json
+    python -m benchmarks.bench --output results.json    # machine-readable results
+    python -m benchmarks.bench --save-baseline          # store benchmarks/baseline.json
+    python -m benchmarks.bench --compare                # compare with the stored baseline
+
+When comparing, any case slower than the baseline by more than the **--tolerance**
+fraction is reported as a regression and the exit status is 1.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import configjson
+import configyaml
+import configmsgpack
+import configcbor
+import configshm
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Synthetic configuration sizes, by name, in bytes of JSON.
+SIZES = {
+    '1KB'   : 1 << 10,
+    '10KB'  : 10 << 10,
+    '100KB' : 100 << 10,
+    '1MB'   : 1 << 20,
+    '10MB'  : 10 << 20,
+    '100MB' : 100 << 20,
+}
+
+#: Sizes run when none are given on the command line.
+DEFAULT_SIZES = ('1KB', '10KB', '100KB', '1MB')
+
+#: Nesting depths of the synthetic configurations.
+DEFAULT_DEPTHS = (1, 4)
+
+#: Config sub-classes, by format name.
+FORMATS = {
+    'json' : configjson.Config,
+    'yaml' : configyaml.Config,
+}
+
+#: File name extension of each format.
+EXTENSIONS = {
+    'json'    : '.json',
+    'yaml'    : '.yaml',
+    'msgpack' : '.msgpack',
+    'cbor'    : '.cbor',
+}
+
+# the binary formats are benchmarked only when their codecs are installed
+if importlib.util.find_spec('msgpack'):
+    FORMATS['msgpack'] = configmsgpack.Config
+if importlib.util.find_spec('cbor2'):
+    FORMATS['cbor'] = configcbor.Config
+
+#: Compression suffixes benchmarked for the text formats, each as a format of its
+#: own, such as 'json.gz'.
+COMPRESSIONS = ['.gz', '.xz']
+if importlib.util.find_spec('zstandard'):
+    COMPRESSIONS.append('.zst')
+
+for fmt in ('json', 'yaml'):
+    for suffix in COMPRESSIONS:
+        FORMATS[fmt + suffix]    = FORMATS[fmt]
+        EXTENSIONS[fmt + suffix] = EXTENSIONS[fmt] + suffix
+
+#: Default location of the stored baseline.
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+#: Number of cfg assignments timed by the write thru case.
+WRITE_THRU_LOOPS = 10
+
+# case name --> (function, formats it applies to)
+_cases = {}
+
+#------------------------------------------------------------------------------
+def case(name, formats=None):
+    """
+    Decorator registering a benchmark case, **name**, for the formats, **formats**
+    (all formats if None).
+
+    A case is called as case(fmt, cfgfile, cfgdict) after **cfgfile** has been
+    written, and returns the number of seconds its timed operation took.
+    """
+    def register(func):
+        _cases[name] = (func, formats)
+        return(func)
+    return(register)
+
+def synthetic_cfg(size, depth=1, width=8):
+    """
+    Returns a configuration dictionary of roughly **size** bytes of JSON, whose
+    leaves are **depth** levels deep and whose inner sections have **width** keys.
+    """
+    leaf = {'name' : 'service', 'enabled' : True, 'port' : 8080,
+            'weight' : 0.5, 'tags' : ['alpha', 'beta', 'gamma']}
+    leaf_size = len(json.dumps(leaf))
+
+    def section(n, level):
+        if level >= depth:
+            return({'item%06d' % i : dict(leaf, port=i) for i in range(max(1, n))})
+        per = max(1, n // width)
+        return({'section%03d' % i : section(per, level + 1) for i in range(min(width, max(1, n)))})
+
+    return(section(max(1, size // (leaf_size + 16)), 1))
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return(time.perf_counter() - start)
+
+def import_time(module):
+    """
+    Returns the number of seconds a fresh interpreter takes to import **module**,
+    as reported by **python -X importtime**.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                          cwd=root, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in proc.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return(int(fields[1]) / 1e6)
+    raise ValueError("No import time reported for %s" % module)
+
+def _new(fmt, cfgfile, **kwargs):
+    return(FORMATS[fmt](cfgfile=cfgfile, **kwargs))
+
+#------------------------------------------------------------------------------
+# Benchmark Cases
+#------------------------------------------------------------------------------
+@case('init')
+def bench_init(fmt, cfgfile, cfgdict):
+    return(_timed(lambda: _new(fmt, cfgfile)))
+
+@case('read')
+def bench_read(fmt, cfgfile, cfgdict):
+    c = _new(fmt, cfgfile)
+    return(_timed(c.read))
+
+@case('write')
+def bench_write(fmt, cfgfile, cfgdict):
+    c = _new(fmt, cfgfile)
+    return(_timed(c.write))
+
+@case('write_thru')
+def bench_write_thru(fmt, cfgfile, cfgdict):
+    c = _new(fmt, cfgfile, write_thru=True)
+    def loop():
+        for i in range(WRITE_THRU_LOOPS):
+            c.cfg = c.cfg
+    return(_timed(loop))
+
+@case('yaml_rt_round_trip', formats=('yaml',))
+def bench_yaml_rt_round_trip(fmt, cfgfile, cfgdict):
+    c = _new(fmt, cfgfile, typ='rt')
+    def round_trip():
+        c.read()
+        c.write()
+    return(_timed(round_trip))
+
+@case('shm_subscribe', formats=('yaml',))
+def bench_shm_subscribe(fmt, cfgfile, cfgdict):
+    with configshm.Publisher(_new(fmt, cfgfile)) as p, configshm.Subscriber(p.name) as s:
+        return(_timed(lambda: s.cfg))
+
+#------------------------------------------------------------------------------
+def run(sizes=DEFAULT_SIZES, depths=DEFAULT_DEPTHS, formats=tuple(FORMATS), cases=None, repeat=3, workdir=None):
+    """
+    Runs the benchmark cases, **cases** (all if None), for every combination of
+    **sizes**, **depths** and **formats**, each **repeat** times.
+
+    Returns:
+
+        A dictionary with a **meta** section describing the run and a **results** list
+        holding one dictionary per case, with its best and median times in seconds.
+
+    """
+    results = []
+    if not cases or 'import' in cases:
+        # a compressed format imports the same module as its uncompressed one
+        for fmt in (f for f in formats if '.' not in f):
+            times = [import_time(FORMATS[fmt].__module__) for i in range(repeat)]
+            results.append({'case'   : 'import',
+                            'format' : fmt,
+                            'size'   : '-',
+                            'depth'  : 0,
+                            'bytes'  : 0,
+                            'best'   : min(times),
+                            'median' : statistics.median(times)})
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size_name in sizes:
+            for depth in depths:
+                cfgdict = synthetic_cfg(SIZES[size_name], depth)
+                for fmt in formats:
+                    cfgfile = os.path.join(tmp, 'bench' + EXTENSIONS[fmt])
+                    FORMATS[fmt](cfgdict, cfgfile=cfgfile, force=True)
+                    for name, (func, case_formats) in _cases.items():
+                        if cases and name not in cases:
+                            continue
+                        if case_formats and fmt not in case_formats:
+                            continue
+                        times = [func(fmt, cfgfile, cfgdict) for i in range(repeat)]
+                        results.append({'case'   : name,
+                                        'format' : fmt,
+                                        'size'   : size_name,
+                                        'depth'  : depth,
+                                        'bytes'  : os.path.getsize(cfgfile),
+                                        'best'   : min(times),
+                                        'median' : statistics.median(times)})
+                    os.remove(cfgfile)
+
+    meta = {'python'   : platform.python_version(),
+            'platform' : platform.platform(),
+            'time'     : time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat'   : repeat}
+    return({'meta' : meta, 'results' : results})
+
+def _key(result):
+    return((result['case'], result['format'], result['size'], result['depth']))
+
+def compare(current, baseline, tolerance=0.10):
+    """
+    Compares the results of the run, **current**, with those of an earlier run, **baseline**.
+
+    Returns:
+
+        A list of (case, format, size, depth, baseline seconds, current seconds, ratio) tuples,
+        one for each case slower than its baseline by more than the **tolerance** fraction.
+
+    """
+    base = {_key(r) : r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        b = base.get(_key(r))
+        if b is None or b['best'] <= 0:
+            continue
+        ratio = r['best'] / b['best']
+        if ratio > 1 + tolerance:
+            regressions.append(_key(r) + (b['best'], r['best'], ratio))
+    return(regressions)
+
+def report(results, stream=sys.stdout):
+    """
+    Writes a human readable table of the **results** of a run to **stream**.
+    """
+    stream.write("%-22s %-8s %-6s %5s %12s %12s\n" % ('case', 'format', 'size', 'depth', 'best (s)', 'median (s)'))
+    for r in results['results']:
+        stream.write("%-22s %-8s %-6s %5d %12.6f %12.6f\n" % (r['case'], r['format'], r['size'], r['depth'], r['best'], r['median']))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the configjson and configyaml modules.")
+    parser.add_argument('--sizes',   default=','.join(DEFAULT_SIZES), help="comma separated sizes, from: %s" % ', '.join(SIZES))
+    parser.add_argument('--depths',  default=','.join(str(d) for d in DEFAULT_DEPTHS), help="comma separated nesting depths")
+    parser.add_argument('--formats', default=','.join(FORMATS), help="comma separated formats, from: %s" % ', '.join(FORMATS))
+    parser.add_argument('--cases',   default=None, help="comma separated cases, from: import, %s" % ', '.join(_cases))
+    parser.add_argument('--repeat',  type=int, default=3, help="times each case is run, the best is kept")
+    parser.add_argument('--output',  default=None, help="write the results as JSON to this file")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare the results with the baseline")
+    parser.add_argument('--baseline',  default=BASELINE_FILE, help="baseline file, default: %(default)s")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed slow down fraction, default: %(default)s")
+    args = parser.parse_args(argv)
+
+    results = run(sizes=args.sizes.split(','),
+                  depths=[int(d) for d in args.depths.split(',')],
+                  formats=args.formats.split(','),
+                  cases=args.cases.split(',') if args.cases else None,
+                  repeat=args.repeat)
+    report(results)
+
+    if args.output:
+        with open(args.output, mode='w') as fp:
+            json.dump(results, fp, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, mode='w') as fp:
+            json.dump(results, fp, indent=4)
+
+    if args.compare:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.tolerance)
+        for (name, fmt, size, depth, before, after, ratio) in regressions:
+            print("REGRESSION %s %s %s depth=%d: %.6fs -> %.6fs (x%.2f)" % (name, fmt, size, depth, before, after, ratio))
+        return(1 if regressions else 0)
+
+    return(0)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module prefork
+
+Benchmark of the memory a forked worker shares with the parent that preloaded its
+configuration, with and without the compaction and **gc.freeze()** done by
+**configpreload.preload()**.
+
+For each combination, a fresh process writes a synthetic JSON configuration,
+preloads it, and forks a worker, which runs a full garbage collection -- as any
+long running worker soon does -- and then reports how much of its memory is
+still shared with the parent and how much has become private to it. Linux only.
+
+Run it from the root of the project::
+
+    python -m benchmarks.prefork
+    python -m benchmarks.prefork --size 100MB
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import sys
+import gc
+import json
+import argparse
+import tempfile
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import configjson
+import configpreload
+from benchmarks import bench
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The (compact, freeze) combinations measured.
+SCENARIOS = ((False, False), (False, True), (True, False), (True, True))
+
+#------------------------------------------------------------------------------
+def _fork_and_report(report):
+    # runs report() in a forked child and returns what it wrote to the pipe
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        status = 1
+        try:
+            os.write(wfd, json.dumps(report()).encode('utf-8'))
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(wfd)
+    with os.fdopen(rfd, 'rb') as fp:
+        data = fp.read()
+    os.waitpid(pid, 0)
+    return(json.loads(data.decode('utf-8')))
+
+def measure(cfgfile, compact, freeze):
+    """
+    Preloads **cfgfile**, in a process of its own, then forks a worker and returns
+    the worker's **configpreload.memory_usage()** after a full garbage collection.
+    """
+    def parent():
+        configpreload.preload([cfgfile], compact=compact, freeze=freeze)
+        def worker():
+            gc.collect()
+            return(configpreload.memory_usage())
+        return(_fork_and_report(worker))
+    return(_fork_and_report(parent))
+
+def run(size='10MB', depth=2):
+    """
+    Returns one result dictionary per scenario in **SCENARIOS**, for a synthetic
+    configuration of the named **size** and **depth**.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cfgfile = os.path.join(tmp, 'prefork.json')
+        configjson.Config(bench.synthetic_cfg(bench.SIZES[size], depth), cfgfile=cfgfile, force=True)
+        for compact, freeze in SCENARIOS:
+            usage = measure(cfgfile, compact, freeze)
+            results.append(dict(usage, size=size, compact=compact, freeze=freeze))
+    return(results)
+
+def report(results, stream=sys.stdout):
+    """
+    Writes **results** to **stream** as a table, in megabytes.
+    """
+    stream.write("%-8s %-8s %-8s %12s %12s\n" % ('size', 'compact', 'freeze', 'shared MB', 'private MB'))
+    for r in results:
+        stream.write("%-8s %-8s %-8s %12.1f %12.1f\n" % (r['size'], r['compact'], r['freeze'],
+                                                         r['shared'] / 1e6, r['private'] / 1e6))
+
+def main(argv=None):
+    """
+    Command line entry point, see **python -m benchmarks.prefork --help**.
+    """
+    parser = argparse.ArgumentParser(description="Measure memory shared with forked workers.")
+    parser.add_argument('--size',  default='10MB', choices=sorted(bench.SIZES), help="synthetic configuration size")
+    parser.add_argument('--depth', type=int, default=2, help="synthetic configuration depth")
+    args = parser.parse_args(argv)
+    report(run(args.size, args.depth))
+    return(0)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    sys.exit(main())
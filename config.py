@@ -7,7 +7,18 @@ Module config
 
 """
 import os.path
+import io
 import abc
+import copy
+import time
+import builtins
+import importlib
+import contextlib
+
+import configsnapshot
+import configcow
+import configcompact
+import configstats
 
 #------------------------------------------------------------------------------
 class ConfigFileNamesDirException(Exception):
@@ -18,6 +29,20 @@ class ConfigFileNamesDirException(Exception):
     pass
 
 #------------------------------------------------------------------------------
+class ConfigValidationException(Exception):
+    """
+    Custom exception raised by **validate()** when a configuration dictionary
+    is not acceptable. Raising it inside a **transaction()** rolls the transaction back.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+class ConfigFormatException(Exception):
+    """
+    Custom exception raised by **open()** and **detect_format()** when the format
+    of a **cfgfile** cannot be determined, or names no registered format.
+    """
+    pass
 
 #------------------------------------------------------------------------------
 class Config(metaclass=abc.ABCMeta):
@@ -35,6 +60,10 @@ class Config(metaclass=abc.ABCMeta):
         after the file already exists, use the **force** parameter. The default is the value of the
         DEFAULT_CFG_DICT attribute.
 
+        The dictionary is not used directly but through a copy-on-write **configcow.CowDict**,
+        so instances built from the same dictionary share it, and changes made through one
+        instance's **cfg** touch neither the dictionary nor the other instances.
+
         **cfgfile** - a string 
 
         Specifies the configuration file name, relative or absolute.
@@ -58,6 +87,16 @@ class Config(metaclass=abc.ABCMeta):
         **cfgfile**, being immediately updated. If False, the configurate dictionary and the configuration file will not
         be in sync until the write method is executed. The default is the value of the **DEFAULT_WRITE_THRU** attribute.
 
+        **compact** - a boolean
+
+        If True, the **cfgfile** is loaded in compact form, see the **compact** property.
+        The default is the value of the **DEFAULT_COMPACT** attribute.
+
+        **includes** - a boolean
+
+        If True, include directives in the **cfgfile** are resolved, see the **includes** property.
+        The default is the value of the **DEFAULT_INCLUDES** attribute.
+
     .. note:: If any of the class constructor parameters passed are not of the correct type,
               the default value for that parameter will be used. See Class Attributes for
               default values.
@@ -103,17 +142,71 @@ class Config(metaclass=abc.ABCMeta):
     #: Default configuration file text encoding, **encoding**, if none is specified during class instantiation.
     DEFAULT_ENCODING   = 'utf-8'
 
+    #: Default value of the **journal** property.
+    DEFAULT_JOURNAL    = False
+
+    #: Size in bytes the **journalfile** may reach before it is compacted into the **cfgfile**.
+    JOURNAL_LIMIT      = 64 * 1024
+
+    #: Suffix added to the **cfgfile** name to form the **journalfile** name.
+    JOURNAL_SUFFIX     = ".journal"
+
+    #: Default value of the **history** property.
+    DEFAULT_HISTORY    = False
+
+    #: Number of versions the history keeps, or None to keep every version; see **prune_history()**.
+    HISTORY_LIMIT      = 100
+
+    #: Suffix added to the **cfgfile** name to form the **historydir** name.
+    HISTORY_SUFFIX     = ".history"
 
-    def __init__(self, cfgdict=None, cfgfile=None, encoding=None, force=None, write_thru=None):
+    #: Default value of the **render_cache** property.
+    DEFAULT_RENDER_CACHE = False
+
+    #: Default compact parameter value, **compact**, if none is specified during class instantiation.
+    DEFAULT_COMPACT    = False
+
+    #: Default value of the **compresslevel** property.
+    DEFAULT_COMPRESSLEVEL = None
+
+    #: Default includes parameter value, **includes**, if none is specified during class instantiation.
+    DEFAULT_INCLUDES   = False
+
+
+    def __init__(self, cfgdict=None, cfgfile=None, encoding=None, force=None, write_thru=None, compact=None, includes=None):
 
         self._cfgfile    = os.path.abspath(cfgfile if isinstance(cfgfile, str) else self.DEFAULT_CFG_FILE)
         self._encoding   = encoding if isinstance(encoding, str) else self.DEFAULT_ENCODING
-        self._cfgdict   = cfgdict if isinstance(cfgdict, dict) else self.DEFAULT_CFG_DICT
+        # shared, copy-on-write, with every other instance built from the same dictionary
+        self._cfgdict    = configcow.share(cfgdict if isinstance(cfgdict, dict) else self.DEFAULT_CFG_DICT)
         self._force      = force if isinstance(force, bool) else self.DEFAULT_FORCE
         self._write_thru = write_thru if isinstance(write_thru, bool) else self.DEFAULT_WRITE_THRU
+        self._compact    = compact if isinstance(compact, bool) else self.DEFAULT_COMPACT
+        self._includes   = includes if isinstance(includes, bool) else self.DEFAULT_INCLUDES
+        self._resolver   = None
 
         self._cfg_def_passed = cfgdict
 
+        self._view         = None
+        self._view_version = None
+        self._columns      = {}
+        self._columns_version = None
+        self._snapshot     = None
+        self._interpolator = None
+        self._transaction_depth = 0
+        self._journal      = self.DEFAULT_JOURNAL
+        self._journal_base = None
+        # the state of the cfgfile that journal records apply to
+        self._journal_stamp = None
+        self._history      = self.DEFAULT_HISTORY
+        self._historian    = None
+        self._history_stamp = None
+        self._stats        = None
+        self._render_cache = self.DEFAULT_RENDER_CACHE
+        self._renders      = {}
+        self._renders_of   = (None, None)
+        self._compresslevel = self.DEFAULT_COMPRESSLEVEL
+
         self._initCfg()
 
     def _initCfg(self):
@@ -146,6 +239,180 @@ class Config(metaclass=abc.ABCMeta):
                 self.write()
 
 
+    def _instrumented(self):
+        return(self._stats is not None or configstats.GLOBAL is not None)
+
+    def _record(self, event, **fields):
+        """
+        Passes an instrumentation **event** to this instance's **stats** and to the
+        process wide **configstats.GLOBAL** stats, whichever are enabled.
+        """
+        if self._stats is not None:
+            self._stats.record(event, self, **fields)
+        if configstats.GLOBAL is not None:
+            configstats.GLOBAL.record(event, self, **fields)
+
+    def _open_cfgfile(self, mode, binary=False, cfgfile=None):
+        """
+        Opens the **cfgfile**, or the file named **cfgfile**, for reading, **mode** 'r',
+        or writing, **mode** 'w', as text in the configured **encoding** or, if
+        **binary** is True, as bytes.
+        A compressed **cfgfile** is streamed through its codec, see **open_stream()**.
+        """
+        return(open_stream(cfgfile or self._cfgfile, mode, binary, self._encoding, self._compresslevel))
+
+    def _read_cfgfile(self, parse, binary=False, cfgfile=None):
+        """
+        Reads the contents of the **cfgfile**, or of the file named **cfgfile**, text
+        or, if **binary** is True, bytes, and returns the result of **parse(contents)**.
+        Sub-classes use this from read(), so that file I/O and parsing can be 
+        measured separately -- see the **stats** property.
+        """
+        if not self._instrumented():
+            with self._open_cfgfile('r', binary, cfgfile) as cp:
+                text = cp.read()
+            return(parse(text))
+
+        start = time.perf_counter()
+        with self._open_cfgfile('r', binary, cfgfile) as cp:
+            text = cp.read()
+        size = os.path.getsize(cfgfile or self._cfgfile)
+        loaded = time.perf_counter()
+        result = parse(text)
+        self._record('read', bytes=size, io_time=loaded - start, parse_time=time.perf_counter() - loaded)
+        return(result)
+
+    def _load_cfgfile(self, parse, binary=False):
+        """
+        Returns the contents of the **cfgfile**, as **_read_cfgfile()** does, with its
+        include directives resolved if the **includes** property is True.
+        Sub-classes use this from read().
+        """
+        if not self._includes:
+            self._resolver = None
+            return(self._read_cfgfile(parse, binary))
+        if self._resolver is None or self._resolver.cfgfile != self._cfgfile:
+            # imported here, like the other feature modules, to keep importing config fast
+            import configinclude
+            self._resolver = configinclude.Resolver(self._cfgfile, None)
+        self._resolver.parse = lambda path: self._read_cfgfile(parse, binary, path)
+        return(self._resolver.load())
+
+    def _persisted(self, cfgdict):
+        """
+        Returns **cfgdict** as it is to be written: with its copy-on-write dictionaries
+        as plain ones (see **configcow.plain()**) and, if it is the configuration
+        dictionary, **cfg**, loaded with includes, with the include directives of
+        the **cfgfile** back in place of what they included.
+        Sub-classes use this from write().
+
+        Raises:
+
+            configinclude.ConfigIncludeException if part of **cfg** that comes from an
+            included file was changed.
+
+        """
+        if self._resolver is None or cfgdict is not self._cfgdict:
+            return(configcow.plain(cfgdict))
+        return(self._resolver.restore(configcompact.thaw(configcow.plain(cfgdict))))
+
+    def _write_cfgfile(self, serialize, binary=False, cfgdict=None):
+        """
+        Writes the contents returned by **serialize()**, text or, if **binary** is True,
+        bytes, to the **cfgfile**; **cfgdict** is the dictionary serialized, if it is not
+        **cfg**, for the **history**.
+        Sub-classes use this from write(), so that serialization and file I/O can be
+        measured separately -- see the **stats** property.
+        """
+        if self._history:
+            self._history_preserve()
+
+        if not self._instrumented():
+            text = serialize()
+            with self._open_cfgfile('w', binary) as cp:
+                cp.write(text)
+        else:
+            start = time.perf_counter()
+            text = serialize()
+            serialized = time.perf_counter()
+            with self._open_cfgfile('w', binary) as cp:
+                cp.write(text)
+            # the size on disk, which for a compressed cfgfile is only known once closed
+            size = os.path.getsize(self._cfgfile)
+            self._record('write', bytes=size, io_time=time.perf_counter() - serialized, serialize_time=serialized - start)
+
+        if self._history:
+            data = text if binary else text.encode(self._encoding)
+            if cfgdict is None or cfgdict is self._cfgdict:
+                tree = self.snapshot()
+            else:
+                tree = configsnapshot.freeze(cfgdict)
+            self._history_add(data, tree)
+
+    def _history_store(self):
+        if self._historian is None or self._historian.directory != self.historydir:
+            # imported here, hashlib and tempfile are costly to import and history is optional
+            import confighistory
+            self._historian = confighistory.History(self.historydir)
+        return(self._historian)
+
+    def _cfgfile_stamp(self):
+        try:
+            st = os.stat(self._cfgfile)
+        except OSError:
+            return(None)
+        return((st.st_mtime_ns, st.st_size, st.st_ino))
+
+    def _history_preserve(self):
+        """
+        Adds the **cfgfile** about to be overwritten to the history, unless it is the
+        version this instance last wrote -- it was written before the history was kept,
+        or by someone else.
+        """
+        stamp = self._cfgfile_stamp()
+        if stamp is None or stamp == self._history_stamp:
+            return
+        with open_stream(self._cfgfile, 'r', binary=True) as fp:
+            data = fp.read()
+        self._history_store().add(data)
+
+    def _history_add(self, data, tree=None):
+        history = self._history_store()
+        history.add(data, tree)
+        self._history_stamp = self._cfgfile_stamp()
+        if self.HISTORY_LIMIT is not None and len(history.versions()) > self.HISTORY_LIMIT:
+            history.prune(keep=self.HISTORY_LIMIT)
+
+    def _rendered(self, serialize, options=None):
+        """
+        Returns **serialize()**, the serialized configuration dictionary, or a copy
+        of it kept from an earlier call with the same **options** (a dictionary of
+        serializer keyword arguments) if the configuration has not changed since --
+        see the **render_cache** property.
+        Sub-classes use this from write() when serializing **cfg**.
+        """
+        if not self._render_cache:
+            return(serialize())
+        try:
+            key = tuple(sorted(options.items())) if options else ()
+            hash(key)
+        except TypeError:
+            # unhashable options cannot be cached
+            return(serialize())
+
+        snapshot = self.snapshot()
+        version, cached = self._renders_of
+        if version != self._cfgversion or cached is not snapshot:
+            self._renders    = {}
+            self._renders_of = (self._cfgversion, snapshot)
+        elif key in self._renders:
+            if self._instrumented():
+                self._record('cache_hit', cache='render')
+            return(self._renders[key])
+
+        self._renders[key] = serialize()
+        return(self._renders[key])
+
     @abc.abstractmethod
     def read(self):
         """
@@ -159,6 +426,30 @@ class Config(metaclass=abc.ABCMeta):
         
         """
 
+    def reload(self):
+        """
+        Reads the **cfgfile** again. If the **includes** property is True and only
+        included files have changed since the last **read()**, just those files
+        are parsed, and their contents replace what they included before, in
+        **cfg** itself; the rest of **cfg** is left as it is.
+
+        Returns:
+
+            The configuration dictionary accessible by the **cfg** property.
+
+        """
+        if self._resolver is None or self._compact:
+            return(self.read())
+        try:
+            changed = self._resolver.reload(self._cfgdict)
+        except (ValueError, LookupError, TypeError):
+            # the cfgfile itself changed, or cfg no longer has the shape it was loaded with
+            return(self.read())
+        if changed:
+            # a new version, so that views and caches of cfg are refreshed
+            self._cfgdict = self._cfgdict
+        return(self._cfgdict)
+
     @abc.abstractmethod
     def write(self):
         """
@@ -202,12 +493,689 @@ class Config(metaclass=abc.ABCMeta):
         """
         if isinstance(dict_value, dict):
             self._cfgdict = dict_value
-            if self._write_thru:
-                self.write()
+            if self._write_thru and not self._transaction_depth:
+                if self._instrumented():
+                    self._record('write_thru')
+                self.commit()
         else:
             raise TypeError("Assignment value to cfg vmust be a dictionary!")
 
 
+    @property
+    def _cfgdict(self):
+        """
+        The configuration dictionary itself. Sub-classes assign to this in their
+        read() methods, so routing it through a property lets the base class
+        notice every reload and every **cfg** assignment -- see **cfgversion**.
+        """
+        return(self.__cfgdict)
+
+    @_cfgdict.setter
+    def _cfgdict(self, dict_value):
+        self.__cfgdict   = dict_value
+        self._cfgversion = getattr(self, '_cfgversion', 0) + 1
+
+    @property
+    def cfgversion(self):
+        """
+        Property
+
+        **cfgversion** - an integer
+
+        Incremented each time the configuration dictionary is replaced, either by a 
+        **cfg** assignment or by a **read()**. 
+
+        .. note:: Changes made *inside* the dictionary, as in cfg['key'] = value, 
+                  do not change the version.
+
+        """
+        return(self._cfgversion)
+
+    @property
+    def view(self):
+        """
+        Property
+
+        **view** - a read-only, attribute-access view of **cfg**
+
+        Each section of the configuration dictionary is presented as an instance of a
+        generated, frozen, slotted class (see the **configview** module), so that::
+
+            c.cfg['Logging']['LogFileName']
+
+        may be written as::
+
+            c.view.Logging.LogFileName
+
+        The view is built on first use and re-built after a **read()** or a **cfg** assignment.
+        Use **view.to_dict()** to convert a view back into a dictionary that can be
+        assigned to **cfg** and written.
+
+        """
+        if self._view_version != self._cfgversion:
+            # imported here, dataclasses is costly to import and views are optional
+            import configview
+            self._view         = configview.build(self._cfgdict)
+            self._view_version = self._cfgversion
+        elif self._instrumented():
+            self._record('cache_hit', cache='view')
+        return(self._view)
+
+    @property
+    def interpolated(self):
+        """
+        Property
+
+        **interpolated** - a read-only snapshot of **cfg** with its references resolved
+
+        Strings in **cfg** may refer to other values of it, as in '${server.host}' or
+        '${/server/host}', and to environment variables, as in '${env:HOME}' or
+        '${env:HOME:-/root}' with a default; see the **configinterp** module::
+
+            c.cfg['users']              # '${base}/users'
+            c.interpolated['users']     # 'https://api.example.com/users'
+
+        **cfg** itself keeps the references, and it is what **write()** persists.
+
+        The references are resolved in dependency order, each once, and the results
+        kept. Later on, after changes to **cfg**, a **read()** or changes to the
+        environment, only the strings that changed or depend on something that did
+        are resolved again. Finding them takes a **snapshot()**, which visits all of
+        **cfg**, and then work proportional to the size of the change.
+
+        Returns:
+
+            A **configsnapshot.FrozenDict**, see **snapshot()**.
+
+        Raises:
+
+            configinterp.ConfigInterpolationException if a reference names something
+            that does not exist or is part of a cycle of references.
+
+        """
+        if self._interpolator is None:
+            import configinterp
+            self._interpolator = configinterp.Interpolator()
+        first     = self._interpolator.tree is None
+        evaluated = self._interpolator.update(self.snapshot())
+        if not (first or evaluated) and self._instrumented():
+            self._record('cache_hit', cache='interpolated')
+        return(self._interpolator.tree)
+
+    def columns(self, path, fields=None, structured=False):
+        """
+        Returns the list of records -- dictionaries with the same keys -- at **path**
+        in **cfg** as NumPy arrays, for vectorized arithmetic (see the **configcolumns**
+        module)::
+
+            cols = c.columns('/Balancer/backends', fields=('port', 'weight'))
+            share = cols['weight'] / cols['weight'].sum()
+
+        Args:
+
+            **path** - a JSON Pointer string, as in '/Balancer/backends', or a sequence of keys
+
+            **fields** - a sequence of the keys to extract, by default those of the first record
+
+            **structured** - if True, return a single structured array rather than one array per key
+
+        The arrays are read-only, and kept until the records at **path** change, so
+        repeated calls cost a comparison of the records with a copy of them kept with
+        the arrays, rather than a conversion; changes made *inside* **cfg** are seen,
+        and changes elsewhere in it cost nothing.
+
+        .. note:: A value replaced by an equal one of another type, as 1 by 1.0, is
+                  not seen as a change.
+
+        Returns:
+
+            A dictionary of NumPy arrays, one per key, or a NumPy structured array.
+
+        Raises:
+
+            ImportError if NumPy is not installed.
+
+            KeyError if there is nothing at **path**; TypeError if it is not a list of records.
+
+        """
+        # imported here, numpy is optional and costly to import
+        import configcolumns
+        keys = configcolumns.path_keys(path)
+        key  = (keys, None if fields is None else tuple(fields), bool(structured))
+        records = configcolumns.resolve(self._cfgdict, keys)
+
+        if self._columns_version != self._cfgversion:
+            self._columns = {}
+            self._columns_version = self._cfgversion
+        # the records are kept with the arrays, and compared with them, which takes far
+        # less than making the arrays again; compact records cannot change at all
+        immutable = isinstance(records, configcompact.FrozenList)
+        cached    = self._columns.get(key)
+        if cached is not None and (cached[0] is records if immutable else cached[0] == records):
+            if self._instrumented():
+                self._record('cache_hit', cache='columns')
+            result = cached[1]
+            return(result if structured else dict(result))
+
+        if structured:
+            result = configcolumns.structured(records, fields)
+        else:
+            result = configcolumns.columns(records, fields)
+        self._columns[key] = (records if immutable else copy.deepcopy(records), result)
+        return(result if structured else dict(result))
+
+    def select(self, selector):
+        """
+        Generates the (path, value) pairs of the values in **cfg** selected by
+        **selector**, lazily, in document order, with the paths as JSON Pointer
+        strings (see the **configquery** module)::
+
+            for path, timeout in c.select('services.*.endpoints[*].timeout'):
+                ...
+
+        The selector is compiled the first time it is used and kept, so repeating a
+        query does not parse it again. Keys it names are looked up, not searched for.
+
+        .. note:: **cfg** must not be changed while the generator is in use.
+
+        Raises:
+
+            configquery.ConfigQueryException if **selector** cannot be parsed.
+
+        """
+        import configquery
+        return(configquery.compile(selector).find(self._cfgdict))
+
+    def snapshot(self):
+        """
+        Returns an immutable snapshot of the configuration dictionary, **cfg**.
+
+        The snapshot is made of read-only mappings (see the **configsnapshot** module),
+        tuples and frozensets, so it is safe to hand to other threads without copying;
+        later changes to **cfg** are not visible through it.
+
+        Successive snapshots share every section that has not changed in between,
+        so taking a snapshot after a small edit allocates only what the edit touched.
+        It still visits every value of **cfg**, though, in time proportional to the
+        size of the configuration.
+
+        Returns:
+
+            A **configsnapshot.FrozenDict**.
+
+        """
+        self._snapshot = configsnapshot.freeze(self._cfgdict, self._snapshot)
+        return(self._snapshot)
+
+    def commit(self):
+        """
+        Persists the changes made to **cfg** since it was last read or written.
+
+        If the **journal** property is False, this is the same as **write()**.
+
+        If the **journal** property is True, only the differences are appended to the
+        **journalfile**, as one record, so the bytes written are proportional to the
+        change rather than to the size of the configuration; finding the differences
+        takes a walk of **cfg**, as for **snapshot()**. Once the **journalfile** grows past
+        **JOURNAL_LIMIT** bytes it is compacted, by a **write()** of the whole
+        configuration to the **cfgfile**, and removed.
+
+        This is the method used by write thru and by **transaction()**.
+
+        Returns:
+
+            None
+
+        """
+        if not self._journal or self._journal_base is None:
+            self.write()
+            return
+
+        import configjournal
+        current = configsnapshot.freeze(self._cfgdict, self._journal_base)
+        ops     = configjournal.diff(self._journal_base, current)
+        if ops:
+            written, size = configjournal.append(self.journalfile, ops, self._encoding, self._journal_stamp)
+            self._journal_base = current
+            if self._instrumented():
+                self._record('journal_append', bytes=written)
+            if size > self.JOURNAL_LIMIT:
+                self.write()
+
+    def _journal_replay(self, cfgdict):
+        """
+        Applies any records in the **journalfile** to **cfgdict**, which a sub-class
+        read() has just loaded from the **cfgfile**, and returns the result.
+        A journal started on another state of the **cfgfile** is removed instead.
+        Sub-classes call this from read().
+        """
+        self._journal_stamp = self._cfgfile_stamp()
+        if os.path.exists(self.journalfile):
+            import configjournal
+            records = configjournal.records(self.journalfile, self._encoding, self._journal_stamp)
+            if not records:
+                configjournal.remove(self.journalfile)
+            elif configcompact.is_compact(cfgdict):
+                cfgdict = configcompact.thaw(cfgdict)
+            for ops in records:
+                cfgdict = configjournal.patch(cfgdict, ops)
+        if self._compact:
+            cfgdict = configcompact.compact(cfgdict)
+        self._journal_base = configsnapshot.freeze(cfgdict) if self._journal else None
+        return(cfgdict)
+
+    def _journal_reset(self):
+        """
+        Discards the **journalfile** once the whole configuration has been written
+        to the **cfgfile**. Sub-classes call this from write().
+        """
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.journalfile)
+        self._journal_stamp = self._cfgfile_stamp()
+        self._journal_base  = configsnapshot.freeze(self._cfgdict) if self._journal else None
+
+    @property
+    def journal(self):
+        """
+        Property
+
+        **journal** - a boolean
+
+        If True, **commit()** (and so write thru and **transaction()**) appends only the
+        changes to the configuration to the **journalfile**, rather than re-writing the
+        whole **cfgfile**. The **journalfile** is replayed by **read()** and compacted
+        into the **cfgfile** by **write()**.
+
+        .. note:: Journal records are JSON, whatever the format of the **cfgfile**, so
+                  values must be JSON serializable.
+
+        The default is the value of the **DEFAULT_JOURNAL** attribute.
+
+        Raises:
+
+            TypeError if **journal** assignment value is not a boolean.
+
+        """
+        return(self._journal)
+
+    @journal.setter
+    def journal(self, boolean_value):
+        if isinstance(boolean_value, bool):
+            self._journal = boolean_value
+            # the first commit after enabling the journal writes the whole cfgfile
+            self._journal_base = None
+        else:
+            raise TypeError("Assignment value to journal must be a boolean!!")
+
+    @property
+    def history(self):
+        """
+        Property
+
+        **history** - a boolean
+
+        If True, every version of the **cfgfile** written by **write()** is kept in a
+        content-addressed store in the **historydir** (see the **confighistory** module),
+        as is the **cfgfile** it overwrites, if it was not written this way, so that
+        **rollback()** can bring back any of them. Only the newest **HISTORY_LIMIT**
+        versions are kept; see also **prune_history()**.
+
+        The default is the value of the **DEFAULT_HISTORY** attribute.
+
+        Raises:
+
+            TypeError if **history** assignment value is not a boolean.
+
+        """
+        return(self._history)
+
+    @history.setter
+    def history(self, boolean_value):
+        if isinstance(boolean_value, bool):
+            self._history = boolean_value
+        else:
+            raise TypeError("Assignment value to history must be a boolean!!")
+
+    @property
+    def historydir(self):
+        """
+        Property
+
+        **historydir** - a string
+
+        Returns the *full absolute path* of the directory of the history kept alongside the **cfgfile**.
+
+        """
+        return(self._cfgfile + self.HISTORY_SUFFIX)
+
+    def versions(self):
+        """
+        Returns the list of the versions of the **cfgfile** in its history, oldest
+        first, as **confighistory.Version** tuples of the **hash** of the content,
+        the **time** it was stored and its **size**.
+        """
+        return(self._history_store().versions())
+
+    def rollback(self, n=1):
+        """
+        Brings back the version of the **cfgfile** **n** versions before the newest in
+        its history, by writing it back, byte for byte, as the newest version. The
+        **cfgfile** is parsed again only if the parsed configuration of that version
+        is no longer kept in memory, has keys other than strings, which the format
+        may have written differently, or the **includes** property is True.
+
+        Any **journalfile** is discarded, and changes made to **cfg** and not written
+        are lost.
+
+        Returns:
+
+            The configuration dictionary accessible by the **cfg** property.
+
+        Raises:
+
+            confighistory.ConfigHistoryException if the history does not hold that many versions.
+
+        """
+        history = self._history_store()
+        self._history_preserve()
+        version = history.back(n)
+        data    = history.get(version)
+        tree    = history.tree(version)
+
+        with open_stream(self._cfgfile, 'w', True, compresslevel=self._compresslevel) as fp:
+            fp.write(data)
+        self._history_add(data, tree)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.journalfile)
+
+        # a tree with keys other than strings may not be what the bytes parse to: JSON
+        # writes the key 1 as '1', so the kept tree is only used when it has none
+        if (tree is not None and self._resolver is None and type(self._cfgdict) in (dict, configcow.CowDict)
+            and _string_keys(tree)):
+            if self._instrumented():
+                self._record('cache_hit', cache='history')
+            self._cfgdict = configsnapshot.thaw(tree)
+            self._snapshot = tree
+        else:
+            self.read()
+        self._journal_stamp = self._cfgfile_stamp()
+        self._journal_base  = configsnapshot.freeze(self._cfgdict) if self._journal else None
+        return(self._cfgdict)
+
+    def prune_history(self, keep=None, max_age=None):
+        """
+        Drops from the history all but the newest **keep** versions, if **keep** is given,
+        and the versions older than **max_age** seconds, if it is given. The newest
+        version is always kept.
+
+        Returns:
+
+            The number of versions dropped.
+
+        """
+        return(self._history_store().prune(keep, max_age))
+
+    @property
+    def journalfile(self):
+        """
+        Property
+
+        **journalfile** - a string
+
+        Returns the *full absolute path* of the journal kept alongside the **cfgfile**.
+
+        """
+        return(self._cfgfile + self.JOURNAL_SUFFIX)
+
+    def validate(self, cfgdict):
+        """
+        Checks that **cfgdict** is an acceptable configuration dictionary before
+        a **transaction()** commits it.
+
+        The default accepts any dictionary. Sub-classes may over-ride this method
+        to enforce their own rules.
+
+        Raises:
+
+            ConfigValidationException if **cfgdict** is not acceptable.
+
+        """
+        if not isinstance(cfgdict, dict):
+            raise ConfigValidationException("Configuration must be a dictionary!")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Context manager that groups several changes to **cfg** into one update::
+
+            with c.transaction():
+                c.cfg['Application']['width'] = 80
+                c.cfg['Application']['height'] = 24
+                c.cfg = dict(c.cfg, verbose=True)
+
+        Inside the block **cfg** assignments do not write thru to the **cfgfile**.
+        When the block exits normally the result is checked with **validate()** and
+        then persisted with exactly one **commit()**, whatever the **writethru** setting.
+
+        If the block, the validation, or the write raises an exception, **cfg** is
+        restored to its state before the transaction and the exception is re-raised.
+
+        Transactions may be nested; only the outer-most one validates and writes.
+
+        Raises:
+
+            ConfigValidationException if **validate()** rejects the result.
+
+        """
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        # a compact cfg cannot be changed in place, only replaced
+        original = self._cfgdict
+        saved    = original if configcompact.is_compact(original) else copy.deepcopy(original)
+        writing  = False
+
+        self._transaction_depth = 1
+        try:
+            yield self
+            self.validate(self._cfgdict)
+            self._transaction_depth = 0
+            writing = True
+            self.commit()
+        except BaseException:
+            if saved is original:
+                self._cfgdict = saved
+            else:
+                # in place, so that references to cfg taken before stay valid
+                original.clear()
+                original.update(saved)
+                self._cfgdict = original
+            if writing:
+                # the failed write may have truncated the cfgfile, restore it
+                try:
+                    self.write()
+                except Exception:
+                    pass
+            raise
+        finally:
+            self._transaction_depth = 0
+
+    @property
+    def stats(self):
+        """
+        Property
+
+        **stats** - a **configstats.Stats** object, or None
+
+        When set, the reads, writes, write thrus, journal appends and cache hits of
+        this instance are counted and timed in it, and passed on to its hooks.
+        Process wide instrumentation is turned on by **configstats.enable()**.
+        The default is None, no per-instance instrumentation.
+
+        Raises:
+
+            TypeError if **stats** assignment value is not a Stats object or None.
+
+        """
+        return(self._stats)
+
+    @stats.setter
+    def stats(self, stats_value):
+        if stats_value is None or isinstance(stats_value, configstats.Stats):
+            self._stats = stats_value
+        else:
+            raise TypeError("Assignment value to stats must be a configstats.Stats object or None!!")
+
+    @property
+    def render_cache(self):
+        """
+        Property
+
+        **render_cache** - a boolean
+
+        If True, the serialized configuration is kept after a **write()**, one copy for
+        each set of serializer options used, so that writing or exporting an unchanged
+        configuration again only copies it out rather than serializing it anew.
+
+        A kept copy is used only while **cfgversion** is unchanged and a **snapshot()**
+        of **cfg** shows no changes inside it, so edits in place are noticed. Taking
+        that snapshot walks the configuration, which costs far less than a YAML dump
+        but is comparable to a JSON one, hence the per-class **DEFAULT_RENDER_CACHE**.
+
+        .. note:: A snapshot holds the values, not the comments, of a round-trip YAML
+                  configuration, so a change made only to its comments is not noticed.
+
+        Raises:
+
+            TypeError if **render_cache** assignment value is not a boolean.
+
+        """
+        return(self._render_cache)
+
+    @render_cache.setter
+    def render_cache(self, boolean_value):
+        if isinstance(boolean_value, bool):
+            self._render_cache = boolean_value
+            self._renders      = {}
+            self._renders_of   = (None, None)
+        else:
+            raise TypeError("Assignment value to render_cache must be a boolean!!")
+
+    @property
+    def compact(self):
+        """
+        Property
+
+        **compact** - a boolean
+
+        If True, **read()** loads the **cfgfile** in the compact, read-only form of the
+        **configcompact** module: keys are interned, lists of numbers are held in arrays,
+        and dictionaries that share a set of keys are held as tuples of their values.
+        For large configurations made of many similar records this takes a fraction
+        of the memory of dictionaries and lists.
+
+        **cfg** is then a read-only Mapping; it can still be replaced by assigning a
+        dictionary to **cfg**, and **write()** writes it as usual.
+        Changing **compact** takes effect at the next **read()**.
+
+        Raises:
+
+            TypeError if **compact** assignment value is not a boolean.
+
+        """
+        return(self._compact)
+
+    @compact.setter
+    def compact(self, boolean_value):
+        if isinstance(boolean_value, bool):
+            self._compact = boolean_value
+        else:
+            raise TypeError("Assignment value to compact must be a boolean!!")
+
+    @property
+    def compresslevel(self):
+        """
+        Property
+
+        **compresslevel** - an integer or None
+
+        The compression level used by **write()** when the **cfgfile** name ends in the
+        suffix of a compression codec -- '.gz', '.bz2', '.xz' or '.zst', see **open_stream()**.
+        None selects the codec's level in **DEFAULT_COMPRESSLEVELS**. Ignored for
+        uncompressed files.
+
+        Raises:
+
+            TypeError if **compresslevel** assignment value is not an integer or None.
+
+        """
+        return(self._compresslevel)
+
+    @compresslevel.setter
+    def compresslevel(self, level):
+        if level is None or (isinstance(level, int) and not isinstance(level, bool)):
+            self._compresslevel = level
+        else:
+            raise TypeError("Assignment value to compresslevel must be an integer or None!!")
+
+    @property
+    def includes(self):
+        """
+        Property
+
+        **includes** - a boolean
+
+        If True, **read()** resolves the include directives of the **configinclude**
+        module in the **cfgfile** -- a mapping whose only key is '$include', or in YAML
+        a scalar tagged '!include', naming a file, relative to the including file --
+        replacing each with the contents of the file it names. Included files are
+        parsed by the same **read()**, so they are of the same format, and may include
+        other files. A file is parsed at most once per **read()**, however often it is
+        included, and not at all if it has not changed since the last **read()**;
+        **reload()** goes further, and parses only the files that changed.
+
+        **write()** puts the directives back, so only the **cfgfile** is written.
+        Changing what an included file provides must be done in that file: writing
+        **cfg** after such a change raises a **configinclude.ConfigIncludeException**.
+
+        Changing **includes** takes effect at the next **read()**; setting it to False
+        makes **write()** write everything to the **cfgfile**.
+
+        Raises:
+
+            TypeError if **includes** assignment value is not a boolean.
+
+        """
+        return(self._includes)
+
+    @includes.setter
+    def includes(self, boolean_value):
+        if isinstance(boolean_value, bool):
+            self._includes = boolean_value
+            if not boolean_value:
+                self._resolver = None
+        else:
+            raise TypeError("Assignment value to includes must be a boolean!!")
+
+    @property
+    def dependencies(self):
+        """
+        Property
+
+        **dependencies** - a dictionary
+
+        The files each file included, by file, as of the last **read()** with the
+        **includes** property True; empty otherwise.
+        """
+        if self._resolver is None:
+            return({})
+        return(self._resolver.dependencies())
+
     @property
     def writethru(self):
         """
@@ -262,6 +1230,252 @@ class Config(metaclass=abc.ABCMeta):
         else:
             raise TypeError("Assignment value to cfgfile must be a string!!")
 
+#------------------------------------------------------------------------------
+def _string_keys(tree):
+    # True if every key of every mapping in the snapshot, tree, is a string
+    if isinstance(tree, configsnapshot.FrozenDict):
+        return(all(type(k) is str and _string_keys(v) for k, v in tree.items()))
+    if isinstance(tree, tuple):
+        return(all(_string_keys(v) for v in tree))
+    return(True)
+
+
+#------------------------------------------------------------------------------
+# Compression
+#------------------------------------------------------------------------------
+
+#: Compression level of each codec, used when a Config's **compresslevel** is None.
+DEFAULT_COMPRESSLEVELS = {'gzip' : 6, 'bz2' : 9, 'lzma' : 6, 'zstd' : 3}
+
+# file name suffix --> codec name
+_compressions = {'.gz' : 'gzip', '.bz2' : 'bz2', '.xz' : 'lzma', '.zst' : 'zstd'}
+
+_zstd_module = None
+
+def _zstd():
+    """
+    Returns the **zstandard** module, importing it on first use.
+    """
+    global _zstd_module
+    if _zstd_module is None:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Zstandard compressed files require the zstandard package: pip install zstandard") from e
+        _zstd_module = zstandard
+    return(_zstd_module)
+
+def compression(cfgfile):
+    """
+    Returns the name of the codec -- 'gzip', 'bz2', 'lzma' or 'zstd' -- named by the
+    suffix of the file name, **cfgfile**, or None if it has no compression suffix.
+    """
+    return(_compressions.get(os.path.splitext(cfgfile)[1].lower()))
+
+def strip_compression(cfgfile):
+    """
+    Returns the file name, **cfgfile**, without its compression suffix, if it has one.
+    """
+    base, ext = os.path.splitext(cfgfile)
+    return(base if ext.lower() in _compressions else cfgfile)
+
+def _open_codec(path, codec, mode, level):
+    # the codec modules are imported when first used, to keep importing config fast
+    if level is None:
+        level = DEFAULT_COMPRESSLEVELS[codec]
+    if codec == 'gzip':
+        import gzip
+        return(gzip.open(path, mode + 'b', compresslevel=level))
+    if codec == 'bz2':
+        import bz2
+        return(bz2.open(path, mode + 'b', compresslevel=level))
+    if codec == 'lzma':
+        import lzma
+        return(lzma.open(path, mode + 'b', preset=level if mode == 'w' else None))
+    zstd = _zstd()
+    if mode == 'w':
+        return(zstd.open(path, 'wb', cctx=zstd.ZstdCompressor(level=level)))
+    return(zstd.open(path, 'rb'))
+
+def open_stream(path, mode='r', binary=False, encoding=None, compresslevel=None):
+    """
+    Opens the file, **path**, for reading, **mode** 'r', or writing, **mode** 'w',
+    as text in **encoding** or, if **binary** is True, as bytes.
+
+    A file whose name ends in the suffix of a compression codec -- '.gz', '.bz2',
+    '.xz' or '.zst' -- is read and written through the codec as a stream, with
+    no uncompressed copy on disk. **compresslevel** is the level written with,
+    by default the codec's level in **DEFAULT_COMPRESSLEVELS**. Zstandard needs
+    the zstandard package.
+    """
+    codec = compression(path)
+    if codec is None:
+        if binary:
+            return(builtins.open(path, mode=mode + 'b'))
+        return(builtins.open(path, encoding=encoding, mode=mode))
+    stream = _open_codec(path, codec, mode, compresslevel)
+    if binary:
+        return(stream)
+    return(io.TextIOWrapper(stream, encoding=encoding))
+
+#------------------------------------------------------------------------------
+# Format Registry
+#------------------------------------------------------------------------------
+
+#: Number of leading bytes of a **cfgfile** passed to the format sniffers.
+SNIFF_SIZE = 64
+
+# format name --> (module name, class name, sniff function or None);
+# formats registered later are sniffed first
+_formats = {}
+
+# file name extension --> format name
+_extensions = {}
+
+# absolute cfgfile path --> format name detected for it
+_detected = {}
+
+def register_format(name, module, extensions=(), sniff=None, classname='Config'):
+    """
+    Registers the configuration file format, **name**, implemented by the class,
+    **classname**, of the module named **module**. The module is not imported until
+    a **cfgfile** of this format is opened, so registering costs nothing for formats
+    that are never used.
+
+    Args:
+
+        **extensions** - a sequence of file name extensions, such as '.json', that
+        identify the format. A later registration of the same extension wins.
+
+        **sniff** - a function taking the first **SNIFF_SIZE** bytes of a file and
+        returning True if they look like this format, used when the extension is unknown.
+
+    """
+    _formats.pop(name, None)
+    _formats[name] = (module, classname, sniff)
+    for ext in extensions:
+        _extensions[ext.lower()] = name
+    _detected.clear()
+
+def format_class(name):
+    """
+    Returns the Config sub-class registered for the format, **name**, importing its
+    module if this is the first use.
+
+    Raises:
+
+        ConfigFormatException if no format **name** is registered.
+
+    """
+    try:
+        module, classname, sniff = _formats[name]
+    except KeyError:
+        raise ConfigFormatException("No configuration format named '%s' is registered!" % name)
+    return(getattr(importlib.import_module(module), classname))
+
+def format_extensions(name):
+    """
+    Returns the list of file name extensions registered for the format, **name**,
+    in the order they were registered; the first is the format's usual extension.
+    """
+    return([ext for ext, fmt in _extensions.items() if fmt == name])
+
+def extension_format(cfgfile):
+    """
+    Returns the name of the format registered for the file name extension of
+    **cfgfile**, ignoring a compression suffix, or None if there is none.
+    """
+    return(_extensions.get(os.path.splitext(strip_compression(cfgfile))[1].lower()))
+
+def detect_format(cfgfile):
+    """
+    Returns the name of the format of the configuration file, **cfgfile**, from its
+    file name extension or, failing that, from its first bytes. The result is 
+    cached per path; **clear_format_cache()** empties the cache.
+
+    A compression suffix is ignored, and a compressed file's first bytes are
+    those of its uncompressed contents, so 'app.json.gz' is a JSON file.
+
+    Raises:
+
+        ConfigFormatException if the format cannot be determined.
+
+    """
+    path = os.path.abspath(cfgfile)
+    name = _detected.get(path)
+    if name is not None:
+        return(name)
+
+    name = extension_format(path)
+    if name is None and os.path.isfile(path):
+        with open_stream(path, mode='r', binary=True) as fp:
+            head = fp.read(SNIFF_SIZE)
+        for candidate, (module, classname, sniff) in reversed(list(_formats.items())):
+            if sniff is not None and sniff(head):
+                name = candidate
+                break
+
+    if name is None:
+        raise ConfigFormatException("Cannot determine the configuration format of '%s'!" % path)
+
+    _detected[path] = name
+    return(name)
+
+def clear_format_cache():
+    """
+    Forgets the formats detected for every path by **detect_format()**.
+    """
+    _detected.clear()
+
+def open(cfgfile, format=None, **kwargs):
+    """
+    Returns an instance of the Config sub-class for the format of **cfgfile**, which
+    is detected by **detect_format()** unless a registered **format** name is given::
+
+        c = config.open('app.yaml')       # a configyaml.Config
+        c = config.open('app.cfg', format='json')
+
+    The remaining keyword arguments, **kwargs**, are passed to the class constructor.
+
+    Raises:
+
+        ConfigFormatException if the format cannot be determined.
+
+    """
+    if format is None:
+        format = detect_format(cfgfile)
+    return(format_class(format)(cfgfile=cfgfile, **kwargs))
+
+def _sniff_text(head):
+    try:
+        return(head.decode('utf-8').lstrip('\ufeff \t\r\n'))
+    except UnicodeDecodeError:
+        return(None)
+
+def _sniff_yaml(head):
+    # any UTF-8 text, so YAML is sniffed last
+    return(_sniff_text(head) is not None)
+
+def _sniff_json(head):
+    text = _sniff_text(head)
+    return(text is not None and text[:1] in ('{', '['))
+
+def _sniff_msgpack(head):
+    # fixmap, map 16 or map 32
+    return(head[:1] != b'' and (0x80 <= head[0] <= 0x8f or head[0] in (0xde, 0xdf)))
+
+def _sniff_cbor(head):
+    # the self-describe tag, or a map
+    return(head[:3] == b'\xd9\xd9\xf7' or (head[:1] != b'' and (0xa0 <= head[0] <= 0xbb or head[0] == 0xbf)))
+
+def _sniff_sqlite(head):
+    return(head[:16] == b'SQLite format 3\x00')
+
+register_format('yaml',    'configyaml',    ('.yaml', '.yml'),    _sniff_yaml)
+register_format('cbor',    'configcbor',    ('.cbor',),           _sniff_cbor)
+register_format('msgpack', 'configmsgpack', ('.msgpack', '.mpk'), _sniff_msgpack)
+register_format('json',    'configjson',    ('.json',),           _sniff_json)
+register_format('sqlite',  'configsqlite',  ('.sqlite', '.sqlite3'), _sniff_sqlite)
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
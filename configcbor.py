@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configcbor
+
+This class sub-classes the abstract base class, **Config**, in the config module
+to provide CBOR (Concise Binary Object Representation, RFC 8949) specific
+configuration read and write methods.
+
+CBOR is a compact binary format; it suits machine generated configurations
+that people never edit by hand, since it is much faster to load and store than
+JSON or YAML text.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Application Specific 
+#------------------------------------------------------------------------------
+import config
+import configcompact
+
+#------------------------------------------------------------------------------
+# Third Party Dependencies
+#------------------------------------------------------------------------------
+# cbor2 is imported on first use, by _cbor2(), rather than here, so that
+# importing this module stays cheap and does not require cbor2 to be installed.
+_cbor2_module = None
+
+def _cbor2():
+    """
+    Returns the **cbor2** module, importing it on first use.
+    """
+    global _cbor2_module
+    if _cbor2_module is None:
+        try:
+            import cbor2
+        except ImportError as e:
+            raise ImportError("configcbor requires the cbor2 package: pip install cbor2") from e
+        _cbor2_module = cbor2
+    return(_cbor2_module)
+
+#------------------------------------------------------------------------------
+class Config(config.Config):
+    """
+    Sub-class the base config.Config class and over-ride
+    its read() and write() methods to support CBOR.
+
+    This class does not change any of the constructor parameters from the abstract base class  -- see `the config module API page`_ 
+    for a complete definition of each constructor parameter. The **encoding** parameter is accepted but not used, since the
+    **cfgfile** is binary.
+
+    The `cbor2 package`_ is required; its C extension is used when it is available.
+
+    Class Attributes:
+
+    .. note:: Class Attributes are not an attribute of an *instance* of a class (ie, the object); they are an attribute of the class itself.
+
+    .. note:: The Class Attributes specified below over-ride the same Class Attributes defined in the abstract base class config.Config.
+
+    .. _the config module API page: config.html
+
+    .. _cbor2 package: https://pypi.org/project/cbor2/
+
+    """
+
+    #: Default configuration file name, **cfgfile**, if none is specified during class instantiation
+    DEFAULT_CFG_FILE   = "config.cbor"
+
+    #: Default configuration dictionary, **cfgdict**, if none is specified during class instantiation.
+    DEFAULT_CFG_DICT   = {}
+    
+    #: Default force parameter value, **force**, if none is specified during class instantiation.
+    DEFAULT_FORCE      = False
+
+    #: Default write_thru parameater value, **write_thru**, if none is specified during class instantiation.
+    DEFAULT_WRITE_THRU = False
+
+    #: Default configuration file text encoding, **encoding**, if none is specified during class instantiation.
+    DEFAULT_ENCODING   = 'utf-8'
+
+
+    def read(self, **kwargs):
+        """
+        Reads the **cfgfile** and stores the results in the configuration dictionary, **cfg**.
+        Any changes recorded in the **journalfile** are applied to the result.
+
+        The keyword arguments, **kwargs**, are passed to **cbor2.loads()**.
+
+        Returns: 
+
+            The configuration dictionary accessible by the **cfg** property.
+
+        """
+        cfgdict = self._read_cfgfile(lambda data: _cbor2().loads(data, **kwargs), binary=True)
+
+        self._cfgdict = self._journal_replay(cfgdict)
+
+        return(self._cfgdict)
+
+
+    def write(self, **kwargs):
+        """
+        Writes the configuration dictionary, **cfg**, to file system using the file name **cfgfile**.
+        The file will be in CBOR format.
+
+        The keyword arguments, **kwargs**, are passed to **cbor2.dumps()**; for example
+        canonical=True produces the same bytes for equal configurations.
+
+        Returns:
+
+            None
+
+        """
+        self._write_cfgfile(lambda: _cbor2().dumps(configcompact.thaw(self._persisted(self._cfgdict)), **kwargs), binary=True)
+
+        self._journal_reset()
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__":  # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configcbor', verbosity=2)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configcolumns
+
+Conversion of lists of uniform records -- dictionaries sharing the same keys,
+such as::
+
+    backends:
+      - {host: alpha, port: 8080, weight: 0.5}
+      - {host: beta,  port: 8081, weight: 1.5}
+
+-- into NumPy arrays, one per key, or into a single NumPy structured array, for
+vectorized arithmetic. The **columns()** method of **config.Config** is the usual
+way to use it, as it keeps the arrays until the configuration changes.
+
+Each column's dtype is inferred by NumPy from its values: integers become int64,
+floats float64, strings fixed width unicode, and a column with missing (None)
+values, lists, or values of mixed types an object array.
+
+NumPy is an optional dependency, imported on first use.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+from collections.abc import Mapping, Sequence
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configjournal
+
+#------------------------------------------------------------------------------
+# Third Party Dependencies
+#------------------------------------------------------------------------------
+_numpy_module = None
+
+def _numpy():
+    """
+    Returns the **numpy** module, importing it on first use.
+    """
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError("configcolumns requires the numpy package: pip install numpy") from e
+        _numpy_module = numpy
+    return(_numpy_module)
+
+#------------------------------------------------------------------------------
+def path_keys(path):
+    """
+    Returns the tuple of keys named by **path**, either a JSON Pointer string, as
+    in '/Balancer/backends', or a sequence of keys.
+    """
+    if isinstance(path, str):
+        return(tuple(configjournal.split(path)))
+    return(tuple(path))
+
+def resolve(cfgdict, keys):
+    """
+    Returns the value reached from **cfgdict** through the sequence of **keys**;
+    a key into a list is its index.
+    """
+    value = cfgdict
+    for k in keys:
+        if isinstance(value, Sequence) and not isinstance(value, str):
+            k = int(k)
+        value = value[k]
+    return(value)
+
+def _records(records):
+    if isinstance(records, Mapping) or not isinstance(records, Sequence) or isinstance(records, str):
+        raise TypeError("Expected a list of records, not %s" % type(records).__name__)
+    for r in records:
+        if not isinstance(r, Mapping):
+            raise TypeError("Expected a list of records, found a %s in it" % type(r).__name__)
+    return(records)
+
+def _column(np, values):
+    try:
+        column = np.asarray(values)
+    except ValueError:
+        column = None
+    if column is None or column.ndim != 1:
+        # lists and the like in a column are kept as objects, not made another dimension
+        column = np.empty(len(values), dtype=object)
+        for i, v in enumerate(values):
+            column[i] = v
+    return(column)
+
+def _column_arrays(records, fields):
+    # one pass over the records to build rows, transposed into columns by zip()
+    np = _numpy()
+    if fields is None:
+        fields = tuple(records[0]) if records else ()
+    rows = [tuple(r.get(f) for f in fields) for r in records]
+    if rows:
+        cols = [_column(np, c) for c in zip(*rows)]
+    else:
+        cols = [np.empty(0) for f in fields]
+    for c in cols:
+        c.flags.writeable = False
+    return(tuple(fields), cols)
+
+def columns(records, fields=None):
+    """
+    Returns a dictionary of read-only NumPy arrays, one per field of the list of
+    records, **records**, in the order of **fields** -- by default the keys of
+    the first record. A record without a field has None in its column.
+    """
+    fields, cols = _column_arrays(_records(records), fields)
+    return(dict(zip(fields, cols)))
+
+def structured(records, fields=None):
+    """
+    Returns the list of records, **records**, as a read-only NumPy structured array
+    with one field for each of **fields** -- by default the keys of the first record.
+    """
+    np = _numpy()
+    fields, cols = _column_arrays(_records(records), fields)
+    result = np.empty(len(records), dtype=[(str(f), c.dtype) for f, c in zip(fields, cols)])
+    for f, c in zip(fields, cols):
+        result[str(f)] = c
+    result.flags.writeable = False
+    return(result)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configcolumns', verbosity=2)
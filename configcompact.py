@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configcompact
+
+A compact, read-only, in-memory representation of configurations, for those
+too large to hold as dictionaries and lists -- see the **compact** property of
+**config.Config**.
+
+A configuration is compacted as follows:
+
+    * keys are interned, so a key repeated throughout the configuration is held once,
+      and repeated strings and numbers are held once each
+    * a dictionary with up to **RECORD_MAX_KEYS** keys, whose set of keys is shared
+      with another dictionary, becomes a **Record**: a slotted tuple of its values
+      whose keys are held once, by a class generated for that set of keys
+    * any other dictionary becomes a **configsnapshot.FrozenDict**
+    * a list of at least **ARRAY_MIN_LENGTH** integers, or floats, becomes a
+      **ScalarArray**, backed by an array.array of 8 byte machine values
+    * any other list becomes a **FrozenList**, a tuple that compares equal to lists
+
+Records, FrozenDicts and ScalarArrays are read-only Mapping and Sequence types,
+so code that only reads a configuration does not need to know it is compact.
+
+**Compactor.mapping()** can be used as the object_pairs_hook of the json module,
+so that a JSON document is compacted as it is parsed and never held whole as
+dictionaries::
+
+    cfg = json.loads(text, object_pairs_hook=configcompact.Compactor().mapping)
+
+Use **thaw()** to turn a compact configuration back into dictionaries and lists.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import sys
+import math
+import array
+from collections.abc import Mapping, Sequence
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+from configsnapshot import FrozenDict
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Dictionaries with more keys than this are never made into Records.
+RECORD_MAX_KEYS = 16
+
+#: Shorter lists of numbers are held as tuples, which are smaller than arrays.
+ARRAY_MIN_LENGTH = 16
+
+#: Strings longer than this are not checked for repeats.
+SHARE_MAX_LENGTH = 64
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# tuple of keys --> Record sub-class
+_record_classes = {}
+
+#------------------------------------------------------------------------------
+class Record(tuple, Mapping):
+    """
+    Base class of the read-only mappings generated, one class for each tuple of
+    keys, by **record_class()**. An instance is a tuple of the values; the keys,
+    and the index of each, are attributes of its class.
+    """
+    __slots__ = ()
+
+    _keys  = ()
+    _index = {}
+
+    def __new__(cls, values):
+        return(tuple.__new__(cls, values))
+
+    def __getitem__(self, key):
+        return(tuple.__getitem__(self, self._index[key]))
+
+    def __iter__(self):
+        return(iter(self._keys))
+
+    def __len__(self):
+        return(tuple.__len__(self))
+
+    def __contains__(self, key):
+        return(key in self._index)
+
+    def values(self):
+        return(tuple(tuple.__iter__(self)))
+
+    def items(self):
+        return(tuple(zip(self._keys, tuple.__iter__(self))))
+
+    def __eq__(self, other):
+        # never NotImplemented, which would fall back on tuple's, equal to a bare tuple
+        if not isinstance(other, Mapping):
+            return(False)
+        return(dict(self.items()) == dict(other.items()))
+
+    def __ne__(self, other):
+        return(not self.__eq__(other))
+
+    def __hash__(self):
+        return(hash(frozenset(self.items())))
+
+    def __repr__(self):
+        return(repr(dict(self.items())))
+
+    def __reduce__(self):
+        return((_record, (self._keys, tuple(tuple.__iter__(self)))))
+
+def record_class(keys):
+    """
+    Returns the **Record** sub-class for the tuple of keys, **keys**.
+    """
+    cls = _record_classes.get(keys)
+    if cls is None:
+        cls = type('Record', (Record,), {'__slots__' : (),
+                                         '__module__' : __name__,
+                                         '_keys'     : keys,
+                                         '_index'    : {k : i for i, k in enumerate(keys)}})
+        _record_classes[keys] = cls
+    return(cls)
+
+def _record(keys, values):
+    # un-pickles a Record
+    return(record_class(keys)(values))
+
+#------------------------------------------------------------------------------
+class FrozenList(tuple):
+    """
+    A tuple that compares equal to a list with the same items, as the list it
+    replaces would.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return(tuple.__eq__(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return(result if result is NotImplemented else not result)
+
+    __hash__ = tuple.__hash__
+
+    def __reduce__(self):
+        return((FrozenList, (tuple(self),)))
+
+#------------------------------------------------------------------------------
+class ScalarArray(Sequence):
+    """
+    A read-only sequence of integers, **typecode** 'q', or of floats, **typecode**
+    'd', held in an array.array.
+    """
+    __slots__ = ('_array',)
+
+    def __init__(self, typecode, values):
+        self._array = array.array(typecode, values)
+
+    @property
+    def typecode(self):
+        return(self._array.typecode)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return(ScalarArray(self._array.typecode, self._array[index]))
+        return(self._array[index])
+
+    def __len__(self):
+        return(len(self._array))
+
+    def __iter__(self):
+        return(iter(self._array))
+
+    def __eq__(self, other):
+        if isinstance(other, (ScalarArray, list, tuple)):
+            return(len(self) == len(other) and all(a == b for a, b in zip(self, other)))
+        return(NotImplemented)
+
+    def __hash__(self):
+        return(hash(tuple(self._array)))
+
+    def __repr__(self):
+        return("ScalarArray(%r, %r)" % (self._array.typecode, self._array.tolist()))
+
+    def __reduce__(self):
+        return((ScalarArray, (self._array.typecode, self._array.tolist())))
+
+    def tolist(self):
+        return(self._array.tolist())
+
+#------------------------------------------------------------------------------
+class Compactor(object):
+    """
+    Compacts configurations. A Record class is only generated for a set of keys
+    once a second dictionary with that set has been seen by the same Compactor,
+    so that dictionaries with keys of their own do not each get a class.
+    """
+    def __init__(self):
+        self._seen   = set()
+        # (type, value) --> the first such value, so that repeats share it
+        self._values = {}
+
+    def mapping(self, pairs):
+        """
+        Returns the compact form of the dictionary with the (key, value) **pairs**,
+        whose values may already be compact.
+        """
+        keys   = tuple(sys.intern(k) if type(k) is str else k for k, v in pairs)
+        values = [self.value(v) for k, v in pairs]
+        if len(set(keys)) != len(keys):
+            # duplicate keys, the last one wins, as in a dictionary
+            d = dict(zip(keys, values))
+            keys, values = tuple(d), list(d.values())
+
+        if len(keys) <= RECORD_MAX_KEYS:
+            if keys in _record_classes or keys in self._seen:
+                return(record_class(keys)(values))
+            self._seen.add(keys)
+        return(FrozenDict._wrap(dict(zip(keys, values))))
+
+    def sequence(self, items):
+        """
+        Returns the compact form of the list, **items**.
+        """
+        items = [self.value(v) for v in items]
+        if len(items) >= ARRAY_MIN_LENGTH:
+            if all(type(v) is int for v in items) and _INT64_MIN <= min(items) and max(items) <= _INT64_MAX:
+                return(ScalarArray('q', items))
+            if all(type(v) is float for v in items):
+                return(ScalarArray('d', items))
+        return(FrozenList(items))
+
+    def value(self, value):
+        """
+        Returns the compact form of **value**.
+        """
+        if isinstance(value, (Record, FrozenDict, ScalarArray)):
+            return(value)
+        if isinstance(value, Mapping):
+            return(self.mapping(list(value.items())))
+        if isinstance(value, (list, tuple)):
+            return(self.sequence(value))
+        if type(value) is float and (math.isnan(value) or math.copysign(1.0, value) < 0):
+            # -0.0 == 0.0 would be shared as whichever came first, and NaN never matches
+            return(value)
+        if type(value) in (str, int, float) and not (type(value) is str and len(value) > SHARE_MAX_LENGTH):
+            return(self._values.setdefault((type(value), value), value))
+        return(value)
+
+#------------------------------------------------------------------------------
+def compact(value):
+    """
+    Returns the compact form of the configuration, **value**.
+    """
+    return(Compactor().value(value))
+
+def is_compact(value):
+    """
+    Returns True if **value** is a compact mapping.
+    """
+    return(isinstance(value, (Record, FrozenDict)))
+
+def thaw(value):
+    """
+    Returns a compact **value** as dictionaries and lists. Any other **value** is
+    returned as it is.
+    """
+    if isinstance(value, (Record, FrozenDict)):
+        return({k : thaw(v) for k, v in value.items()})
+    if isinstance(value, ScalarArray):
+        return(value.tolist())
+    if isinstance(value, tuple):
+        return([thaw(v) for v in value])
+    return(value)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configcompact', verbosity=2)
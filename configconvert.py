@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configconvert
+
+Converts configuration files between the formats registered with the **config**
+module -- JSON, YAML, MessagePack, CBOR -- one file at a time or whole directory
+trees at once, in parallel::
+
+    python configconvert.py configs/ converted/ --to yaml
+    python configconvert.py app.json app.yaml
+
+or from Python::
+
+    report = configconvert.convert_tree('configs', 'converted', 'yaml')
+    print(report)
+
+Input documents are streamed one at a time: JSON Lines are read a line at a time,
+and only a single JSON document spread over several lines is read whole. A file holding a single configuration
+dictionary is written exactly as the target format's Config class would write it.
+A file holding several documents -- a multi-document YAML stream, concatenated
+MessagePack or CBOR objects, or JSON Lines -- is converted document by document to
+the target's multi-document form: a YAML stream, concatenated objects, or one JSON
+document per line. Compressed files, such as 'app.json.gz', are read and written
+through their codec -- see **config.open_stream()** -- and a directory tree's
+compressed sources are converted to uncompressed targets.
+
+A target is left alone when it is newer than its source or when the source has not
+changed since it was last converted. The SHA-256 hash of each converted source is
+kept in a manifest file, **MANIFEST_FILE**, in the destination directory.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import itertools
+import concurrent.futures
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import config
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Name of the manifest of source hashes kept in a destination directory.
+MANIFEST_FILE = ".configconvert.json"
+
+#: Size of the blocks in which source files are hashed.
+HASH_BLOCK_SIZE = 1 << 20
+
+#------------------------------------------------------------------------------
+class ConvertReport(object):
+    """
+    Counts of the files converted, skipped and failed by a conversion, with the
+    number of source bytes converted and the elapsed time.
+    """
+    def __init__(self):
+        self.converted = 0
+        self.skipped   = 0
+        self.failed    = []
+        self.bytes     = 0
+        self.seconds   = 0.0
+
+    def add(self, status, size=0, error=None, path=None):
+        if status == 'converted':
+            self.converted += 1
+            self.bytes     += size
+        elif status == 'skipped':
+            self.skipped += 1
+        else:
+            self.failed.append((path, error))
+
+    @property
+    def files_per_second(self):
+        return(self.converted / self.seconds if self.seconds else 0.0)
+
+    @property
+    def megabytes_per_second(self):
+        return(self.bytes / (1 << 20) / self.seconds if self.seconds else 0.0)
+
+    def __str__(self):
+        return("%d converted, %d skipped, %d failed in %.3fs (%.1f files/s, %.2f MB/s)" %
+               (self.converted, self.skipped, len(self.failed), self.seconds,
+                self.files_per_second, self.megabytes_per_second))
+
+#------------------------------------------------------------------------------
+# Document Streams
+#------------------------------------------------------------------------------
+def _new_yaml():
+    import configyaml
+    yaml = configyaml._new_yaml(typ='safe')
+    yaml.default_flow_style = False
+    yaml.indent = 4
+    yaml.block_seq_indent = 2
+    return(yaml)
+
+def _read_json(fp):
+    lines = iter(fp)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+    try:
+        doc = json.loads(first)
+    except ValueError:
+        # one document over several lines, which json can only parse whole
+        yield json.loads(first + b''.join(lines))
+        return
+    # JSON Lines, read a document, a line, at a time
+    yield doc
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+def _read_yaml(fp):
+    yield from _new_yaml().load_all(fp)
+
+def _read_msgpack(fp):
+    import configmsgpack
+    yield from configmsgpack._msgpack().Unpacker(fp, raw=False, strict_map_key=False)
+
+def _read_cbor(fp):
+    import configcbor
+    decoder = configcbor._cbor2().CBORDecoder(fp)
+    while fp.peek(1):
+        yield decoder.decode()
+
+def _write_json(fp, docs):
+    for doc in docs:
+        fp.write((json.dumps(doc, sort_keys=True) + '\n').encode('utf-8'))
+
+def _write_yaml(fp, docs):
+    _new_yaml().dump_all(docs, fp)
+
+def _write_msgpack(fp, docs):
+    import configmsgpack
+    packer = configmsgpack._msgpack().Packer(use_bin_type=True)
+    for doc in docs:
+        fp.write(packer.pack(doc))
+
+def _write_cbor(fp, docs):
+    import configcbor
+    for doc in docs:
+        configcbor._cbor2().dump(doc, fp)
+
+# format name --> (document reader, multi-document writer)
+_streams = {
+    'json'    : (_read_json, _write_json),
+    'yaml'    : (_read_yaml, _write_yaml),
+    'msgpack' : (_read_msgpack, _write_msgpack),
+    'cbor'    : (_read_cbor, _write_cbor),
+}
+
+def documents(src, src_format=None):
+    """
+    Generates the documents in the configuration file, **src**, one at a time.
+    Formats without a document reader are read whole by their Config class.
+    """
+    src_format = src_format or config.detect_format(src)
+    if src_format not in _streams:
+        yield config.format_class(src_format)(cfgfile=src).cfg
+        return
+    with config.open_stream(src, mode='r', binary=True) as fp:
+        yield from _streams[src_format][0](fp)
+
+#------------------------------------------------------------------------------
+# Conversion
+#------------------------------------------------------------------------------
+def file_hash(path):
+    """
+    Returns the SHA-256 hex digest of the contents of the file, **path**.
+    """
+    h = hashlib.sha256()
+    with open(path, mode='rb') as fp:
+        for block in iter(lambda: fp.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    return(h.hexdigest())
+
+def convert_file(src, dst, dst_format=None, src_format=None):
+    """
+    Converts the configuration file, **src**, to the file **dst**, in the format
+    **dst_format** (detected from the **dst** file name if None).
+
+    Returns:
+
+        The number of documents converted.
+
+    """
+    dst_format = dst_format or config.detect_format(dst)
+    docs  = documents(src, src_format)
+    first = list(itertools.islice(docs, 2))
+
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    if len(first) == 1 and isinstance(first[0], dict):
+        # written exactly as the format's own Config class writes it
+        config.format_class(dst_format)(first[0], cfgfile=dst, force=True)
+        return(1)
+
+    if dst_format not in _streams:
+        raise config.ConfigFormatException("Format '%s' cannot hold %d documents!" % (dst_format, len(first)))
+
+    count = [0]
+    def counted():
+        for doc in itertools.chain(first, docs):
+            count[0] += 1
+            yield doc
+    with config.open_stream(dst, mode='w', binary=True) as fp:
+        _streams[dst_format][1](fp, counted())
+    return(count[0])
+
+def _convert_job(src, dst, dst_format, src_format):
+    # runs in a worker process
+    try:
+        convert_file(src, dst, dst_format, src_format)
+        return(('converted', os.path.getsize(src), None))
+    except Exception as e:
+        return(('failed', 0, "%s: %s" % (type(e).__name__, e)))
+
+def target_path(src, src_root, dst_root, dst_format):
+    """
+    Returns the path in **dst_root** of the conversion of **src**, a file under
+    **src_root**, to the format **dst_format**. The target of a compressed source
+    is not compressed.
+    """
+    rel = config.strip_compression(os.path.relpath(src, src_root))
+    return(os.path.join(dst_root, os.path.splitext(rel)[0] + config.format_extensions(dst_format)[0]))
+
+def _load_manifest(dst_root):
+    try:
+        with open(os.path.join(dst_root, MANIFEST_FILE)) as fp:
+            return(json.load(fp))
+    except (FileNotFoundError, ValueError):
+        return({})
+
+def _save_manifest(dst_root, manifest):
+    os.makedirs(dst_root, exist_ok=True)
+    with open(os.path.join(dst_root, MANIFEST_FILE), mode='w') as fp:
+        json.dump(manifest, fp, indent=4, sort_keys=True)
+
+def convert_tree(src_root, dst_root, dst_format, src_formats=None, jobs=None, force=False):
+    """
+    Converts every configuration file under the directory **src_root** -- every
+    file with the extension of a registered format -- to the format **dst_format**, writing the results under **dst_root** with the same
+    relative paths and the target format's extension.
+
+    Args:
+
+        **src_formats** - a sequence of format names; only files of these formats are
+        converted. The default is every registered format except **dst_format**.
+
+        **jobs** - the number of worker processes; the default is the number of CPUs.
+        With **jobs** set to 1 the files are converted in this process.
+
+        **force** - if True, convert every file, even those whose target is up to date.
+
+    Returns:
+
+        A **ConvertReport**.
+
+    """
+    start    = time.perf_counter()
+    report   = ConvertReport()
+    manifest = _load_manifest(dst_root)
+    pending  = []
+
+    for dirpath, dirnames, filenames in os.walk(src_root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            src = os.path.join(dirpath, filename)
+            # by extension only: sniffed, any text would pass for YAML
+            src_format = config.extension_format(src)
+            if src_format is None:
+                continue
+            if src_formats is not None and src_format not in src_formats:
+                continue
+            if src_formats is None and src_format == dst_format:
+                continue
+
+            dst    = target_path(src, src_root, dst_root, dst_format)
+            rel    = os.path.relpath(src, src_root)
+            digest = None
+            if not force and os.path.exists(dst):
+                if os.path.getmtime(dst) >= os.path.getmtime(src):
+                    report.add('skipped')
+                    continue
+                digest = file_hash(src)
+                if manifest.get(rel) == digest:
+                    # touched but unchanged; freshen the target so it is not hashed again
+                    os.utime(dst)
+                    report.add('skipped')
+                    continue
+            pending.append((rel, src, dst, src_format, digest))
+
+    def finished(rel, src, digest, status, size, error):
+        report.add(status, size, error, src)
+        if status == 'converted':
+            manifest[rel] = digest or file_hash(src)
+
+    if jobs == 1 or len(pending) < 2:
+        for rel, src, dst, src_format, digest in pending:
+            finished(rel, src, digest, *_convert_job(src, dst, dst_format, src_format))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_convert_job, src, dst, dst_format, src_format) : (rel, src, digest)
+                       for rel, src, dst, src_format, digest in pending}
+            for future in concurrent.futures.as_completed(futures):
+                rel, src, digest = futures[future]
+                finished(rel, src, digest, *future.result())
+
+    if pending:
+        _save_manifest(dst_root, manifest)
+    report.seconds = time.perf_counter() - start
+    return(report)
+
+#------------------------------------------------------------------------------
+def main(argv=None):
+    """
+    Command line entry point, see **python configconvert.py --help**.
+    """
+    parser = argparse.ArgumentParser(description="Convert configuration files between formats.")
+    parser.add_argument('src', help="source file or directory")
+    parser.add_argument('dst', help="destination file or directory")
+    parser.add_argument('--to',    dest='dst_format', default=None, help="target format; required for directories")
+    parser.add_argument('--from',  dest='src_formats', default=None, help="comma separated source formats to convert")
+    parser.add_argument('--jobs',  type=int, default=None, help="worker processes, default: number of CPUs")
+    parser.add_argument('--force', action='store_true', help="convert even if the target is up to date")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.src):
+        if not args.dst_format:
+            parser.error("--to is required when converting a directory")
+        report = convert_tree(args.src, args.dst, args.dst_format,
+                              src_formats=args.src_formats.split(',') if args.src_formats else None,
+                              jobs=args.jobs, force=args.force)
+    else:
+        report = ConvertReport()
+        start  = time.perf_counter()
+        try:
+            convert_file(args.src, args.dst, args.dst_format,
+                         args.src_formats.split(',')[0] if args.src_formats else None)
+            report.add('converted', os.path.getsize(args.src))
+        except Exception as e:
+            report.add('failed', error="%s: %s" % (type(e).__name__, e), path=args.src)
+        report.seconds = time.perf_counter() - start
+
+    print(report)
+    for path, error in report.failed:
+        print("FAILED %s: %s" % (path, error), file=sys.stderr)
+    return(1 if report.failed else 0)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configcow
+
+Copy-on-write configuration dictionaries.
+
+**config.Config** gives each instance a **CowDict** over the configuration
+dictionary it is constructed with -- the **cfgdict** argument or the class's
+**DEFAULT_CFG_DICT** -- rather than the dictionary itself. Instances built from
+the same dictionary share all of its sections until they change them, and then
+only the sections on the path to the change are copied::
+
+    a = configjson.Config(cfgfile='a.json')       # both share DEFAULT_CFG_DICT
+    b = configjson.Config(cfgfile='b.json')
+    a.cfg['Logging']['level'] = 'INFO'            # copies DEFAULT_CFG_DICT['Logging'] for a
+
+Neither **b** nor **DEFAULT_CFG_DICT** see the change.
+
+A section is copied the first time it is handed out, whether it is fetched by
+key -- **d[key]**, **d.get(key)** or **d.setdefault(key)** -- or reached through
+**items()**, **values()**, **dict(d)** or **update(d)**, so no section shared with
+another dictionary can be changed through a **CowDict**. Serializing a CowDict or
+taking a snapshot of it goes through **plain()** or **CowDict.shared_items()**
+instead, which copy nothing and leave the sharing intact.
+
+Lists are copied whole, and dictionaries of types other than dict, such as the
+CommentedMap of round-trip YAML, are deep copied.
+
+As fetching a section can store its copy, reads change a CowDict too; the copy is
+made under a lock, so threads reading the same CowDict all get the one copy.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import copy
+import threading
+from collections.abc import ItemsView, ValuesView
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+#: Held while a section is copied, so two threads cannot each copy it
+_lock = threading.Lock()
+
+#------------------------------------------------------------------------------
+class CowDict(dict):
+    """
+    A dictionary holding the same items as **source**, whose dictionary and list
+    values are copied from **source** the first time they are fetched by key.
+    """
+    __slots__ = ('_owned',)
+
+    def __init__(self, source=()):
+        if type(source) is CowDict:
+            # the sections source owns are shared from now on, by both
+            dict.__init__(self, dict.items(source))
+            source._owned.clear()
+        else:
+            dict.__init__(self, source)
+        # keys whose values belong to this dictionary, rather than to source
+        self._owned = set()
+
+    def _own(self, key, value):
+        if key in self._owned or not isinstance(value, (dict, list, set)):
+            return(value)
+        with _lock:
+            # another thread may have copied it while this one waited
+            value = dict.__getitem__(self, key)
+            if key in self._owned:
+                return(value)
+            if type(value) in (dict, CowDict):
+                value = CowDict(value)
+            else:
+                value = copy.deepcopy(value)
+            dict.__setitem__(self, key, value)
+            self._owned.add(key)
+        return(value)
+
+    def __getitem__(self, key):
+        return(self._own(key, dict.__getitem__(self, key)))
+
+    # dict() and dict.update() copy a dict sub-class with dict's own __iter__ without
+    # calling __getitem__, handing out the shared sections: with these they do call it
+    def __iter__(self):
+        return(dict.__iter__(self))
+
+    def keys(self):
+        return(dict.keys(self))
+
+    def items(self):
+        return(ItemsView(self))
+
+    def values(self):
+        return(ValuesView(self))
+
+    def shared_items(self):
+        """
+        Returns the items without copying any value, shared values included, for
+        reading only.
+        """
+        return(dict.items(self))
+
+    def get(self, key, default=None):
+        if key in self:
+            return(self[key])
+        return(default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return(self[key])
+        self[key] = default
+        return(default)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._owned.add(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._owned.discard(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return(value)
+        return(dict.pop(self, key, *default))
+
+    def popitem(self):
+        key = next(reversed(self))
+        return((key, self.pop(key)))
+
+    def clear(self):
+        dict.clear(self)
+        self._owned.clear()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        return(CowDict(self))
+
+    def __reduce__(self):
+        # copied and pickled as a plain dictionary, which owns all of its values
+        return((dict, (), None, None, iter(dict.items(self))))
+
+#------------------------------------------------------------------------------
+def share(cfgdict):
+    """
+    Returns a **CowDict** over **cfgdict**, or **cfgdict** itself if it is not a
+    plain dictionary.
+    """
+    if type(cfgdict) in (dict, CowDict):
+        return(CowDict(cfgdict))
+    return(cfgdict)
+
+
+def plain(value):
+    """
+    Returns **value** with every **CowDict** in it replaced by a plain dictionary
+    holding the same values, without copying any shared value, for reading only --
+    to serialize it, for one.
+    """
+    if type(value) is CowDict:
+        return({k : plain(v) for k, v in dict.items(value)})
+    if type(value) is dict:
+        # a copy only if there is a CowDict under it, as after cfg = dict(cfg)
+        for k, v in value.items():
+            p = plain(v)
+            if p is not v:
+                return({k : plain(v) for k, v in value.items()})
+        return(value)
+    if type(value) is list and any(type(v) in (dict, list, CowDict) for v in value):
+        items = [plain(v) for v in value]
+        return(value if all(p is v for p, v in zip(items, value)) else items)
+    return(value)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configcow', verbosity=2)
@@ -0,0 +1,665 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configdaemon
+
+A local daemon that owns configuration files and serves them, over a Unix domain
+socket, to any number of client processes, so that a file is parsed once by the
+daemon rather than once by every process that uses it::
+
+    python configdaemon.py --socket /run/app/config.sock app.json logging.yaml
+
+Clients use **configdaemon.Config**, a **config.Config** sub-class that reads and
+writes through the daemon instead of the file system::
+
+    c = configdaemon.Config(cfgfile='app.json', address='/run/app/config.sock')
+    c.cfg['Logging']['level']               # the local copy, as for any Config
+    c.get('/Logging/level')                 # the daemon's current value
+
+The daemon watches its files, every **DEFAULT_INTERVAL** seconds, and reloads
+one when it changes. Each file has a version, the **cfgversion** of the daemon's
+Config for it, and every change is pushed to the clients of that file as a
+notification carrying the new version. A client keeps the last configuration it
+fetched, with its version, and uses it for **read()** and **get()** until a
+notification says it is out of date, so a client of a file that is not changing
+does not talk to the daemon at all.
+
+Messages are JSON documents, one per line, so the daemon serves configurations
+that JSON can represent. The socket is readable and writable only by the user
+running the daemon from the moment it appears, and by default it is kept in a
+directory only that user can enter. Where the system reports the user at the
+other end of a socket, the daemon serves only processes run by its own user,
+and a client talks only to a daemon run by its own user. When it is started
+without a list of files, the daemon serves any file a client names, opened with
+**config.open()**.
+
+Where the system has no Unix domain sockets, as on Windows, the module can be
+imported but neither a Daemon nor a Config can be created.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import sys
+import copy
+import json
+import stat
+import socket
+import struct
+import getpass
+import argparse
+import tempfile
+import threading
+import socketserver
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import config
+import configcow
+import configcompact
+import configcolumns
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Default directory of the daemon's Unix domain socket, private to the user.
+DEFAULT_SOCKET_DIR = (os.path.join(os.environ['XDG_RUNTIME_DIR'], 'configdaemon') if os.environ.get('XDG_RUNTIME_DIR')
+                      else os.path.join(tempfile.gettempdir(), 'configdaemon-%s' % (os.getuid() if hasattr(os, 'getuid')
+                                                                                    else getpass.getuser())))
+
+#: Default path of the daemon's Unix domain socket.
+DEFAULT_SOCKET = os.path.join(DEFAULT_SOCKET_DIR, 'daemon.sock')
+
+#: Default number of seconds between checks of the served files for changes.
+DEFAULT_INTERVAL = 1.0
+
+# exceptions raised in the daemon that are raised as themselves in the client
+_EXCEPTIONS = {'KeyError'          : KeyError,
+               'IndexError'        : IndexError,
+               'FileNotFoundError' : FileNotFoundError}
+
+#------------------------------------------------------------------------------
+class ConfigDaemonException(Exception):
+    """
+    Custom exception raised by a client for an error reported by the daemon, or
+    by the daemon for a request it cannot serve.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+def _encode(message):
+    return(json.dumps(message).encode('utf-8') + b'\n')
+
+def _decode(line):
+    return(json.loads(line.decode('utf-8')))
+
+def _private_dir(directory):
+    # creates directory, readable only by the user, or makes sure an existing
+    # one is: anyone can create a directory by a predictable name in /tmp first
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != _uid() or st.st_mode & 0o077:
+        raise ConfigDaemonException("'%s' must be a directory that only its owner, the user, can use" % directory)
+
+def _uid():
+    # the user id, or None where the system has none
+    return(os.getuid() if hasattr(os, 'getuid') else None)
+
+def _unix_sockets():
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ConfigDaemonException("Unix domain sockets are not available on this system")
+
+def _peer_uid(sock):
+    # the user id of the process at the other end of the Unix domain socket, sock,
+    # or None where the system does not report it
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return(None)
+    pid, uid, gid = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return(uid)
+
+def _same_user(sock):
+    uid = _peer_uid(sock)
+    return(uid is None or uid == _uid())
+
+def _stamp(path):
+    # changes whenever the file is written or replaced
+    try:
+        st = os.stat(path)
+    except OSError:
+        return(None)
+    return((st.st_mtime_ns, st.st_size, st.st_ino))
+
+#------------------------------------------------------------------------------
+class _Handler(socketserver.StreamRequestHandler):
+    # one per client connection
+
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        self._send_lock = threading.Lock()
+        self.server.owner._connected(self)
+
+    def send(self, message):
+        data = _encode(message)
+        with self._send_lock:
+            self.wfile.write(data)
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.owner._dispatch(self, _decode(line))
+            except Exception as e:
+                reply = {'error' : type(e).__name__, 'message' : str(e)}
+            self.send(reply)
+
+    def finish(self):
+        self.server.owner._disconnected(self)
+        socketserver.StreamRequestHandler.finish(self)
+
+if hasattr(socket, 'AF_UNIX'):
+
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        block_on_close = False
+
+        def verify_request(self, request, client_address):
+            return(_same_user(request))
+
+#------------------------------------------------------------------------------
+class Daemon(object):
+    """
+    Serves configuration files to **Config** clients over a Unix domain socket.
+
+    Args:
+
+        **address** - the path of the socket, by default **DEFAULT_SOCKET**, in the
+        directory **DEFAULT_SOCKET_DIR**, which is created if need be; a stale socket
+        left at that path is replaced
+
+        **cfgfiles** - the files to serve, or None to serve any file a client names
+
+        **interval** - the number of seconds between checks of the files for changes,
+        by default **DEFAULT_INTERVAL**
+
+    Use **start()** to serve from background threads, or **serve_forever()** to
+    serve from the calling thread, and **close()** to stop.
+    """
+    def __init__(self, address=None, cfgfiles=None, interval=None):
+        _unix_sockets()
+        self.address  = address if isinstance(address, str) else DEFAULT_SOCKET
+        self.interval = interval if interval is not None else DEFAULT_INTERVAL
+
+        self._lock        = threading.RLock()
+        self._configs     = {}
+        self._stamps      = {}
+        self._subscribers = {}
+        self._handlers    = set()
+        self._serve_any   = cfgfiles is None
+        for cfgfile in cfgfiles or ():
+            self._open(os.path.abspath(cfgfile))
+
+        if self.address == DEFAULT_SOCKET:
+            _private_dir(DEFAULT_SOCKET_DIR)
+        if os.path.lexists(self.address) and not stat.S_ISSOCK(os.lstat(self.address).st_mode):
+            raise ConfigDaemonException("'%s' exists and is not a socket" % self.address)
+        self._server = _Server(self.address, _Handler, bind_and_activate=False)
+        self._server.owner = self
+        try:
+            self._bind()
+        except BaseException:
+            self._server.server_close()
+            raise
+
+        self._stop    = threading.Event()
+        self._threads = []
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _bind(self):
+        # bound in a new directory only the user can enter, and moved into place
+        # once only the user can use it, so that no other user can connect between
+        # bind() and chmod(); the move replaces a stale socket
+        private = tempfile.mkdtemp(dir=os.path.dirname(self.address) or '.')
+        path    = os.path.join(private, 'socket')
+        try:
+            self._server.socket.bind(path)
+            os.chmod(path, 0o600)
+            os.rename(path, self.address)
+        finally:
+            if os.path.lexists(path):
+                os.remove(path)
+            os.rmdir(private)
+        self._server.server_activate()
+
+    #--------------------------------------------------------------------------
+    def _open(self, path):
+        c = config.open(path)
+        self._configs[path] = c
+        self._stamps[path]  = _stamp(path)
+        return(c)
+
+    def _config(self, path, create=False):
+        with self._lock:
+            c = self._configs.get(path)
+            if c is not None:
+                return(c)
+            if not self._serve_any:
+                raise ConfigDaemonException("The daemon does not serve '%s'" % path)
+            if not create and not os.path.isfile(path):
+                raise FileNotFoundError("No configuration file '%s'" % path)
+            return(self._open(path))
+
+    def _connected(self, handler):
+        with self._lock:
+            self._handlers.add(handler)
+
+    def _disconnected(self, handler):
+        with self._lock:
+            self._handlers.discard(handler)
+            for handlers in self._subscribers.values():
+                handlers.discard(handler)
+
+    def _dispatch(self, handler, request):
+        op   = request.get('op')
+        path = request.get('file')
+        if op == 'subscribe':
+            c = self._config(path)
+            with self._lock:
+                self._subscribers.setdefault(path, set()).add(handler)
+                return({'version' : c.cfgversion})
+        if op == 'snapshot':
+            c = self._config(path)
+            with self._lock:
+                return({'version' : c.cfgversion, 'cfg' : c.cfg})
+        if op == 'get':
+            c = self._config(path)
+            with self._lock:
+                value = configcolumns.resolve(c.cfg, configcolumns.path_keys(request['path']))
+                return({'version' : c.cfgversion, 'value' : value})
+        if op == 'write':
+            c = self._config(path, create=True)
+            with self._lock:
+                c.cfg = request['cfg']
+                c.write()
+                self._stamps[path] = _stamp(path)
+                version = c.cfgversion
+            self._notify(path, version)
+            return({'version' : version})
+        raise ConfigDaemonException("Unknown request '%s'" % op)
+
+    def _notify(self, path, version):
+        with self._lock:
+            handlers = list(self._subscribers.get(path, ()))
+        for handler in handlers:
+            try:
+                handler.send({'event' : 'changed', 'file' : path, 'version' : version})
+            except OSError:
+                self._disconnected(handler)
+
+    #--------------------------------------------------------------------------
+    def check(self):
+        """
+        Reloads every served file that has changed since it was last loaded, and
+        notifies its clients. A file that cannot be read, as when it is half
+        written, is tried again by the next check.
+
+        Returns:
+
+            The list of the paths of the files reloaded.
+
+        """
+        reloaded = []
+        with self._lock:
+            paths = list(self._configs)
+        for path in paths:
+            stamp = _stamp(path)
+            if stamp is None or stamp == self._stamps.get(path):
+                continue
+            with self._lock:
+                c = self._configs[path]
+                try:
+                    c.read()
+                except Exception:
+                    continue
+                self._stamps[path] = stamp
+                version = c.cfgversion
+            self._notify(path, version)
+            reloaded.append(path)
+        return(reloaded)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _spawn(self, target):
+        thread = threading.Thread(target=target, name='configdaemon', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        """
+        Starts serving, and watching the files, from background threads.
+        """
+        self._spawn(self._server.serve_forever)
+        self._spawn(self._watch)
+
+    def serve_forever(self):
+        """
+        Watches the files from a background thread and serves from the calling
+        thread until **close()** is called from another thread.
+        """
+        self._spawn(self._watch)
+        self._server.serve_forever()
+
+    def close(self):
+        """
+        Stops serving, disconnects the clients and removes the socket.
+        """
+        self._stop.set()
+        if any(t.is_alive() for t in self._threads):
+            self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._threads = []
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+#------------------------------------------------------------------------------
+class Config(config.Config):
+    """
+    Sub-class the base config.Config class and over-ride its read() and write()
+    methods to fetch the configuration from, and store it through, a **Daemon**.
+
+    The **cfgfile** names the file on the daemon's side. Besides the constructor
+    parameters of the abstract base class -- see `the config module API page`_ --
+    it takes:
+
+        **address** - the path of the daemon's socket, by default **DEFAULT_SOCKET**
+
+        **timeout** - the number of seconds to wait for the daemon, or None to wait forever
+
+    Call **close()** to disconnect from the daemon.
+
+    .. _the config module API page: config.html
+
+    """
+
+    #: Default configuration file name, **cfgfile**, if none is specified during class instantiation
+    DEFAULT_CFG_FILE   = "config.json"
+
+    #: Default configuration dictionary, **cfgdict**, if none is specified during class instantiation.
+    DEFAULT_CFG_DICT   = {}
+
+    #: Default number of seconds to wait for the daemon, **timeout**, if none is specified during class instantiation.
+    DEFAULT_TIMEOUT    = 10.0
+
+
+    def __init__(self, cfgdict=None, cfgfile=None, encoding=None, force=None, write_thru=None, compact=None,
+                 address=None, timeout=None):
+        self._address   = address if isinstance(address, str) else DEFAULT_SOCKET
+        self._timeout   = timeout if timeout is not None else self.DEFAULT_TIMEOUT
+        self._conn      = None
+        self._listener  = None
+        self._listening = False
+        self._req_lock  = threading.Lock()
+        # the last configuration fetched from the daemon, and its version
+        self._cache     = None
+        self._version   = None
+        # the newest version the daemon has announced
+        self._latest    = 0
+
+        super().__init__(cfgdict, cfgfile, encoding, force, write_thru, compact)
+
+    def _initCfg(self):
+        """
+        Subscribes to the daemon's notifications for the **cfgfile**, then loads
+        it from the daemon or, if **force** is True or the file does not exist yet,
+        stores the configuration passed to the constructor.
+        """
+        self._subscribe()
+        if self._force:
+            self.write()
+        else:
+            try:
+                self.read()
+            except FileNotFoundError:
+                self.write()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    #--------------------------------------------------------------------------
+    def _connect(self):
+        _unix_sockets()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self._timeout)
+            sock.connect(self._address)
+            if not _same_user(sock):
+                raise ConfigDaemonException("The daemon at '%s' is run by another user" % self._address)
+        except BaseException:
+            sock.close()
+            raise
+        return(sock, sock.makefile('rb'))
+
+    def _exchange(self, conn, request):
+        sock, rfile = conn
+        sock.sendall(_encode(request))
+        line = rfile.readline()
+        if not line:
+            raise ConnectionError("The daemon at '%s' closed the connection" % self._address)
+        reply = _decode(line)
+        if 'error' in reply:
+            raise _EXCEPTIONS.get(reply['error'], ConfigDaemonException)(reply['message'])
+        return(reply)
+
+    def _request(self, op, **fields):
+        with self._req_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                return(self._exchange(self._conn, dict(fields, op=op, file=self._cfgfile)))
+            except (OSError, ValueError):
+                # the connection is in an unknown state, start afresh next time
+                self._disconnect()
+                raise
+
+    def _disconnect(self):
+        if self._conn is not None:
+            self._conn[1].close()
+            self._conn[0].close()
+            self._conn = None
+
+    def _subscribe(self):
+        # also after the daemon was restarted, when the versions start afresh and the
+        # connections are gone
+        self._close_listener()
+        with self._req_lock:
+            self._disconnect()
+        self._cache   = None
+        self._version = None
+        self._latest  = 0
+
+        conn = self._connect()
+        try:
+            reply = self._exchange(conn, {'op' : 'subscribe', 'file' : self._cfgfile})
+        except FileNotFoundError:
+            # nothing to be notified of until the file is written
+            conn[1].close()
+            conn[0].close()
+            return
+        self._announce(reply['version'])
+        conn[0].settimeout(None)
+        self._listening = True
+        self._listener  = conn
+        threading.Thread(target=self._listen, args=(conn,), name='configdaemon', daemon=True).start()
+
+    def _listen(self, conn):
+        try:
+            for line in conn[1]:
+                self._announce(_decode(line)['version'])
+        except (OSError, ValueError):
+            pass
+        if self._listener is conn:
+            self._listening = False
+
+    def _announce(self, version):
+        if version > self._latest:
+            self._latest = version
+
+    def _current(self):
+        return(self._cache is not None and self._listening and self._version == self._latest)
+
+    def close(self):
+        """
+        Disconnects from the daemon. The configuration dictionary, **cfg**, is kept.
+        """
+        with self._req_lock:
+            self._disconnect()
+        self._close_listener()
+
+    def _close_listener(self):
+        self._listening = False
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            try:
+                listener[0].shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            listener[0].close()
+
+    #--------------------------------------------------------------------------
+    @property
+    def stale(self):
+        """
+        Property
+
+        **stale** - a boolean, True unless the configuration last fetched from the
+        daemon is known to be current, in which case **read()** and **get()** use it
+        """
+        return(not self._current())
+
+    def read(self):
+        """
+        Fetches the configuration from the daemon, unless the copy fetched last is
+        still current, and stores it in the configuration dictionary, **cfg**.
+
+        Returns:
+
+            The configuration dictionary accessible by the **cfg** property.
+
+        Raises:
+
+            FileNotFoundError if the daemon has no such **cfgfile**.
+
+            ConfigDaemonException for any other error reported by the daemon.
+
+            OSError if the daemon cannot be reached.
+
+        """
+        if not self._listening:
+            # notifications were lost, as when the daemon was restarted
+            self._subscribe()
+        if self._current():
+            if self._instrumented():
+                self._record('cache_hit', cache='daemon')
+        else:
+            reply = self._request('snapshot')
+            cache = reply['cfg']
+            self._cache   = configcompact.compact(cache) if self._compact else cache
+            self._version = reply['version']
+            self._announce(self._version)
+        # the cache is never changed, cfg is a copy-on-write or read-only view of it
+        self._cfgdict = self._cache if self._compact else configcow.share(self._cache)
+        return(self._cfgdict)
+
+    def write(self):
+        """
+        Sends the configuration dictionary, **cfg**, to the daemon, which writes it
+        to the **cfgfile** and notifies the other clients.
+
+        Returns:
+
+            None
+
+        """
+        if not self._listening:
+            self._subscribe()
+        reply = self._request('write', cfg=configcompact.thaw(self._cfgdict))
+        self._cache = None
+        self._announce(reply['version'])
+        if self._listener is None:
+            # the file did not exist until now
+            self._subscribe()
+        self._journal_reset()
+
+    def get(self, path):
+        """
+        Returns the daemon's current value at **path**, a JSON Pointer such as
+        '/Logging/level' or a sequence of keys, from the configuration last fetched
+        if it is still current or else from the daemon. Changes made to **cfg**
+        and not yet written are not seen.
+
+        Raises:
+
+            KeyError, or IndexError, if there is no value at **path**.
+
+        """
+        keys = configcolumns.path_keys(path)
+        if not self._listening:
+            self._subscribe()
+        if self._current():
+            if self._instrumented():
+                self._record('cache_hit', cache='daemon')
+            return(copy.deepcopy(configcolumns.resolve(self._cache, keys)))
+        return(self._request('get', path=list(keys))['value'])
+
+#------------------------------------------------------------------------------
+def main(argv=None):
+    """
+    Command line entry point, see **python configdaemon.py --help**.
+    """
+    parser = argparse.ArgumentParser(description="Serve configuration files to local processes.")
+    parser.add_argument('cfgfiles', nargs='*', help="files to serve; any file a client names if none")
+    parser.add_argument('--socket',   default=DEFAULT_SOCKET, help="path of the Unix domain socket")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between checks for changes")
+    args = parser.parse_args(argv)
+
+    daemon = Daemon(args.socket, args.cfgfiles or None, args.interval)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+    return(0)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    sys.exit(main())
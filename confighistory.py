@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module confighistory
+
+A content-addressed store of the versions of a configuration file, kept by
+**config.Config** when its **history** property is True, so that a bad write can
+be undone with **Config.rollback()**.
+
+A **History** is a directory holding each distinct content once, compressed, in a
+file named by the SHA-256 hash of the content, plus an index listing the versions
+in the order they were written, one line of JSON each::
+
+    app.json.history/
+        index                       {"hash": "9f86d0...", "time": 1700000000.0, "size": 412}
+        objects/9f/86d0...          ...
+
+Fetching a version is a lookup of its file by hash; writing a content that is
+already stored, as a rollback does, only adds a line to the index. The parsed
+configurations of the most recent versions are kept in memory, as snapshots (see
+the **configsnapshot** module), so rolling back to one of them does not parse it
+again. **History.prune()** drops versions beyond a count or an age, and the
+contents no other version refers to.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+from collections import OrderedDict, namedtuple
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The zlib compression level of the stored contents.
+COMPRESSLEVEL = 6
+
+#: The number of parsed versions kept in memory by a **History**, by default.
+CACHE_SIZE = 8
+
+#: One version: the **hash** of its content, the **time** it was stored, in seconds
+#: since the epoch, and the **size** of its content in bytes.
+Version = namedtuple('Version', ('hash', 'time', 'size'))
+
+#------------------------------------------------------------------------------
+class ConfigHistoryException(Exception):
+    """
+    Custom exception raised when a version asked for is not in the history.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+def content_hash(data):
+    """
+    Returns the SHA-256 hex digest of the bytes, **data**.
+    """
+    return(hashlib.sha256(data).hexdigest())
+
+def _replace(path, data):
+    # writes data to path atomically, so a crash leaves the old file or the new one
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+#------------------------------------------------------------------------------
+class History(object):
+    """
+    The versions stored in the directory, **directory**, which is created when the
+    first one is added, with the parsed configurations of the last **cache_size**
+    versions added or fetched kept in memory.
+    """
+    def __init__(self, directory, cache_size=CACHE_SIZE):
+        self.directory  = os.path.abspath(directory)
+        self.cache_size = cache_size
+        self._index     = os.path.join(self.directory, 'index')
+        self._versions  = None
+        self._stamp     = None
+        # hash --> snapshot of the parsed content, least recently used first
+        self._trees     = OrderedDict()
+
+    def _object(self, digest):
+        return(os.path.join(self.directory, 'objects', digest[:2], digest[2:]))
+
+    def _index_stamp(self):
+        try:
+            st = os.stat(self._index)
+        except FileNotFoundError:
+            return(None)
+        return((st.st_mtime_ns, st.st_size, st.st_ino))
+
+    def versions(self):
+        """
+        Returns the list of the stored **Version**s, oldest first.
+        """
+        # the index is read again only if another History changed it
+        stamp = self._index_stamp()
+        if self._versions is None or stamp != self._stamp:
+            self._versions = []
+            if stamp is not None:
+                with open(self._index, encoding='utf-8') as fp:
+                    for line in fp:
+                        if line.strip():
+                            self._versions.append(Version(**json.loads(line)))
+            self._stamp = stamp
+        return(list(self._versions))
+
+    def latest(self):
+        """
+        Returns the most recent **Version**, or None if there is none.
+        """
+        versions = self.versions()
+        return(versions[-1] if versions else None)
+
+    def add(self, data, tree=None):
+        """
+        Stores the bytes, **data**, as the newest version, unless they are the content of
+        the newest version already, and keeps **tree**, the snapshot of the configuration
+        they hold, if given.
+
+        Returns:
+
+            The **Version** of **data**.
+
+        """
+        digest = content_hash(data)
+        latest = self.latest()
+        if tree is not None:
+            self._keep(digest, tree)
+        if latest is not None and latest.hash == digest:
+            return(latest)
+
+        path = self._object(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _replace(path, zlib.compress(data, COMPRESSLEVEL))
+        version = Version(digest, time.time(), len(data))
+        line    = (json.dumps(version._asdict()) + '\n').encode('utf-8')
+        with open(self._index, mode='ab') as fp:
+            fp.write(line)
+        self._versions.append(version)
+        # unless someone else appended too, the list is up to date with the index
+        stamp = self._index_stamp()
+        size  = self._stamp[1] if self._stamp is not None else 0
+        self._stamp = stamp if stamp[1] == size + len(line) else None
+        return(version)
+
+    def get(self, version):
+        """
+        Returns the content of **version**, a **Version** or a hash, as bytes.
+
+        Raises:
+
+            ConfigHistoryException if it is not stored.
+
+        """
+        digest = version.hash if isinstance(version, Version) else version
+        try:
+            with open(self._object(digest), mode='rb') as fp:
+                return(zlib.decompress(fp.read()))
+        except FileNotFoundError:
+            raise ConfigHistoryException("No version %s in '%s'" % (digest, self.directory))
+
+    def back(self, n):
+        """
+        Returns the **Version** **n** versions before the newest; 0 is the newest.
+
+        Raises:
+
+            ConfigHistoryException if there are not that many versions.
+
+        """
+        versions = self.versions()
+        if not 0 <= n < len(versions):
+            raise ConfigHistoryException("Cannot go back %d versions, '%s' holds %d" % (n, self.directory, len(versions)))
+        return(versions[-1 - n])
+
+    def _keep(self, digest, tree):
+        self._trees[digest] = tree
+        self._trees.move_to_end(digest)
+        while len(self._trees) > max(self.cache_size, 0):
+            self._trees.popitem(last=False)
+
+    def tree(self, version):
+        """
+        Returns the snapshot of the configuration of **version**, a **Version** or a
+        hash, if it is kept in memory, or else None.
+        """
+        digest = version.hash if isinstance(version, Version) else version
+        tree = self._trees.get(digest)
+        if tree is not None:
+            self._trees.move_to_end(digest)
+        return(tree)
+
+    def prune(self, keep=None, max_age=None):
+        """
+        Drops all but the newest **keep** versions, if **keep** is given, and the versions
+        older than **max_age** seconds, if it is given, then removes the contents no
+        remaining version refers to. The newest version is always kept.
+
+        Returns:
+
+            The number of versions dropped.
+
+        """
+        versions = self.versions()
+        kept = versions
+        if keep is not None:
+            kept = kept[-max(keep, 1):]
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            kept = [v for v in kept[:-1] if v.time >= cutoff] + kept[-1:]
+        if len(kept) == len(versions):
+            return(0)
+
+        _replace(self._index, ''.join(json.dumps(v._asdict()) + '\n' for v in kept).encode('utf-8'))
+        self._versions = kept
+        self._stamp    = self._index_stamp()
+        referenced = {v.hash for v in kept}
+        for digest in {v.hash for v in versions} - referenced:
+            try:
+                os.remove(self._object(digest))
+            except FileNotFoundError:
+                pass
+            self._trees.pop(digest, None)
+        return(len(versions) - len(kept))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_confighistory', verbosity=2)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configinclude
+
+Include directives, which stitch a configuration together from several files.
+
+A directive is a mapping whose only key is **INCLUDE_KEY**, '$include', or in
+YAML a scalar tagged **INCLUDE_TAG**, '!include'; either is replaced by the
+contents of the file it names, relative to the directory of the file it is in::
+
+    # app.yaml                              // app.json
+    logging: !include logging.yaml          {"logging"  : {"$include" : "logging.json"},
+    services:                                "services" : {"$include" : "services.json"}}
+        $include: services.yaml
+
+Included files may include others, so long as no file includes itself.
+
+A **Resolver** loads a configuration file and everything it includes into one
+tree, and keeps for each file its last parsed contents, with the file's
+modification time, and for each directive the path in the tree where its file
+was spliced in. A file is parsed at most once per load, however many times it is
+included, and not at all if it has not changed since the previous load.
+**Resolver.reload()** re-parses only the files that changed and splices them
+into the existing tree at their paths, without touching the rest of it.
+
+When the tree is written back, **Resolver.restore()** puts the directives of the
+top file back in place of the contents they were replaced with, so the files
+keep their structure.
+
+See the **includes** property of **config.Config**.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import copy
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The key of an include directive mapping.
+INCLUDE_KEY = '$include'
+
+#: The YAML tag of an include directive scalar.
+INCLUDE_TAG = '!include'
+
+#------------------------------------------------------------------------------
+class ConfigIncludeException(Exception):
+    """
+    Custom exception raised when a file includes itself, directly or through other
+    files, and when a configuration cannot be written back because part of it that
+    comes from an included file was changed.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+class Include(object):
+    """
+    An include directive of the file, **path**, written as a **tag** ('!include')
+    if **tag** is True or else as a mapping ('$include').
+    """
+    __slots__ = ('path', 'tag')
+
+    def __init__(self, path, tag=False):
+        self.path = path
+        self.tag  = tag
+
+    def __eq__(self, other):
+        return(isinstance(other, Include) and (self.path, self.tag) == (other.path, other.tag))
+
+    def __ne__(self, other):
+        return(not self.__eq__(other))
+
+    def __hash__(self):
+        return(hash((self.path, self.tag)))
+
+    def __repr__(self):
+        return("Include(%r, tag=%r)" % (self.path, self.tag))
+
+    def mapping(self):
+        """
+        Returns the directive as a mapping, as it is written in JSON.
+        """
+        return({INCLUDE_KEY : self.path})
+
+def directive(value):
+    """
+    Returns the **Include** that **value** stands for, or None if it is not an
+    include directive.
+    """
+    if isinstance(value, Include):
+        return(value)
+    if isinstance(value, Mapping) and len(value) == 1:
+        path = value.get(INCLUDE_KEY)
+        if isinstance(path, str):
+            return(Include(path))
+    return(None)
+
+def _stamp(path):
+    st = os.stat(path)
+    return((st.st_mtime_ns, st.st_size, st.st_ino))
+
+#------------------------------------------------------------------------------
+class Site(object):
+    """
+    Where an included file was spliced into the tree: at the sequence of **keys**,
+    from the file **target**, by the **include** directive in the file **owner**.
+    **stack** holds the files being included when it was found, outermost first.
+    """
+    __slots__ = ('keys', 'target', 'owner', 'include', 'stack')
+
+    def __init__(self, keys, target, owner, include, stack):
+        self.keys    = keys
+        self.target  = target
+        self.owner   = owner
+        self.include = include
+        self.stack   = stack
+
+#------------------------------------------------------------------------------
+class Resolver(object):
+    """
+    Loads the configuration file, **cfgfile**, with its includes, parsing each
+    file with **parse(path)**, which returns its contents with any directives
+    in it still in place.
+    """
+    def __init__(self, cfgfile, parse):
+        self.cfgfile = os.path.abspath(cfgfile)
+        self.parse   = parse
+        #: Where each included file was spliced in by the last load, in tree order.
+        self.sites   = []
+        #: The number of files parsed, over all loads.
+        self.parses  = 0
+        # path --> (stamp, parsed contents)
+        self._cache  = {}
+        # path --> parsed contents, for the load in progress
+        self._loaded = None
+
+    def _parsed(self, path):
+        if path in self._loaded:
+            return(self._loaded[path])
+        stamp  = _stamp(path)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            value = cached[1]
+        else:
+            value = self.parse(path)
+            self.parses += 1
+            self._cache[path] = (stamp, value)
+        self._loaded[path] = value
+        return(value)
+
+    def _copy(self, value, keys, owner, stack, sites):
+        # a copy of the parsed contents of a file, with its directives resolved;
+        # copied so that the cached contents never end up in, or shared by, a tree
+        include = directive(value)
+        if include is not None:
+            target = os.path.normpath(os.path.join(os.path.dirname(owner), include.path))
+            if target in stack:
+                raise ConfigIncludeException("'%s' includes itself through %s" % (target, ' -> '.join(stack)))
+            sites.append(Site(keys, target, owner, include, stack))
+            return(self._copy(self._parsed(target), keys, target, stack + (target,), sites))
+
+        if isinstance(value, Mapping):
+            if type(value) is dict:
+                result = {}
+            else:
+                # keeps the comments and such of round-trip YAML
+                result = copy.copy(value)
+            for k, v in value.items():
+                result[k] = self._copy(v, keys + (k,), owner, stack, sites)
+            return(result)
+
+        if isinstance(value, list):
+            result = [] if type(value) is list else copy.copy(value)
+            items  = [self._copy(v, keys + (i,), owner, stack, sites) for i, v in enumerate(value)]
+            if type(value) is list:
+                result.extend(items)
+            else:
+                result[:] = items
+            return(result)
+        return(value)
+
+    def load(self):
+        """
+        Returns the contents of the **cfgfile**, with every include directive
+        replaced by the contents of the file it names.
+
+        Raises:
+
+            ConfigIncludeException if a file includes itself.
+
+        """
+        self._loaded = {}
+        try:
+            sites = []
+            tree  = self._copy(self._parsed(self.cfgfile), (), self.cfgfile, (self.cfgfile,), sites)
+        finally:
+            self._loaded = None
+        self.sites = sites
+        # forget files no longer included
+        files = self.files()
+        for path in list(self._cache):
+            if path not in files:
+                del self._cache[path]
+        return(tree)
+
+    def files(self):
+        """
+        Returns the set of the files the last load read: the **cfgfile** and those it included.
+        """
+        return({self.cfgfile} | {s.target for s in self.sites})
+
+    def dependencies(self):
+        """
+        Returns the include graph of the last load, as a dictionary of the files each
+        file includes, by file.
+        """
+        graph = {path : set() for path in self.files()}
+        for s in self.sites:
+            graph[s.owner].add(s.target)
+        return(graph)
+
+    def changed(self):
+        """
+        Returns the set of the files that have changed, or gone, since they were last parsed.
+        """
+        changed = set()
+        for path in self.files():
+            cached = self._cache.get(path)
+            try:
+                if cached is None or cached[0] != _stamp(path):
+                    changed.add(path)
+            except OSError:
+                changed.add(path)
+        return(changed)
+
+    def reload(self, tree):
+        """
+        Re-parses the files that have changed since they were last parsed and splices
+        their contents into **tree**, the result of an earlier **load()**, in place,
+        at every path where they were included. The **cfgfile** itself having changed
+        calls for a new **load()** instead.
+
+        Returns:
+
+            The set of files re-parsed; empty if none had changed.
+
+        Raises:
+
+            ValueError if the **cfgfile** has changed.
+
+        """
+        changed = self.changed()
+        if not changed:
+            return(changed)
+        if self.cfgfile in changed:
+            raise ValueError("'%s' has changed, it must be loaded again" % self.cfgfile)
+
+        # only the outermost sites of changed files, as the others are inside them
+        spliced = []
+        for s in self.sites:
+            if s.target in changed and not any(s.keys[:len(p.keys)] == p.keys for p in spliced):
+                spliced.append(s)
+
+        self._loaded = {}
+        try:
+            sites = []
+            for s in self.sites:
+                inside = [p for p in spliced if s.keys[:len(p.keys)] == p.keys]
+                if not inside:
+                    sites.append(s)
+                elif inside[0] is s:
+                    sites.append(s)
+                    value = self._copy(self._parsed(s.target), s.keys, s.target, s.stack + (s.target,), sites)
+                    _assign(tree, s.keys, value)
+        finally:
+            self._loaded = None
+        self.sites = sites
+        return(changed)
+
+    def restore(self, tree):
+        """
+        Returns **tree**, the result of an earlier **load()**, with the include
+        directives of the **cfgfile** back in place of the contents they were
+        replaced with. Only the containers on the paths to the directives are copied.
+
+        Raises:
+
+            ConfigIncludeException if part of **tree** that came from an included file
+            has been changed.
+
+        """
+        own = [s for s in self.sites if s.owner == self.cfgfile]
+        if not own:
+            return(tree)
+
+        self._loaded = {}
+        try:
+            for s in own:
+                expected = self._copy(self._parsed(s.target), s.keys, s.target, s.stack + (s.target,), [])
+                if _lookup(tree, s.keys) != expected:
+                    raise ConfigIncludeException("%s was changed, but comes from the included file '%s'; change that file instead"
+                                                 % ('/'.join(str(k) for k in s.keys), s.target))
+        except (KeyError, IndexError):
+            raise ConfigIncludeException("%s, which comes from the included file '%s', was removed"
+                                         % ('/'.join(str(k) for k in s.keys), s.target))
+        finally:
+            self._loaded = None
+
+        root   = copy.copy(tree)
+        copies = {(): root}
+        for s in own:
+            if not s.keys:
+                # the whole cfgfile is a directive, so nothing else is in it
+                return(s.include if s.include.tag else s.include.mapping())
+            node = root
+            for i in range(len(s.keys) - 1):
+                path = s.keys[:i + 1]
+                if path not in copies:
+                    copies[path] = copy.copy(node[s.keys[i]])
+                    node[s.keys[i]] = copies[path]
+                node = copies[path]
+            node[s.keys[-1]] = s.include if s.include.tag else s.include.mapping()
+        return(root)
+
+#------------------------------------------------------------------------------
+def _lookup(tree, keys):
+    for k in keys:
+        tree = tree[k]
+    return(tree)
+
+def _assign(tree, keys, value):
+    if keys:
+        _lookup(tree, keys[:-1])[keys[-1]] = value
+    # the whole tree, which can only be replaced in place if it keeps its type
+    elif isinstance(tree, dict) and isinstance(value, dict):
+        tree.clear()
+        tree.update(value)
+    elif isinstance(tree, list) and isinstance(value, list):
+        tree[:] = value
+    else:
+        raise ValueError("the included file at the top changed type, it must be loaded again")
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configinclude', verbosity=2)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configinterp
+
+Interpolation of references, to other values of a configuration and to the
+environment, in its strings::
+
+    base:  https://api.example.com
+    users: ${base}/users                    # https://api.example.com/users
+    home:  ${env:HOME}/app                  # /home/me/app
+    cache: ${env:CACHE_DIR:-/tmp/cache}     # the default, if CACHE_DIR is not set
+    port:  ${/server/port}                  # the value itself, an int, not a string
+    price: $${amount}                       # $${ escapes a literal ${
+
+A reference names a value by its keys, either separated by dots, as in
+${server.port}, or as a JSON Pointer, as in ${/server/port}; a list index is a
+key like any other. A string that is nothing but a single reference takes the
+value it names, whatever its type, sections included; references inside a
+longer string must name scalars. Referenced values may themselves hold
+references, so long as no value refers to itself, directly or not.
+
+An **Interpolator** turns snapshots of a configuration (see the **configsnapshot**
+module) into snapshots with every reference resolved. It keeps the value of each
+string holding references and which values each depends on, and evaluates them
+in dependency order, each once. Given the next snapshot, it finds what changed
+with **configjournal.changes()** -- which skips the sections the two snapshots
+share -- and re-evaluates only the strings that changed, or that depend on
+something that did, or on an environment variable that did.
+
+See the **interpolated** property of **config.Config**.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import re
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configjournal
+import configsnapshot
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: A reference, or the $$ escape of a literal $.
+REFERENCE = re.compile(r'\$\$|\$\{([^{}]*)\}')
+
+#: The prefix of a reference to an environment variable.
+ENV_PREFIX = 'env:'
+
+#: The separator of an environment variable's name from its default value.
+ENV_DEFAULT = ':-'
+
+#------------------------------------------------------------------------------
+class ConfigInterpolationException(Exception):
+    """
+    Custom exception raised when a reference cannot be resolved: it names a value
+    or an environment variable that does not exist, is part of a cycle of
+    references, or names a section from inside a longer string.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+def is_template(value):
+    """
+    Returns True if **value** is a string holding references, or escapes, to interpolate.
+    """
+    return(isinstance(value, str) and '$' in value and REFERENCE.search(value) is not None)
+
+def parse(reference):
+    """
+    Returns the reference, **reference**, the text between ${ and }, as a tuple:
+    ('env', name, default) for an environment variable, where **default** is None
+    if there is none, or ('path', keys) for a value of the configuration.
+    """
+    if reference.startswith(ENV_PREFIX):
+        name, sep, default = reference[len(ENV_PREFIX):].partition(ENV_DEFAULT)
+        return(('env', name, default if sep else None))
+    if reference.startswith('/'):
+        return(('path', tuple(configjournal.split(reference))))
+    return(('path', tuple(reference.split('.')) if reference else ()))
+
+def _lookup(tree, keys):
+    # the value at keys, where keys of the text of a reference match non string keys
+    for k in keys:
+        if isinstance(tree, (list, tuple)):
+            tree = tree[int(k)]
+        elif k in tree:
+            tree = tree[k]
+        else:
+            for key in tree:
+                if str(key) == k:
+                    tree = tree[key]
+                    break
+            else:
+                raise KeyError(k)
+    return(tree)
+
+def _templates(value, keys, found):
+    # adds the templates in value, by their keys, to found, with their parsed references
+    if isinstance(value, Mapping):
+        for k, v in value.items():
+            _templates(v, keys + (str(k),), found)
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            _templates(v, keys + (str(i),), found)
+    elif is_template(value):
+        found[keys] = [parse(m.group(1)) for m in REFERENCE.finditer(value) if m.group(1) is not None]
+    return(found)
+
+def _within(keys, prefix):
+    return(keys[:len(prefix)] == prefix)
+
+def _overlay(tree, values):
+    # tree, a snapshot, with the values at the keys of values replaced
+    if () in values:
+        return(values[()])
+    children = {}
+    for keys, value in values.items():
+        children.setdefault(keys[0], {})[keys[1:]] = value
+    if isinstance(tree, tuple):
+        items = list(tree)
+        for k, v in children.items():
+            items[int(k)] = _overlay(items[int(k)], v)
+        return(tuple(items))
+    items  = dict(tree.items())
+    lookup = {str(k) : k for k in items}
+    for k, v in children.items():
+        key = lookup[k]
+        items[key] = _overlay(items[key], v)
+    return(configsnapshot.freeze(items))
+
+#------------------------------------------------------------------------------
+class _PrefixIndex(object):
+    # items by sequence of keys, found by the keys at, above or below a sequence of keys
+    def __init__(self):
+        # keys --> set of items
+        self._at    = {}
+        # prefix --> set of the keys in _at starting with it
+        self._under = {}
+
+    def add(self, keys, item):
+        items = self._at.get(keys)
+        if items is None:
+            items = self._at[keys] = set()
+            for i in range(len(keys) + 1):
+                self._under.setdefault(keys[:i], set()).add(keys)
+        items.add(item)
+
+    def discard(self, keys, item):
+        items = self._at.get(keys)
+        if items is None:
+            return
+        items.discard(item)
+        if not items:
+            del self._at[keys]
+            for i in range(len(keys) + 1):
+                under = self._under[keys[:i]]
+                under.discard(keys)
+                if not under:
+                    del self._under[keys[:i]]
+
+    def under(self, keys):
+        found = set()
+        for k in self._under.get(keys, ()):
+            found |= self._at[k]
+        return(found)
+
+    def related(self, keys):
+        found = self.under(keys)
+        for i in range(len(keys)):
+            found |= self._at.get(keys[:i], set())
+        return(found)
+
+#------------------------------------------------------------------------------
+class Interpolator(object):
+    """
+    Resolves the references in successive snapshots of a configuration, looking up
+    environment variables in **environ**, by default **os.environ**.
+    """
+    def __init__(self, environ=None):
+        self.environ  = os.environ if environ is None else environ
+        #: The number of strings evaluated, over all updates.
+        self.evaluations = 0
+        self._reset()
+
+    def _reset(self):
+        #: The last snapshot given to **update()**, as it was.
+        self.snapshot   = None
+        #: The last snapshot given to **update()**, with its references resolved.
+        self.tree       = None
+        # keys of a template --> its parsed references
+        self._refs      = {}
+        # keys of a template --> its value
+        self._values    = {}
+        # the keys of the templates
+        self._templates = _PrefixIndex()
+        # keys referred to --> keys of the templates referring to them
+        self._referrers = _PrefixIndex()
+        # environment variable name --> keys of the templates referring to it
+        self._env_referrers = {}
+        # environment variable name --> its value when last used
+        self._env       = {}
+
+    def _add(self, keys, refs):
+        self._refs[keys] = refs
+        self._templates.add(keys, keys)
+        for ref in refs:
+            if ref[0] == 'path':
+                self._referrers.add(ref[1], keys)
+            else:
+                self._env_referrers.setdefault(ref[1], set()).add(keys)
+
+    def _remove(self, keys):
+        for ref in self._refs.pop(keys):
+            if ref[0] == 'path':
+                self._referrers.discard(ref[1], keys)
+            else:
+                self._env_referrers[ref[1]].discard(keys)
+        self._templates.discard(keys, keys)
+        self._values.pop(keys, None)
+
+    def _depends_on(self, keys):
+        # the templates whose values the template at keys depends on
+        deps = set()
+        for ref in self._refs[keys]:
+            if ref[0] == 'path':
+                deps |= self._templates.related(ref[1])
+        return(deps)
+
+    def _dependents(self, changed, env=()):
+        # the templates that depend on a change at any of the keys, changed, or to
+        # any of the environment variables, env
+        dependents = set()
+        for keys in changed:
+            dependents |= self._referrers.related(keys)
+        for name in env:
+            dependents |= self._env_referrers.get(name, set())
+        return(dependents)
+
+    def _order(self, dirty):
+        # the dirty templates, each after those it depends on
+        order, done, stack = [], set(), []
+        def visit(keys):
+            if keys in done:
+                return
+            if keys in stack:
+                cycle = stack[stack.index(keys):] + [keys]
+                raise ConfigInterpolationException("References form a cycle: %s"
+                                                   % ' -> '.join(configjournal.pointer(k) for k in cycle))
+            stack.append(keys)
+            for dep in self._depends_on(keys):
+                if dep in dirty:
+                    visit(dep)
+            stack.pop()
+            done.add(keys)
+            order.append(keys)
+        for keys in sorted(dirty):
+            visit(keys)
+        return(order)
+
+    def _resolve(self, keys):
+        # the value at keys, with the templates in it evaluated
+        try:
+            for i in range(1, len(keys)):
+                if keys[:i] in self._values:
+                    # inside a reference to a section, evaluated first, as keys depends on it
+                    return(_lookup(self._values[keys[:i]], keys[i:]))
+            raw = _lookup(self.snapshot, keys)
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ConfigInterpolationException("Reference to %s, which does not exist" % configjournal.pointer(keys))
+        inside = {t[len(keys):] : self._values[t] for t in self._templates.under(keys)}
+        return(_overlay(raw, inside) if inside else raw)
+
+    def _env_value(self, name, default):
+        value = self.environ.get(name)
+        self._env[name] = value
+        if value is None:
+            if default is None:
+                raise ConfigInterpolationException("Reference to the environment variable %s, which is not set" % name)
+            return(default)
+        return(value)
+
+    def _evaluate(self, keys):
+        text = _lookup(self.snapshot, keys)
+        self.evaluations += 1
+
+        match = REFERENCE.fullmatch(text)
+        if match is not None and match.group(1) is not None:
+            # the value itself, whatever its type
+            ref = parse(match.group(1))
+            if ref[0] == 'env':
+                return(self._env_value(ref[1], ref[2]))
+            return(self._resolve(ref[1]))
+
+        def substitute(match):
+            if match.group(1) is None:
+                return('$')
+            ref = parse(match.group(1))
+            if ref[0] == 'env':
+                return(self._env_value(ref[1], ref[2]))
+            value = self._resolve(ref[1])
+            if isinstance(value, (Mapping, tuple, list)):
+                raise ConfigInterpolationException("%s refers to the section %s from inside a string"
+                                                   % (configjournal.pointer(keys), configjournal.pointer(ref[1])))
+            return(str(value))
+        return(REFERENCE.sub(substitute, text))
+
+    def update(self, snapshot):
+        """
+        Resolves the references in **snapshot**, re-evaluating only what changed since
+        the previous snapshot, if any, and what depends on it. The result is the
+        **tree** attribute.
+
+        Returns:
+
+            The set of the keys of the strings evaluated; empty if nothing had changed.
+
+        Raises:
+
+            ConfigInterpolationException if a reference cannot be resolved.
+
+        """
+        if self.snapshot is None:
+            for keys, refs in _templates(snapshot, (), {}).items():
+                self._add(keys, refs)
+            dirty = set(self._refs)
+        else:
+            changed = set()
+            for op, keys, value in configjournal.changes(self.snapshot, snapshot):
+                keys = tuple(str(k) for k in keys)
+                changed.add(keys)
+                for t in self._templates.under(keys):
+                    self._remove(t)
+                if op != 'remove':
+                    for t, refs in _templates(value, keys, {}).items():
+                        self._add(t, refs)
+            env   = [name for name, value in self._env.items() if self.environ.get(name) != value]
+            dirty = {t for t in self._refs if t not in self._values} | self._dependents(changed, env)
+
+        # and whatever depends on them, however indirectly
+        pending = set(dirty)
+        while pending:
+            pending = self._dependents(pending) - dirty
+            dirty  |= pending
+
+        self.snapshot = snapshot
+        try:
+            for keys in self._order(dirty):
+                self._values[keys] = self._evaluate(keys)
+        except ConfigInterpolationException:
+            # start afresh next time
+            self._reset()
+            raise
+        self.tree = _overlay(snapshot, self._values) if self._values else snapshot
+        return(dirty)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configinterp', verbosity=2)
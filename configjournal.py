@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configjournal
+
+Helpers for the append-only change journal used by **config.Config** when its
+**journal** property is True.
+
+Each record in a journal is one line of JSON holding a list of `JSON Patch`_
+style operations -- *add*, *replace* and *remove* -- addressed by `JSON Pointer`_
+paths::
+
+    [{"op": "replace", "path": "/Logging/level", "value": "INFO"}]
+
+Records are produced by **diff()** from two snapshots (see the **configsnapshot**
+module) and applied, in order, by **patch()**.
+
+A journal starts with a header naming its base, the state of the configuration
+file the records apply to::
+
+    {"base": [1700000000000000000, 4096, 1234]}
+
+A journal whose base is no longer the file's state -- the file was written after
+the journal was started, by a writer that stopped before removing the journal, or
+by another program -- is stale, and **records()** leaves it out rather than
+undoing that write.
+
+.. _JSON Patch: https://tools.ietf.org/html/rfc6902
+
+.. _JSON Pointer: https://tools.ietf.org/html/rfc6901
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import json
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configsnapshot
+
+#------------------------------------------------------------------------------
+def _escape(key):
+    return(str(key).replace('~', '~0').replace('/', '~1'))
+
+def _unescape(token):
+    return(token.replace('~1', '/').replace('~0', '~'))
+
+def pointer(keys):
+    """
+    Returns the JSON Pointer string for the sequence of keys, **keys**.
+    """
+    return(''.join('/' + _escape(k) for k in keys))
+
+def split(path):
+    """
+    Returns the list of keys named by the JSON Pointer string, **path**.
+    """
+    if not path:
+        return([])
+    return([_unescape(t) for t in path[1:].split('/')])
+
+def changes(old, new, keys=()):
+    """
+    Generates the changes that turn the snapshot **old** into the snapshot **new**,
+    as (op, keys, value) tuples, where **op** is 'add', 'replace' or 'remove',
+    **keys** is the tuple of keys leading to the changed value and **value** is
+    its new snapshot (None for 'remove').
+
+    Sub-trees shared by both snapshots are skipped without being visited, so
+    the cost follows the size of the change. Lists are replaced as a whole.
+    """
+    if new is old:
+        return
+    if not (isinstance(old, Mapping) and isinstance(new, Mapping)):
+        if not (old == new and type(old) is type(new)):
+            yield(('replace', keys, new))
+        return
+
+    for k in old:
+        if k not in new:
+            yield(('remove', keys + (k,), None))
+    for k, v in new.items():
+        if k not in old:
+            yield(('add', keys + (k,), v))
+        else:
+            yield from changes(old[k], v, keys + (k,))
+
+def diff(old, new):
+    """
+    Returns the list of JSON Patch style operations that turn the snapshot **old**
+    into the snapshot **new** -- see **changes()**.
+    """
+    ops = []
+    for op, keys, value in changes(old, new):
+        if op == 'remove':
+            ops.append({'op' : op, 'path' : pointer(keys)})
+        else:
+            ops.append({'op' : op, 'path' : pointer(keys), 'value' : configsnapshot.thaw(value)})
+    return(ops)
+
+def _lookup(container, token):
+    if isinstance(container, list):
+        return(int(token))
+    if token not in container:
+        # keys that were not strings, as YAML allows, are written as strings
+        for k in container:
+            if str(k) == token:
+                return(k)
+    return(token)
+
+def patch(cfgdict, ops):
+    """
+    Applies the operations, **ops**, to the dictionary **cfgdict**, in place.
+
+    Returns:
+
+        **cfgdict**, or the replacement value if an operation replaced the whole document.
+
+    Raises:
+
+        KeyError, IndexError, TypeError or ValueError if an operation does not fit **cfgdict**.
+    """
+    for op in ops:
+        tokens = split(op['path'])
+        if not tokens:
+            cfgdict = op['value']
+            continue
+        parent = cfgdict
+        for token in tokens[:-1]:
+            parent = parent[_lookup(parent, token)]
+        key = _lookup(parent, tokens[-1])
+        if op['op'] == 'remove':
+            del parent[key]
+        else:
+            parent[key] = op['value']
+    return(cfgdict)
+
+def append(journalfile, ops, encoding='utf-8', base=None):
+    """
+    Appends one record holding the operations, **ops**, to the **journalfile**. A new
+    journal is started with a header naming its **base**, a JSON encodable stamp of
+    the configuration file the records apply to, unless that is None.
+
+    Returns:
+
+        A tuple, (number of bytes appended, size of the **journalfile** in bytes after the append).
+    """
+    record = (json.dumps(ops, separators=(',', ':')) + '\n').encode(encoding)
+    with open(journalfile, mode='a+b') as jp:
+        size = jp.seek(0, os.SEEK_END)
+        if size:
+            # start afresh if an earlier append was interrupted mid-record
+            jp.seek(size - 1)
+            if jp.read(1) != b'\n':
+                record = b'\n' + record
+        elif base is not None:
+            record = (json.dumps({'base' : base}, separators=(',', ':')) + '\n').encode(encoding) + record
+        jp.write(record)
+        return((len(record), jp.tell()))
+
+def records(journalfile, encoding='utf-8', base=None):
+    """
+    Returns the list of records in the **journalfile**, oldest first, or an empty
+    list if there is no journal. If **base** is not None and the journal names
+    another base, the journal is stale and the list is empty too.
+
+    Records left incomplete by an interrupted append are ignored.
+    """
+    try:
+        with open(journalfile, encoding=encoding, mode='r') as jp:
+            lines = jp.read().splitlines()
+    except FileNotFoundError:
+        return([])
+
+    result = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            if base is not None and record.get('base') != list(base):
+                return([])
+            continue
+        result.append(record)
+    return(result)
+
+def remove(journalfile):
+    """
+    Removes the **journalfile**, if it exists.
+    """
+    try:
+        os.remove(journalfile)
+    except FileNotFoundError:
+        pass
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configjournal', verbosity=2)
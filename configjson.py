@@ -19,6 +19,7 @@ import json
 # Application Specific 
 #------------------------------------------------------------------------------
 import config
+import configcompact
 
 #------------------------------------------------------------------------------
 # Third Party Dependencies
@@ -62,6 +63,7 @@ class Config(config.Config):
     def read(self, **kwargs):
         """
         Reads the **cfgfile** and stores the results in the configuration dictionary, **cfg**.
+        Any changes recorded in the **journalfile** are applied to the result.
 
         See `json module in PSL`_ for a full treatment of the parameter list.
 
@@ -73,8 +75,13 @@ class Config(config.Config):
         .. _json module in PSL: https://docs.python.org/3/library/json.html
 
         """
-        with open(self._cfgfile, encoding=self._encoding, mode='r') as cp:
-            self._cfgdict = json.load(cp,  **kwargs)
+        if self._compact and not self._includes and 'object_pairs_hook' not in kwargs and 'object_hook' not in kwargs:
+            # compacted as it is parsed, rather than after
+            kwargs['object_pairs_hook'] = configcompact.Compactor().mapping
+
+        cfgdict = self._load_cfgfile(lambda text: json.loads(text, **kwargs))
+
+        self._cfgdict = self._journal_replay(cfgdict)
 
         return(self._cfgdict)
 
@@ -109,8 +116,9 @@ class Config(config.Config):
         if 'sort_keys' not in kwargs:
             kwargs['sort_keys'] = True
 
-        with open(self._cfgfile, encoding=self._encoding, mode='w') as cp:
-            json.dump(self._cfgdict, cp, **kwargs)
+        self._write_cfgfile(lambda: self._rendered(lambda: json.dumps(configcompact.thaw(self._persisted(self._cfgdict)), **kwargs), kwargs))
+
+        self._journal_reset()
 
 
 #------------------------------------------------------------------------------
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configmsgpack
+
+This class sub-classes the abstract base class, **Config**, in the config module
+to provide MessagePack specific configuration read and write methods.
+
+MessagePack is a compact binary format; it suits machine generated configurations
+that people never edit by hand, since it is much faster to load and store than
+JSON or YAML text.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Application Specific 
+#------------------------------------------------------------------------------
+import config
+import configcompact
+
+#------------------------------------------------------------------------------
+# Third Party Dependencies
+#------------------------------------------------------------------------------
+# msgpack is imported on first use, by _msgpack(), rather than here, so that
+# importing this module stays cheap and does not require msgpack to be installed.
+_msgpack_module = None
+
+def _msgpack():
+    """
+    Returns the **msgpack** module, importing it on first use.
+    """
+    global _msgpack_module
+    if _msgpack_module is None:
+        try:
+            import msgpack
+        except ImportError as e:
+            raise ImportError("configmsgpack requires the msgpack package: pip install msgpack") from e
+        _msgpack_module = msgpack
+    return(_msgpack_module)
+
+#------------------------------------------------------------------------------
+class Config(config.Config):
+    """
+    Sub-class the base config.Config class and over-ride
+    its read() and write() methods to support MessagePack.
+
+    This class does not change any of the constructor parameters from the abstract base class  -- see `the config module API page`_ 
+    for a complete definition of each constructor parameter. The **encoding** parameter is accepted but not used, since the
+    **cfgfile** is binary.
+
+    The `msgpack package`_ is required; its C extension is used when it is available.
+
+    Class Attributes:
+
+    .. note:: Class Attributes are not an attribute of an *instance* of a class (ie, the object); they are an attribute of the class itself.
+
+    .. note:: The Class Attributes specified below over-ride the same Class Attributes defined in the abstract base class config.Config.
+
+    .. _the config module API page: config.html
+
+    .. _msgpack package: https://pypi.org/project/msgpack/
+
+    """
+
+    #: Default configuration file name, **cfgfile**, if none is specified during class instantiation
+    DEFAULT_CFG_FILE   = "config.msgpack"
+
+    #: Default configuration dictionary, **cfgdict**, if none is specified during class instantiation.
+    DEFAULT_CFG_DICT   = {}
+    
+    #: Default force parameter value, **force**, if none is specified during class instantiation.
+    DEFAULT_FORCE      = False
+
+    #: Default write_thru parameater value, **write_thru**, if none is specified during class instantiation.
+    DEFAULT_WRITE_THRU = False
+
+    #: Default configuration file text encoding, **encoding**, if none is specified during class instantiation.
+    DEFAULT_ENCODING   = 'utf-8'
+
+
+    def read(self, **kwargs):
+        """
+        Reads the **cfgfile** and stores the results in the configuration dictionary, **cfg**.
+        Any changes recorded in the **journalfile** are applied to the result.
+
+        The keyword arguments, **kwargs**, are passed to **msgpack.unpackb()**; by default
+        strings are decoded (raw=False) and map keys of any type are accepted (strict_map_key=False).
+
+        Returns: 
+
+            The configuration dictionary accessible by the **cfg** property.
+
+        """
+        kwargs.setdefault('raw', False)
+        kwargs.setdefault('strict_map_key', False)
+
+        cfgdict = self._read_cfgfile(lambda data: _msgpack().unpackb(data, **kwargs), binary=True)
+
+        self._cfgdict = self._journal_replay(cfgdict)
+
+        return(self._cfgdict)
+
+
+    def write(self, **kwargs):
+        """
+        Writes the configuration dictionary, **cfg**, to file system using the file name **cfgfile**.
+        The file will be in MessagePack format.
+
+        The keyword arguments, **kwargs**, are passed to **msgpack.packb()**; by default
+        bytes are stored using the binary type (use_bin_type=True).
+
+        Returns:
+
+            None
+
+        """
+        kwargs.setdefault('use_bin_type', True)
+
+        self._write_cfgfile(lambda: _msgpack().packb(configcompact.thaw(self._persisted(self._cfgdict)), **kwargs), binary=True)
+
+        self._journal_reset()
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__":  # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configmsgpack', verbosity=2)
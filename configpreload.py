@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configpreload
+
+Loading of configurations in a parent process before it forks its workers, so
+that the workers share the parent's copy of them.
+
+After a fork, parent and child share every memory page until one of them writes
+to it. Python's cyclic garbage collector writes to every container object it
+examines, so the first full collection in each worker copies every page holding
+part of a configuration, and a large configuration ends up held once per worker.
+**preload()** avoids this: it opens the configuration files, compact -- see the
+**compact** property of **config.Config** -- which leaves far fewer objects
+for anything to touch, and then moves every object in the process into the
+garbage collector's permanent generation with **gc.freeze()**, which the collector
+never examines::
+
+    configs = configpreload.preload(['app.yaml', 'routes.json'])
+    ...                                     # fork the workers
+    cfg = configpreload.preloaded('app.yaml').cfg
+
+Reading a configuration still changes the reference counts of the objects read,
+so the pages a worker actually reads are copied; the pages it does not read stay
+shared.
+
+Functions added with **add_post_fork_hook()** are called in each child process
+straight after a fork, with the dictionary of preloaded Config instances, to
+reopen files, sockets and the like that must not be shared with the parent.
+
+**memory_usage()** reports how much of a process's memory is shared, for checking
+that the pages stay shared; see also **benchmarks.prefork**.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import gc
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import config
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+# absolute cfgfile path --> preloaded Config instance
+_preloaded = {}
+
+# functions called in the child after a fork
+_post_fork_hooks = []
+
+_at_fork_registered = False
+
+#------------------------------------------------------------------------------
+def _after_fork_in_child():
+    configs = dict(_preloaded)
+    for hook in list(_post_fork_hooks):
+        hook(configs)
+
+def _register_at_fork():
+    global _at_fork_registered
+    if not _at_fork_registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+        _at_fork_registered = True
+
+#------------------------------------------------------------------------------
+def preload(cfgfiles, compact=True, freeze=True, **kwargs):
+    """
+    Opens each of the configuration files, **cfgfiles**, with **config.open()**
+    and keeps the instances for **preloaded()**.
+
+    Args:
+
+        **compact** - a boolean, passed on to the constructors; True holds each
+        configuration in its compact, read-only form
+
+        **freeze** - a boolean; if True the garbage collector is made to leave alone
+        every object allocated so far, see **freeze_heap()**
+
+        **kwargs** - further keyword arguments for the constructors
+
+    Returns:
+
+        A dictionary of the Config instances, by the absolute path of their **cfgfile**.
+
+    """
+    configs = {}
+    for cfgfile in cfgfiles:
+        c = config.open(cfgfile, compact=compact, **kwargs)
+        configs[c.cfgfile] = c
+    _preloaded.update(configs)
+    _register_at_fork()
+    if freeze:
+        freeze_heap()
+    return(configs)
+
+def freeze_heap():
+    """
+    Collects any garbage, then moves every remaining object into the garbage
+    collector's permanent generation, which it never examines. Best called once,
+    just before forking.
+    """
+    gc.collect()
+    gc.freeze()
+
+def preloaded(cfgfile=None):
+    """
+    Returns the Config instance preloaded for **cfgfile**, or, if **cfgfile** is
+    None, a dictionary of all of them by the absolute path of their **cfgfile**.
+
+    Raises:
+
+        KeyError if **cfgfile** has not been preloaded.
+
+    """
+    if cfgfile is None:
+        return(dict(_preloaded))
+    return(_preloaded[os.path.abspath(cfgfile)])
+
+def release():
+    """
+    Forgets the preloaded Config instances and returns the objects frozen by
+    **freeze_heap()** to the garbage collector.
+    """
+    _preloaded.clear()
+    gc.unfreeze()
+
+def add_post_fork_hook(hook):
+    """
+    Adds **hook**, a callable taking a dictionary of the preloaded Config instances
+    by the absolute path of their **cfgfile**, to the functions called in a child
+    process straight after a fork.
+    """
+    _post_fork_hooks.append(hook)
+    _register_at_fork()
+
+def remove_post_fork_hook(hook):
+    """
+    Removes **hook** from the functions called after a fork.
+    """
+    _post_fork_hooks.remove(hook)
+
+def memory_usage(pid=None):
+    """
+    Returns the memory of the process, **pid** (by default this process), as a
+    dictionary of byte counts: **rss**, the resident set size, **shared**, the part
+    of it shared with other processes, and **private**, the part that is not.
+    Linux only.
+
+    Raises:
+
+        OSError if the memory map of the process cannot be read.
+
+    """
+    usage = {'rss' : 0, 'shared' : 0, 'private' : 0}
+    fields = {'Rss:' : 'rss',
+              'Shared_Clean:' : 'shared', 'Shared_Dirty:' : 'shared',
+              'Private_Clean:' : 'private', 'Private_Dirty:' : 'private'}
+    pid  = os.getpid() if pid is None else pid
+    path = '/proc/%d/smaps_rollup' % pid
+    if not os.path.exists(path):
+        path = '/proc/%d/smaps' % pid
+    with open(path) as fp:
+        for line in fp:
+            parts = line.split()
+            if len(parts) == 3 and parts[0] in fields:
+                usage[fields[parts[0]]] += int(parts[1]) * 1024
+    return(usage)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configpreload', verbosity=2)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configquery
+
+Selectors, in the style of JSONPath and of file name globs, for finding values in
+a configuration without writing the loops by hand::
+
+    services.*.endpoints[*].timeout     the timeout of every endpoint of every service
+    services.web.port                   one value
+    services.*.tls*                     keys matching a glob, * and ? as in file names
+    **.timeout                          every timeout, at any depth -- also ..timeout
+    $.services['api.v2'].port           a key holding a '.', quoted
+    /services/web/port                  a JSON Pointer, with * and ** allowed as keys
+
+**compile()** turns a selector into a **Query**, once: later calls with the same
+selector return the same Query from a cache of the last **CACHE_SIZE** selectors.
+A Query is a small state machine over the keys of a path, and **Query.find()**
+walks a configuration with it, lazily, generating the (path, value) pairs of the
+values it selects, in document order, with the paths as JSON Pointers. Where the
+selector names keys, as in 'services.web.port', they are looked up rather than
+searched for, and only the branches that can still match are visited.
+
+**config.Config.select()** is the usual way to use it. A configuration that also
+keeps its values in a flattened path index, such as **configsqlite**, matches the
+selector against the paths of the index instead.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import re
+import fnmatch
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping, Sequence
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configjournal
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The number of compiled selectors kept by **compile()**.
+CACHE_SIZE = 256
+
+#: The kinds of **Step**: a key, a list index, a glob, any key, and any number of keys.
+KEY, INDEX, GLOB, ANY, DESCEND = 'key', 'index', 'glob', 'any', 'descend'
+
+#: One step of a selector: its **kind**, its **key**, for KEY and INDEX steps, or
+#: its pattern, for GLOB steps, and the **test** of a key against it.
+Step = namedtuple('Step', ('kind', 'key', 'test'))
+
+_SEGMENT = re.compile(r"""
+    (?P<dots>\.\.?)
+  | \[\s*(?:(?P<star>\*)|(?P<index>\d+)|'(?P<squote>(?:[^'\\]|\\.)*)'|"(?P<dquote>(?:[^"\\]|\\.)*)")\s*\]
+  | (?P<name>[^.\[\]]+)
+""", re.VERBOSE)
+
+_UNQUOTE = re.compile(r'\\(.)')
+
+_MISSING = object()
+
+# selector --> Query, least recently used first
+_queries = OrderedDict()
+
+#------------------------------------------------------------------------------
+class ConfigQueryException(Exception):
+    """
+    Custom exception raised for a selector that cannot be parsed.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+def _any(key):
+    return(True)
+
+def _name_step(name):
+    # a key named in a selector: *, **, a glob or the key itself
+    if name == '**':
+        return(Step(DESCEND, None, _any))
+    if name == '*':
+        return(Step(ANY, None, _any))
+    if '*' in name or '?' in name:
+        match = re.compile(fnmatch.translate(name)).match
+        return(Step(GLOB, name, lambda key: type(key) is not bool and match(str(key)) is not None))
+    # list indices and YAML's integer keys are matched by their digits
+    return(Step(KEY, name, lambda key: key == name or (type(key) is int and str(key) == name)))
+
+def _index_step(n):
+    text = str(n)
+    return(Step(INDEX, n, lambda key: (key == n and type(key) is not bool) or key == text))
+
+def parse(selector):
+    """
+    Returns the list of **Step**s of the string, **selector**.
+
+    Raises:
+
+        ConfigQueryException if it is not a valid selector.
+
+    """
+    if not isinstance(selector, str):
+        raise ConfigQueryException("A selector must be a string, not %r" % (selector,))
+    if selector.startswith('/'):
+        return([_name_step(k) for k in configjournal.split(selector)])
+
+    steps, pos, name_ok = [], 0, True
+    text = selector[1:] if selector.startswith('$') else selector
+    if text.startswith('.') and not text.startswith('..'):
+        text = text[1:]
+    while pos < len(text):
+        m = _SEGMENT.match(text, pos)
+        if m is None or (m.group('name') is not None and not name_ok):
+            raise ConfigQueryException("Invalid selector %r at position %d" % (selector, len(selector) - len(text) + pos))
+        pos = m.end()
+        if m.group('dots') is not None:
+            if m.group('dots') == '..':
+                steps.append(Step(DESCEND, None, _any))
+            if pos == len(text) or text[pos] == '.':
+                raise ConfigQueryException("Invalid selector %r: a key must follow '%s'" % (selector, m.group('dots')))
+            name_ok = True
+            continue
+        if m.group('name') is not None:
+            steps.append(_name_step(m.group('name')))
+        elif m.group('star') is not None:
+            steps.append(Step(ANY, None, _any))
+        elif m.group('index') is not None:
+            steps.append(_index_step(int(m.group('index'))))
+        else:
+            quoted = m.group('squote') if m.group('squote') is not None else m.group('dquote')
+            name = _UNQUOTE.sub(r'\1', quoted)
+            steps.append(Step(KEY, name, lambda key, name=name: key == name))
+        name_ok = False
+    return(steps)
+
+def compile(selector):
+    """
+    Returns the **Query** of the string, **selector**, compiled once and then kept
+    in a cache of the last **CACHE_SIZE** selectors.
+
+    Raises:
+
+        ConfigQueryException if it is not a valid selector.
+
+    """
+    query = _queries.get(selector)
+    if query is None:
+        query = Query(selector)
+        _queries[selector] = query
+        if len(_queries) > CACHE_SIZE:
+            _queries.popitem(last=False)
+    else:
+        _queries.move_to_end(selector)
+    return(query)
+
+def find(selector, tree):
+    """
+    Generates the (path, value) pairs of the values of **tree** selected by
+    **selector** -- see **Query.find()**.
+    """
+    return(compile(selector).find(tree))
+
+#------------------------------------------------------------------------------
+class Query(object):
+    """
+    The compiled form of the string, **selector**: a non-deterministic automaton
+    whose states are the positions in its list of **steps**, reached by the keys of
+    a path. A path is selected when, after its last key, the position past the
+    last step is among its states.
+    """
+    def __init__(self, selector):
+        self.selector = selector
+        self.steps    = parse(selector)
+        self.final    = len(self.steps)
+
+        # the states a position stands for: a DESCEND step can also match no key
+        self._closure = [None] * (self.final + 1)
+        self._closure[self.final] = frozenset((self.final,))
+        for i in range(self.final - 1, -1, -1):
+            tail = self._closure[i + 1] if self.steps[i].kind == DESCEND else ()
+            self._closure[i] = frozenset((i,)).union(tail)
+        self.start = self._closure[0]
+
+        #: The keys named by the leading steps, which every selected path starts with.
+        self.prefix = []
+        for step in self.steps:
+            if step.kind != KEY:
+                break
+            self.prefix.append(step.key)
+        self.prefix = tuple(self.prefix)
+
+        # states --> how to visit the children of a value in those states
+        self._plans = {}
+
+    def __repr__(self):
+        return("%s(%r)" % (self.__class__.__name__, self.selector))
+
+    def advance(self, states, key):
+        """
+        Returns the states reached from **states** by the key, **key**; an empty set
+        if no path going through it can be selected.
+        """
+        reached = set()
+        for i in states:
+            if i == self.final:
+                continue
+            step = self.steps[i]
+            if step.kind == DESCEND:
+                reached.update(self._closure[i])
+            elif step.test(key):
+                reached.update(self._closure[i + 1])
+        return(frozenset(reached))
+
+    def accepts(self, states):
+        """
+        Returns True if a path that reached **states** is selected.
+        """
+        return(self.final in states)
+
+    def match(self, keys):
+        """
+        Returns True if the path, **keys**, a sequence of keys, is selected.
+        """
+        states = self.start
+        for key in keys:
+            states = self.advance(states, key)
+            if not states:
+                return(False)
+        return(self.final in states)
+
+    def _plan(self, states):
+        # how to visit the children of a value in states, worked out once:
+        #   ('lookup', keys)   the steps still to match all name keys, which are looked up
+        #   ('any', reached)   any key reaches the same states
+        #   ('map', (reached by key, reached by any other key))   no glob is pending
+        #   ('test', None)     each key is tested
+        # and None when no child can be selected
+        plan = self._plans.get(states, _MISSING)
+        if plan is _MISSING:
+            pending = [self.steps[i] for i in states if i != self.final]
+            if not pending:
+                plan = None
+            elif all(step.kind in (KEY, INDEX) for step in pending):
+                keys = OrderedDict.fromkeys(step.key for step in pending)
+                plan = ('lookup', tuple((k,) + self._lookup_keys(k) + (self.advance(states, k),) for k in keys))
+            elif all(step.kind in (ANY, DESCEND) for step in pending):
+                plan = ('any', self.advance(states, None))
+            elif all(step.kind != GLOB for step in pending):
+                by_key = {}
+                for step in pending:
+                    if step.kind in (KEY, INDEX):
+                        candidates, index = self._lookup_keys(step.key)
+                        for k in candidates:
+                            by_key[k] = self.advance(states, k)
+                # a key that no step names, as the selector cannot hold one
+                plan = ('map', (by_key, self.advance(states, _MISSING)))
+            else:
+                plan = ('test', None)
+            self._plans[states] = plan
+        return(plan)
+
+    @staticmethod
+    def _lookup_keys(key):
+        # the keys a dictionary may hold key under, and the index a list may hold it at
+        if isinstance(key, int):
+            return((key, str(key)), key)
+        if key.isdigit():
+            return((key, int(key)), int(key))
+        return((key,), None)
+
+    def walk(self, node, path='', states=None):
+        """
+        Generates the (path, value) pairs of the values at or under **node**, found at
+        **path**, a JSON Pointer string, that are selected, given the **states** reached
+        by **path** -- by default, those of the empty path.
+        """
+        final, plans = self.final, self._plans
+        stack = [(path, node, self.start if states is None else states)]
+        while stack:
+            path, node, states = stack.pop()
+            if final in states:
+                yield((path, node))
+            plan = plans.get(states, _MISSING)
+            if plan is _MISSING:
+                plan = self._plan(states)
+            if plan is None:
+                continue
+            kind, data = plan
+
+            children = []
+            if type(node) is dict or isinstance(node, Mapping):
+                if kind == 'lookup':
+                    for key, candidates, _, reached in data:
+                        for k in candidates:
+                            v = node.get(k, _MISSING)
+                            if v is not _MISSING:
+                                children.append((k, v, reached))
+                                break
+                else:
+                    items = node.items()
+            elif type(node) is list or (isinstance(node, Sequence) and not isinstance(node, (str, bytes))):
+                if kind == 'lookup':
+                    size = len(node)
+                    children = [(i, node[i], reached) for _, _, i, reached in data if i is not None and i < size]
+                else:
+                    items = enumerate(node)
+            else:
+                continue
+
+            if kind == 'any':
+                children = [(k, v, data) for k, v in items]
+            elif kind == 'map':
+                by_key, other = data
+                for k, v in items:
+                    reached = by_key.get(k, other) if type(k) is not bool else other
+                    if reached:
+                        children.append((k, v, reached))
+            elif kind == 'test':
+                for k, v in items:
+                    reached = self.advance(states, k)
+                    if reached:
+                        children.append((k, v, reached))
+
+            # pushed in reverse, to come off the stack in document order
+            for k, v, reached in reversed(children):
+                k = k if type(k) is str else str(k)
+                p = path + '/' + k if '~' not in k and '/' not in k else path + configjournal.pointer((k,))
+                stack.append((p, v, reached))
+
+    def find(self, tree):
+        """
+        Generates the (path, value) pairs of the values of **tree**, a configuration
+        dictionary or any part of it, that are selected, one at a time, in document
+        order, with the path as a JSON Pointer string. A value is generated before
+        any value under it that is selected too.
+
+        **tree** must not be changed while the generator is in use.
+        """
+        return(self.walk(tree))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configquery', verbosity=2)
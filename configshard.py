@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configshard
+
+A configuration kept as a directory of files, one per top-level section, rather
+than as one file::
+
+    config.d/
+        Logging.json            {"level" : "INFO", "handlers" : ["console"]}
+        Database.yaml           host: localhost
+        ...
+
+**configshard.Config** presents the directory as one **cfg** dictionary, keyed by
+the section names, the file names without their extensions; files without an
+extension, or of no format **config.detect_format()** knows, are left alone::
+
+    c = configshard.Config(cfgfile='config.d')
+    c.cfg['Logging']['level'] = 'DEBUG'
+    c.write()                               # rewrites Logging.json, and nothing else
+
+**read()** only lists the directory: the **cfg** it returns is a **ShardDict**,
+which parses a section's file the first time the section is fetched, so opening
+a configuration of hundreds of sections costs nothing until they are used, and
+then only for those used. **write()** rewrites the files of the sections that
+changed since they were read or last written, and removes those of the sections
+deleted.
+
+Each file is read and written by the Config sub-class of its own format, see
+**config.open()**, so a directory may mix formats; new sections are written in
+the format given to the constructor, by default **DEFAULT_FORMAT**.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+from collections.abc import Mapping, ItemsView, ValuesView
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import config
+import configsnapshot
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The format of new section files, if none is specified during class instantiation.
+DEFAULT_FORMAT = 'json'
+
+# the value of a section whose file has not been parsed yet
+_UNLOADED = object()
+
+#------------------------------------------------------------------------------
+class ConfigShardException(Exception):
+    """
+    Custom exception raised when a directory holds two files for one section, or
+    a section cannot be kept in a file of its own: its name is not a file name, or
+    its value is not a dictionary.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+class ShardDict(dict):
+    """
+    A dictionary of the sections **names**, whose values are fetched with
+    **load(name)** the first time they are fetched from it.
+
+    Iterating over its keys, testing for one, or counting them does not load
+    anything; fetching a value does, whether by key, with **get()**, **items()**
+    or **values()**, or by copying it into another dictionary.
+    """
+    __slots__ = ('_load',)
+
+    def __init__(self, names=(), load=None):
+        dict.__init__(self, dict.fromkeys(names, _UNLOADED))
+        self._load = load
+
+    def _value(self, key, value):
+        if value is _UNLOADED:
+            value = self._load(key)
+            dict.__setitem__(self, key, value)
+        return(value)
+
+    def __getitem__(self, key):
+        return(self._value(key, dict.__getitem__(self, key)))
+
+    def __iter__(self):
+        # defined, so that dict(), update() and ** fetch values through __getitem__
+        return(dict.__iter__(self))
+
+    def get(self, key, default=None):
+        if key in self:
+            return(self[key])
+        return(default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return(self[key])
+        self[key] = default
+        return(default)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return(value)
+        return(dict.pop(self, key, *default))
+
+    def popitem(self):
+        key = next(reversed(self))
+        return((key, self.pop(key)))
+
+    def items(self):
+        return(ItemsView(self))
+
+    def values(self):
+        return(ValuesView(self))
+
+    def copy(self):
+        # a ShardDict too, which loads what this one has not loaded yet when it is fetched
+        other = ShardDict((), self._load)
+        dict.update(other, dict.items(self))
+        return(other)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return(NotImplemented)
+        return(dict(self.items()) == dict(other.items()))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return(result if result is NotImplemented else not result)
+
+    __hash__ = None
+
+    def __or__(self, other):
+        return(dict(self.items()) | other)
+
+    def __repr__(self):
+        return('{%s}' % ', '.join('%r: %s' % (k, '...' if v is _UNLOADED else repr(v)) for k, v in dict.items(self)))
+
+    def __reduce__(self):
+        # copied and pickled as a plain dictionary of every section
+        return((dict, (), None, None, iter(self.items())))
+
+    def loaded(self, key):
+        """
+        Returns True if the section **key** has been loaded.
+        """
+        return(dict.__getitem__(self, key) is not _UNLOADED)
+
+    def loaded_items(self):
+        """
+        Returns a list of the (name, value) pairs of the sections loaded so far.
+        """
+        return([(k, v) for k, v in dict.items(self) if v is not _UNLOADED])
+
+#------------------------------------------------------------------------------
+def _check_section(name, value):
+    if not isinstance(name, str) or not name or name.startswith('.') or '/' in name or os.sep in name:
+        raise ConfigShardException("The section name %r cannot be a file name!" % (name,))
+    if not isinstance(value, Mapping):
+        raise ConfigShardException("The section '%s' must be a dictionary to have a file of its own, not %s!"
+                                   % (name, type(value).__name__))
+
+#------------------------------------------------------------------------------
+class Config(config.Config):
+    """
+    Sub-class the base config.Config class and over-ride its read() and write()
+    methods to keep each top-level section of the configuration in a file of its
+    own, in the directory named by the **cfgfile**.
+
+    Besides the constructor parameters of the abstract base class -- see
+    `the config module API page`_ -- it takes:
+
+        **format** - the registered name of the format of new section files, by
+        default **DEFAULT_FORMAT**; see **config.register_format()**
+
+    Every top-level value must be a dictionary, as it is written as a file of its
+    own, and every top-level key must be usable as a file name.
+
+    The **compact** and **encoding** parameters apply to each section file; the
+    **journal** is not used, since **write()** already rewrites only what changed.
+    When **stats** are kept, they count a read for each section loaded and a
+    write for each section written, and pass the section name to the hooks.
+
+    .. _the config module API page: config.html
+
+    """
+
+    #: Default configuration directory name, **cfgfile**, if none is specified during class instantiation
+    DEFAULT_CFG_FILE   = "config.d"
+
+    #: Default configuration dictionary, **cfgdict**, if none is specified during class instantiation.
+    DEFAULT_CFG_DICT   = {}
+
+
+    def __init__(self, cfgdict=None, cfgfile=None, encoding=None, force=None, write_thru=None, compact=None,
+                 format=None):
+        self._format  = format if isinstance(format, str) else DEFAULT_FORMAT
+        self._extension = config.format_extensions(self._format)[0]
+        # section name --> path of its file
+        self._files   = {}
+        # section name --> the Config of its file
+        self._shards  = {}
+        # section name --> snapshot of the section as it is in its file
+        self._written = {}
+
+        super().__init__(cfgdict, cfgfile, encoding, force, write_thru, compact)
+
+    def _initCfg(self):
+        """
+        Loads the sections in the **cfgfile** directory or, if **force** is True or the
+        directory does not exist yet, stores the configuration passed to the constructor.
+        """
+        if os.path.exists(self._cfgfile) and not os.path.isdir(self._cfgfile):
+            raise ConfigShardException("'%s' names a file! It should be a directory. Please remove it or change config file name, and try again."
+                                       % self._cfgfile)
+        if self._force or not os.path.exists(self._cfgfile):
+            if os.path.isdir(self._cfgfile):
+                self._files = self._scan()
+            self.write()
+        else:
+            self.read()
+
+    #--------------------------------------------------------------------------
+    def _scan(self):
+        # section name --> path, for each configuration file in the directory
+        files = {}
+        for entry in sorted(os.listdir(self._cfgfile)):
+            path = os.path.join(self._cfgfile, entry)
+            name, ext = os.path.splitext(config.strip_compression(entry))
+            if entry.startswith('.') or not ext or not os.path.isfile(path):
+                continue
+            try:
+                config.detect_format(path)
+            except config.ConfigFormatException:
+                continue
+            if name in files:
+                raise ConfigShardException("Both '%s' and '%s' hold the section '%s'!"
+                                           % (os.path.basename(files[name]), entry, name))
+            files[name] = path
+        return(files)
+
+    def _count(self, event, name):
+        # the section Configs record their own events in the process wide stats
+        if self._stats is not None:
+            self._stats.record(event, self, section=name, bytes=os.path.getsize(self._files[name]))
+
+    def _load_shard(self, name):
+        # the value of the section name, parsed from its file
+        shard = config.open(self._files[name], encoding=self._encoding, compact=self._compact)
+        self._shards[name]  = shard
+        self._written[name] = shard.snapshot()
+        self._count('read', name)
+        return(shard.cfg)
+
+    def _write_shard(self, name, value):
+        # writes the section name to its file, unless it is unchanged
+        _check_section(name, value)
+        written  = self._written.get(name)
+        snapshot = configsnapshot.freeze(value, written)
+        if snapshot is written and name in self._files:
+            return
+        value = value if isinstance(value, dict) else configsnapshot.thaw(value)
+        shard = self._shards.get(name)
+        if shard is None:
+            path = self._files.get(name) or os.path.join(self._cfgfile, name + self._extension)
+            fmt  = config.detect_format(path) if os.path.exists(path) else self._format
+            # written by the constructor
+            shard = config.format_class(fmt)(value, cfgfile=path, encoding=self._encoding, force=True)
+            self._shards[name] = shard
+            self._files[name]  = shard.cfgfile
+            shard.cfg = value
+        else:
+            shard.cfg = value
+            shard.write()
+        self._written[name] = snapshot
+        self._count('write', name)
+
+    #--------------------------------------------------------------------------
+    def read(self):
+        """
+        Lists the section files in the **cfgfile** directory; each is parsed when its
+        section is first fetched from the result.
+
+        Returns:
+
+            The configuration dictionary accessible by the **cfg** property, a **ShardDict**.
+
+        Raises:
+
+            ConfigShardException if two files hold the same section.
+
+        """
+        self._files   = self._scan()
+        self._shards  = {}
+        self._written = {}
+        self._cfgdict = ShardDict(self._files, self._load_shard)
+        return(self._cfgdict)
+
+    def write(self):
+        """
+        Writes the sections of the configuration dictionary, **cfg**, that have changed
+        since they were read or last written, each to its own file in the **cfgfile**
+        directory, and removes the files of the sections no longer in **cfg**. Sections
+        that were never loaded are not even looked at.
+
+        Returns:
+
+            None
+
+        Raises:
+
+            ConfigShardException if a section name cannot be a file name or a section
+            is not a dictionary.
+
+        """
+        os.makedirs(self._cfgfile, exist_ok=True)
+        cfgdict = self._cfgdict
+        for name in [n for n in self._files if n not in cfgdict]:
+            os.remove(self._files.pop(name))
+            self._shards.pop(name, None)
+            self._written.pop(name, None)
+
+        if isinstance(cfgdict, ShardDict):
+            sections = cfgdict.loaded_items()
+        else:
+            sections = cfgdict.items()
+        for name, value in sections:
+            self._write_shard(name, value)
+
+    @property
+    def format(self):
+        """
+        Property
+
+        **format** - a string
+
+        The registered name of the format new section files are written in.
+        """
+        return(self._format)
+
+    @property
+    def files(self):
+        """
+        Property
+
+        **files** - a dictionary
+
+        The path of the file of each section, by section name, as of the last
+        **read()** or **write()**.
+        """
+        return(dict(self._files))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configshard', verbosity=2)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configshm
+
+Publication of a configuration to other processes on the same host through
+shared memory, so that a configuration is read and parsed once per host rather
+than once per worker process.
+
+One process owns the **Config** and publishes it; a **Publisher** serializes a
+**snapshot()** of it into a shared memory segment::
+
+    c = configyaml.Config(cfgfile='app.yaml')
+    publisher = configshm.Publisher(c, name='app-config')
+    ...
+    c.read()
+    publisher.publish()             # after each change
+
+Worker processes attach a **Subscriber** to the segment by its name::
+
+    subscriber = configshm.Subscriber('app-config')
+    level = subscriber.cfg['Logging']['level']
+
+The segment holds a version counter ahead of the serialized snapshot. A
+subscriber decodes the snapshot only when the counter has moved since it last
+looked, so reading **cfg** between publications costs a comparison of two
+integers. The counter is also a sequence lock: it is odd while a publication is
+being written, and a subscriber that finds it odd, or changed by the time it
+has copied the snapshot, tries again.
+
+The snapshot is a **configsnapshot.FrozenDict**, so subscribers cannot change
+it. It is serialized with pickle, which a subscriber trusts as it trusts the
+publisher: the segment can only be written by the user that created it, and a
+subscriber maps it read-only, so a subscriber cannot change what the others
+read. Decoding a pickle is far faster than parsing YAML, but each subscriber
+still holds its own decoded copy; only the serialized form is held once.
+
+A segment's size is fixed when it is created, by default to **HEADROOM** times
+the size of the first publication; a later publication that does not fit raises
+a ValueError.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import sys
+import mmap
+import time
+import pickle
+import struct
+import threading
+from multiprocessing import shared_memory, resource_tracker
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Identifies a segment written by a **Publisher**.
+MAGIC = b'CFGSHM01'
+
+#: A new segment is made this many times larger than the first publication...
+HEADROOM = 4
+
+#: ...and at least this large, in bytes.
+MIN_SIZE = 1 << 16
+
+# magic, sequence counter, length of the snapshot; the snapshot follows
+_HEADER = struct.Struct('<8sQQ')
+_SEQ    = struct.Struct('<Q')
+_SEQ_OFFSET = 8
+
+_attach_lock = threading.Lock()
+
+#------------------------------------------------------------------------------
+class _ReadOnlySegment(object):
+    # a shared memory segment opened and mapped read-only, where
+    # shared_memory.SharedMemory always maps it for writing too
+
+    def __init__(self, name):
+        import _posixshmem
+        fd = _posixshmem.shm_open('/' + name, os.O_RDONLY, mode=0o600)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.name = name
+        self.buf  = memoryview(self._mmap)
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+            self._mmap.close()
+
+def _attach(name):
+    if os.name == 'posix':
+        return(_ReadOnlySegment(name))
+    # Elsewhere, the segment is attached as the publisher created it. Before
+    # Python 3.13 a process attaching a segment registers it with its resource
+    # tracker, which destroys the segment when that process exits -- or
+    # complains, if the publisher shares the tracker and destroys it first.
+    if sys.version_info >= (3, 13):
+        return(shared_memory.SharedMemory(name, track=False))
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return(shared_memory.SharedMemory(name))
+        finally:
+            resource_tracker.register = register
+
+#------------------------------------------------------------------------------
+class Publisher(object):
+    """
+    Publishes snapshots of a Config instance in a shared memory segment, starting
+    with one of its current state.
+
+    Args:
+
+        **config** - a config.Config instance
+
+        **name** - the name of the segment to create, or None for a generated name
+
+        **size** - the size of the segment in bytes, or None for **HEADROOM** times
+        the size of the first publication
+
+    """
+    def __init__(self, config, name=None, size=None):
+        self._config    = config
+        self._seq       = 0
+        self._published = None
+
+        snapshot, payload = self._serialize()
+        if size is None:
+            size = max(MIN_SIZE, HEADROOM * (_HEADER.size + len(payload)))
+        self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        _HEADER.pack_into(self._shm.buf, 0, MAGIC, 0, 0)
+        try:
+            self._write(snapshot, payload)
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _serialize(self):
+        snapshot = self._config.snapshot()
+        if snapshot is self._published:
+            return(snapshot, None)
+        return(snapshot, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _write(self, snapshot, payload):
+        buf = self._shm.buf
+        end = _HEADER.size + len(payload)
+        if end > len(buf):
+            raise ValueError("Configuration of %d bytes does not fit in shared memory segment %s of %d bytes"
+                             % (len(payload), self.name, len(buf) - _HEADER.size))
+        # odd while the snapshot is being written
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq + 1)
+        buf[_HEADER.size:end] = payload
+        _HEADER.pack_into(buf, 0, MAGIC, self._seq + 1, len(payload))
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq + 2)
+        self._seq += 2
+        self._published = snapshot
+        if self._config._instrumented():
+            self._config._record('publish', bytes=len(payload))
+
+    def publish(self):
+        """
+        Publishes a snapshot of the configuration if it has changed since the last
+        publication.
+
+        Returns:
+
+            True if a new snapshot was published, False if the configuration had not changed.
+
+        Raises:
+
+            ValueError if the snapshot does not fit in the segment.
+
+        """
+        snapshot, payload = self._serialize()
+        if payload is None:
+            return(False)
+        self._write(snapshot, payload)
+        return(True)
+
+    def close(self, unlink=True):
+        """
+        Detaches from the segment and, if **unlink** is True, destroys it. Subscribers
+        already attached keep the last snapshot they decoded.
+        """
+        if self._shm is None:
+            return
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+    @property
+    def name(self):
+        """
+        Property
+
+        **name** - the name of the shared memory segment, for Subscribers to attach to
+        """
+        return(self._shm.name)
+
+    @property
+    def version(self):
+        """
+        Property
+
+        **version** - the number of snapshots published, starting with 1 for the
+        one published when the Publisher was created
+        """
+        return(self._seq // 2)
+
+#------------------------------------------------------------------------------
+class Subscriber(object):
+    """
+    Reads the snapshots published in a shared memory segment by a **Publisher**.
+
+    Args:
+
+        **name** - the name of the segment
+
+        **timeout** - the number of seconds to keep trying, while a publication
+        is being written, before raising a TimeoutError
+
+    Raises:
+
+        FileNotFoundError if there is no segment called **name**.
+
+        ValueError if the segment was not created by a Publisher.
+
+    """
+    def __init__(self, name, timeout=1.0):
+        self.timeout  = timeout
+        self._seen    = 0
+        self._cfg     = None
+        self._shm     = _attach(name)
+        if bytes(self._shm.buf[:len(MAGIC)]) != MAGIC:
+            self._shm.close()
+            raise ValueError("Shared memory segment %s does not hold a published configuration" % name)
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _sequence(self):
+        return(_SEQ.unpack_from(self._shm.buf, _SEQ_OFFSET)[0])
+
+    def _refresh(self):
+        seq = self._sequence()
+        if seq == self._seen:
+            return
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if not seq & 1:
+                length  = _HEADER.unpack_from(self._shm.buf, 0)[2]
+                payload = bytes(self._shm.buf[_HEADER.size:_HEADER.size + length])
+                if self._sequence() == seq:
+                    break
+            if time.monotonic() > deadline:
+                raise TimeoutError("Shared memory segment %s is still being written" % self.name)
+            time.sleep(0)
+            seq = self._sequence()
+        self._cfg  = pickle.loads(payload)
+        self._seen = seq
+
+    def close(self):
+        """
+        Detaches from the segment. The last snapshot decoded is still available
+        from **cfg**.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    @property
+    def name(self):
+        """
+        Property
+
+        **name** - the name of the shared memory segment
+        """
+        return(self._shm.name)
+
+    @property
+    def version(self):
+        """
+        Property
+
+        **version** - the number of snapshots published in the segment; reading it
+        does not decode anything
+        """
+        return(self._sequence() // 2)
+
+    @property
+    def changed(self):
+        """
+        Property
+
+        **changed** - a boolean, True if a snapshot has been published since **cfg**
+        was last read
+        """
+        return(self._sequence() != self._seen)
+
+    @property
+    def cfg(self):
+        """
+        Property
+
+        **cfg** - the latest published snapshot, a configsnapshot.FrozenDict; decoded
+        only if the version has moved since it was last read
+        """
+        if self._shm is not None:
+            self._refresh()
+        return(self._cfg)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configshm', verbosity=2)
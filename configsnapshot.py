@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configsnapshot
+
+Immutable snapshots of a configuration dictionary.
+
+A snapshot is built from **FrozenDict** mappings, tuples and frozensets, so it
+cannot be changed by its readers and may be handed to other threads without
+copying or locking.
+
+When a snapshot is taken with a **previous** snapshot, every sub-tree that is
+unchanged since the previous snapshot is shared with it rather than copied; only
+the sections that actually changed (and the mappings on the path leading to them)
+are allocated. So after a small edit the new snapshot allocates memory proportional
+to the edit, and unchanged sections compare by identity::
+
+    s1 = configsnapshot.freeze(cfg)
+    cfg['Logging']['level'] = 'INFO'
+    s2 = configsnapshot.freeze(cfg, s1)
+    s2['Application'] is s1['Application']    # True
+
+Finding what changed still takes time proportional to the size of the whole
+configuration, though: **freeze()** visits and compares every value, as nothing
+records which sections were edited in place.
+
+The **config.Config.snapshot()** method is the usual way to take a snapshot.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configcow
+
+#------------------------------------------------------------------------------
+_MISSING = object()
+
+#------------------------------------------------------------------------------
+class FrozenDict(Mapping):
+    """
+    An immutable, hashable mapping.
+
+    Supports all of the read-only dictionary methods, but not item assignment.
+    Use **thaw()** to obtain a mutable copy.
+    """
+    __slots__ = ('_d', '_hash')
+
+    def __init__(self, *args, **kwargs):
+        self._d    = dict(*args, **kwargs)
+        self._hash = None
+
+    @classmethod
+    def _wrap(cls, d):
+        # takes ownership of d without copying it
+        self = cls.__new__(cls)
+        self._d    = d
+        self._hash = None
+        return(self)
+
+    def __getitem__(self, key):
+        return(self._d[key])
+
+    def __iter__(self):
+        return(iter(self._d))
+
+    def __len__(self):
+        return(len(self._d))
+
+    def __contains__(self, key):
+        return(key in self._d)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenDict):
+            return(self is other or self._d == other._d)
+        return(self._d == other)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._d.items()))
+        return(self._hash)
+
+    def __repr__(self):
+        return("%s(%r)" % (type(self).__name__, self._d))
+
+    def __copy__(self):
+        return(self)
+
+    def __deepcopy__(self, memo):
+        return(self)
+
+    def __reduce__(self):
+        return(type(self), (self._d,))
+
+#------------------------------------------------------------------------------
+def _same_scalar(value, previous):
+    return(type(value) is type(previous) and value == previous)
+
+def freeze(value, previous=None):
+    """
+    Returns an immutable copy of **value**: dictionaries become **FrozenDict**,
+    lists and tuples become tuples and sets become frozensets.
+
+    If **previous** is a snapshot of an earlier state of **value**, any part of it
+    that is still equal to **value** is re-used as is, and only the changed parts
+    are allocated. Either way every value of **value** is visited.
+    """
+    # while everything matches previous, nothing is allocated; the new container
+    # is started, with the values shared so far, at the first difference
+    if isinstance(value, Mapping) and not isinstance(value, FrozenDict):
+        prev  = previous if isinstance(previous, FrozenDict) else None
+        items = None if prev is not None and len(prev) == len(value) else {}
+        # a CowDict's items() would copy the sections it shares, to be safe to change
+        items_of = value.shared_items if type(value) is configcow.CowDict else value.items
+        for k, v in items_of():
+            p = prev._d.get(k, _MISSING) if prev is not None else _MISSING
+            f = freeze(v, None if p is _MISSING else p)
+            if items is None:
+                if f is p:
+                    continue
+                items = {}
+                for key in value.keys():
+                    if key == k:
+                        break
+                    items[key] = prev._d[key]
+            items[k] = f
+        return(prev if items is None else FrozenDict._wrap(items))
+
+    if isinstance(value, (list, tuple)):
+        prev  = previous if isinstance(previous, tuple) else None
+        items = None if prev is not None and len(prev) == len(value) else []
+        for i, v in enumerate(value):
+            p = prev[i] if prev is not None and i < len(prev) else None
+            f = freeze(v, p)
+            if items is None:
+                if f is p:
+                    continue
+                items = list(prev[:i])
+            items.append(f)
+        return(prev if items is None else tuple(items))
+
+    if isinstance(value, (set, frozenset)):
+        if isinstance(previous, frozenset) and previous == value:
+            return(previous)
+        return(frozenset(value))
+
+    if previous is not None and _same_scalar(value, previous):
+        return(previous)
+    return(value)
+
+def thaw(value):
+    """
+    Returns a mutable, deep copy of the snapshot, **value**, made of dictionaries and lists.
+    """
+    if isinstance(value, Mapping):
+        return({k : thaw(v) for k, v in value.items()})
+    if isinstance(value, tuple):
+        return([thaw(v) for v in value])
+    if isinstance(value, frozenset):
+        return(set(value))
+    return(value)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configsnapshot', verbosity=2)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configsplice
+
+Incremental re-writing of round-trip (typ='rt') YAML documents.
+
+A **Splicer** is given the text of a YAML document and the CommentedMap loaded
+from it. Asked to **render()** the CommentedMap after it has been edited, it works
+out which entries changed since the text was loaded and re-renders only those,
+splicing the new text into the old. Everything else -- comments, blank lines,
+quoting, indentation -- stays byte for byte as it was, and the cost of a render
+follows the size of the edit rather than the size of the document.
+
+Edits are applied as follows:
+
+    * a changed scalar written on the same line as its key has just its value
+      replaced, leaving any comment after it alone
+    * any other changed, or removed, entry -- a key and everything below it, up to
+      the next key of its mapping -- is re-rendered, or deleted, as a whole
+    * a new key is rendered at the end of its mapping
+
+The comment and blank lines that end an entry, ahead of the next key, are left
+where they are: they usually introduce what follows rather than belong to the entry.
+
+Line and column positions come from the ruamel.yaml round-trip loader. The
+**Splicer** keeps track of the regions it has re-rendered, so later edits
+inside one of them re-render that region again.
+
+A change inside a mapping that was replaced by a new dictionary, or inside a flow
+style mapping, re-renders the entry holding that mapping. If the edit cannot be
+spliced at all -- the whole document was replaced -- **render()** returns None
+and the caller must dump the whole document.
+
+The **configyaml.Config.incremental** property is the usual way to use it.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import io
+import re
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import configsnapshot
+import configjournal
+
+#------------------------------------------------------------------------------
+_PLAIN_SCALAR = re.compile(r'(.*?)(\s+#.*)?$')
+
+class _Unspliceable(Exception):
+    pass
+
+#------------------------------------------------------------------------------
+class _Region(object):
+    """
+    An entry that has been re-rendered: it spanned the original lines [start, end)
+    and now spans **length** lines. Regions inserted at the same original line are
+    ordered deepest first, then by **seq**. **trail** holds the comment and blank lines that followed
+    the entry.
+    """
+    __slots__ = ('start', 'end', 'length', 'col', 'seq', 'trail')
+
+    def __init__(self, start, end, length, col, seq, trail):
+        self.start  = start
+        self.end    = end
+        self.length = length
+        self.col    = col
+        self.seq    = seq
+        self.trail  = trail
+
+    @property
+    def delta(self):
+        return(self.length - (self.end - self.start))
+
+#------------------------------------------------------------------------------
+class Splicer(object):
+    """
+    Re-renders the parts of a round-trip YAML document that have changed.
+
+    Args:
+
+        **yaml** - the ruamel.yaml YAML instance, typ='rt', used to render changed entries
+
+        **text** - the text of the document
+
+        **cfgdict** - the CommentedMap loaded from **text** by **yaml**
+
+    """
+    def __init__(self, yaml, text, cfgdict):
+        self.yaml     = yaml
+        self.lines    = text.splitlines(keepends=True)
+        self.original = tuple(self.lines)
+        self.base     = configsnapshot.freeze(cfgdict)
+        self._length  = len(self.lines)
+        self._regions = {}
+        self._seq     = 0
+
+    #--------------------------------------------------------------------------
+    # Positions
+    #--------------------------------------------------------------------------
+    def _is_under(self, keys, ancestor):
+        return(len(keys) > len(ancestor) and keys[:len(ancestor)] == ancestor)
+
+    def _current_line(self, line, keys=None, seq=None):
+        """
+        Maps the original **line** to its current line number. If **keys** names a
+        region, regions inside it are not counted and, if **seq** is given, it is
+        an insertion, which follows the regions inserted at the same line only if
+        they are deeper or were made before it.
+        """
+        current = line
+        for k, r in self._regions.items():
+            if k == keys or (keys is not None and self._is_under(k, keys)):
+                continue
+            if r.end < line or (r.end == line and self._precedes(k, r, keys, seq)):
+                current += r.delta
+        return(current)
+
+    def _precedes(self, k, r, keys, seq):
+        # does the region, **k**, ending at an insertion point come before the
+        # insertion, **keys**, there: deeper mappings end first, then the order made
+        if seq is None or r.start < r.end:
+            return(True)
+        return(len(k) > len(keys) or (len(k) == len(keys) and r.seq < seq))
+
+    def _region_span(self, keys, start, end, seq=None):
+        """
+        Returns the current [first, last) lines of the entry, **keys**, that spanned
+        the original lines [start, end).
+        """
+        first = self._current_line(start, keys, seq)
+        if keys in self._regions:
+            return((first, first + self._regions[keys].length))
+        length = end - start + sum(r.delta for k, r in self._regions.items() if self._is_under(k, keys))
+        return((first, first + length))
+
+    def _has_regions_under(self, keys):
+        return(any(self._is_under(k, keys) for k in self._regions))
+
+    def _is_spliceable(self, cfgmap):
+        # a block style mapping with the positions of its keys
+        if not hasattr(cfgmap, 'lc') or not cfgmap.lc.data:
+            return(False)
+        return(not (hasattr(cfgmap, 'fa') and cfgmap.fa.flow_style()))
+
+    def _parent(self, cfgdict, keys):
+        parent = cfgdict
+        for k in keys[:-1]:
+            parent = parent[k]
+        if not self._is_spliceable(parent):
+            raise _Unspliceable()
+        return(parent)
+
+    def _next_key(self, cfgdict, keys):
+        # the original line of the key after **keys** in its mapping, or of its parent
+        if not keys:
+            return(self._length)
+        parent = self._parent(cfgdict, keys)
+        line   = parent.lc.data[keys[-1]][0]
+        later  = [v[0] for v in parent.lc.data.values() if v[0] > line]
+        if later:
+            return(min(later))
+        return(self._next_key(cfgdict, keys[:-1]))
+
+    def _entry_end(self, cfgdict, keys, start):
+        """
+        Returns (end, trail) for the entry, **keys**, that starts at the original line
+        **start**: **end** is the original line just past its last line of content,
+        and **trail** the comment and blank lines between there and the next key.
+        """
+        end = stop = self._next_key(cfgdict, keys)
+        while end > start + 1 and self._is_filler(self.original[end - 1]):
+            end -= 1
+        return((end, self.original[end:stop]))
+
+    #--------------------------------------------------------------------------
+    # Rendering
+    #--------------------------------------------------------------------------
+    def _dump(self, cfgmap):
+        buf = io.StringIO()
+        self.yaml.dump(cfgmap, buf)
+        return(buf.getvalue())
+
+    def _render_entry(self, parent, key, col, trail=()):
+        # a one entry mapping of the same type, carrying the entry's comments, less
+        # those of the lines, **trail**, that follow it and are left where they are
+        entry = type(parent)()
+        entry[key] = parent[key]
+        if key in parent.ca.items:
+            entry.ca.items[key] = parent.ca.items[key]
+        indent = ' ' * col
+        skip   = [line.strip() for line in trail]
+        lines  = []
+        for line in self._dump(entry).splitlines(keepends=True):
+            if self._is_filler(line) and line.strip() in skip:
+                skip.remove(line.strip())
+                continue
+            lines.append(indent + line if line.strip() else line)
+        return(lines)
+
+    def _render_scalar(self, parent, key):
+        text = self._dump(type(parent)([('x', parent[key])]))
+        if text.count('\n') != 1 or not text.startswith('x: '):
+            return(None)
+        return(text[3:].rstrip('\n'))
+
+    def _scalar_extent(self, text, col):
+        """
+        Returns the column just past the scalar that starts at **col** of the line,
+        **text**, or None if it is not a simple, one line, scalar.
+        """
+        rest = text[col:].rstrip('\r\n')
+        if not rest or rest[0] in '|>&*!{[':
+            return(None)
+        if rest[0] in '"\'':
+            quote, i = rest[0], 1
+            while i < len(rest):
+                if quote == '"' and rest[i] == '\\':
+                    i += 2
+                    continue
+                if rest[i] == quote:
+                    if quote == "'" and rest[i+1:i+2] == "'":
+                        i += 2
+                        continue
+                    return(col + i + 1)
+                i += 1
+            return(None)
+        return(col + len(_PLAIN_SCALAR.match(rest).group(1).rstrip()))
+
+    def _is_filler(self, line):
+        # a blank or comment line
+        return(not line.strip() or line.lstrip().startswith('#'))
+
+    #--------------------------------------------------------------------------
+    def _plan(self, cfgdict, op, keys, value, edits, done):
+        if not keys:
+            raise _Unspliceable()
+
+        # an edit inside a mapping with no positions -- a new dictionary -- or in
+        # flow style re-renders the entry holding that mapping
+        container = cfgdict
+        for n in range(1, len(keys)):
+            container = container[keys[n - 1]]
+            if not self._is_spliceable(container):
+                return(self._plan(cfgdict, 'replace', keys[:n], None, edits, done))
+
+        # a mapping left empty is re-rendered as a whole, an empty block mapping
+        # would read back as null
+        if op == 'remove' and not container:
+            return(self._plan(cfgdict, 'replace', keys[:-1], None, edits, done))
+
+        # an edit inside a region that was re-rendered before re-renders it again
+        for n in range(1, len(keys) + 1):
+            prefix = keys[:n]
+            if prefix in self._regions:
+                if prefix not in done:
+                    done.add(prefix)
+                    r = self._regions[prefix]
+                    first, last = self._region_span(prefix, r.start, r.end, r.seq)
+                    parent = self._parent(cfgdict, prefix)
+                    lines  = self._render_entry(parent, prefix[-1], r.col, r.trail) if prefix[-1] in parent else []
+                    edits.append(('region', first, last, lines, prefix, r.start, r.end, r.col, r.seq, r.trail))
+                return
+        if keys in done:
+            return
+        done.add(keys)
+
+        parent = self._parent(cfgdict, keys)
+        key    = keys[-1]
+
+        if op == 'add':
+            col   = min(v[1] for v in parent.lc.data.values())
+            start = min(v[0] for v in parent.lc.data.values())
+            point = self._entry_end(cfgdict, keys[:-1], start)[0]
+            self._seq += 1
+            first = self._current_line(point, keys, self._seq)
+            edits.append(('region', first, first, self._render_entry(parent, key, col), keys, point, point, col, self._seq, ()))
+            return
+
+        if key not in parent.lc.data:
+            raise _Unspliceable()
+        kline, kcol, vline, vcol = parent.lc.data[key]
+        end, trail = self._entry_end(cfgdict, keys, kline)
+
+        first, last = self._region_span(keys, kline, end)
+
+        if op == 'remove':
+            edits.append(('region', first, last, [], keys, kline, end, kcol, 0, trail))
+            return
+
+        if (not isinstance(value, (Mapping, tuple, frozenset)) and vline == kline
+                and not self._has_regions_under(keys)
+                and all(self._is_filler(line) for line in self.lines[first + 1:last])):
+            stop = self._scalar_extent(self.lines[first], vcol)
+            text = self._render_scalar(parent, key)
+            if stop is not None and text is not None:
+                edits.append(('scalar', first, vcol, stop, text))
+                return
+
+        edits.append(('region', first, last, self._render_entry(parent, key, kcol, trail), keys, kline, end, kcol, 0, trail))
+
+    def render(self, cfgdict):
+        """
+        Returns the text of the document with the changes made to **cfgdict**
+        since the last **render()** (or since it was loaded) spliced in, or
+        None if the changes cannot be spliced and the whole document must be dumped.
+        """
+        current = configsnapshot.freeze(cfgdict, self.base)
+        edits   = []
+        done    = set()
+        try:
+            for op, keys, value in configjournal.changes(self.base, current):
+                self._plan(cfgdict, op, keys, value, edits, done)
+        except (_Unspliceable, KeyError, TypeError, AttributeError):
+            return(None)
+
+        # bottom up, so that the line numbers of the edits still to come stay put;
+        # on the same line, edits that replace lines come before insertions, which
+        # come shallowest first and in reverse order of creation, so that they end up
+        # deepest first, in order, and ahead of the line they were inserted at
+        def order(edit):
+            if edit[0] == 'scalar':
+                return((edit[1], 1, 0, 0))
+            return((edit[1], 1 if edit[2] > edit[1] else 0, -len(edit[4]), edit[8]))
+        edits.sort(key=order, reverse=True)
+
+        for edit in edits:
+            if edit[0] == 'scalar':
+                kind, line, start, stop, text = edit
+                old = self.lines[line]
+                self.lines[line] = old[:start] + text + old[stop:]
+            else:
+                kind, first, last, lines, keys, start, end, col, seq, trail = edit
+                if lines and first == len(self.lines) and self.lines and not self.lines[-1].endswith('\n'):
+                    self.lines[-1] += '\n'
+                self.lines[first:last] = lines
+                for k in [k for k in self._regions if self._is_under(k, keys)]:
+                    del self._regions[k]
+                self._regions[keys] = _Region(start, end, len(lines), col, seq, trail)
+
+        self.base = current
+        return(''.join(self.lines))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configsplice', verbosity=2)
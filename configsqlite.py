@@ -0,0 +1,665 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configsqlite
+
+A configuration kept in an SQLite database, for configurations too large, or
+changed too often, to rewrite as a whole file -- a million feature flags, say.
+
+Each value that is not a dictionary -- a scalar, a list, or an empty dictionary --
+is one row, keyed by its path, a JSON Pointer, and holding its JSON encoding::
+
+    path                        value
+    /flags/checkout/enabled     true
+    /flags/checkout/rollout     0.25
+    /flags/search/regions       ["eu", "us"]
+
+The path is the table's primary key, so fetching, setting or deleting one value
+costs a B-tree lookup, and the values under a path are a contiguous range of it.
+The database is in write-ahead log mode, in which readers, in this process or
+others, never block on a writer, nor it on them.
+
+**configsqlite.Config** offers two ways in. The point operations work on the
+database directly, without loading the configuration::
+
+    c = configsqlite.Config(cfgfile='flags.db')
+    c.get('/flags/checkout/enabled')                # True
+    c.set('/flags/checkout/rollout', 0.5)           # one transaction, a few rows
+    for path, value in c.query('/flags/search'):    # in path order
+        ...
+    for path, value in c.select('flags.*.enabled'): # see the configquery module
+        ...
+
+and **cfg** is the configuration as a dictionary, as for any Config. **read()**
+finds the top-level keys of the configuration with a handful of index lookups and
+loads each top-level section when it is first fetched (see
+**configshard.ShardDict**). **write()** writes only the values of **cfg** that
+changed since they were read, in one transaction.
+
+**import_file()** and **export_file()** copy a whole configuration from or to
+a file of any registered format, such as JSON or YAML.
+
+Values must be representable in JSON. Dictionary keys are stored as strings,
+and sections come back with their keys in sorted order.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import os
+import json
+import sqlite3
+from collections import OrderedDict
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Application Specific
+#------------------------------------------------------------------------------
+import config
+import configshard
+import configcompact
+import configjournal
+import configsnapshot
+import configcolumns
+import configquery
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The statements creating the table, if it does not exist yet.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (
+    path  TEXT PRIMARY KEY NOT NULL,
+    value TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+#------------------------------------------------------------------------------
+class ConfigSQLiteException(Exception):
+    """
+    Custom exception raised for a path that cannot be set or deleted, such as the
+    root of the configuration.
+    """
+    pass
+
+#------------------------------------------------------------------------------
+def flatten(value, path=''):
+    """
+    Generates the rows of **value**, found at **path**, a JSON Pointer string, as
+    (path, value) pairs: one per value that is not a non-empty dictionary.
+    """
+    if not (isinstance(value, Mapping) and (value or not path)):
+        yield((path, value))
+        return
+    # depth first, without a generator per dictionary
+    stack = [(path, iter(value.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            k = str(k)
+            p = prefix + '/' + k if '~' not in k and '/' not in k else prefix + configjournal.pointer((k,))
+            if (type(v) is dict or isinstance(v, Mapping)) and v:
+                stack.append((p, iter(v.items())))
+                break
+            yield((p, v))
+        else:
+            stack.pop()
+
+# json.dumps() builds an encoder for each call given separators
+_encoder = json.JSONEncoder(separators=(',', ':'))
+_decode  = json.JSONDecoder().decode
+
+def _encode(value):
+    if isinstance(value, (str, int, float)) or value is None:
+        return(_encoder.encode(value))
+    return(_encoder.encode(configcompact.thaw(value)))
+
+def _split(path):
+    if '~' in path:
+        return(configjournal.split(path))
+    return(path.split('/')[1:])
+
+def _range(path):
+    # the bounds of the paths under path: '/' sorts just before '0'
+    return((path + '/', path + '0'))
+
+def _tree(rows, path=''):
+    # the value at path, rebuilt from the rows at or under it, in path order
+    depth = len(_split(path))
+    tree  = None
+    for p, v in rows:
+        keys  = _split(p)[depth:]
+        value = _decode(v)
+        if not keys:
+            return(value)
+        if tree is None:
+            tree = {}
+        node = tree
+        for k in keys[:-1]:
+            node = node.setdefault(k, {})
+        node[keys[-1]] = value
+    return(tree)
+
+#------------------------------------------------------------------------------
+class Config(config.Config):
+    """
+    Sub-class the base config.Config class and over-ride its read() and write()
+    methods to keep the configuration in the SQLite database named by the **cfgfile**.
+
+    Besides the constructor parameters of the abstract base class -- see
+    `the config module API page`_ -- it takes:
+
+        **cache_size** - the number of values **get()** keeps, by default
+        **DEFAULT_CACHE_SIZE**; 0 keeps none
+
+    The **journal** is not used, since **write()** already writes only what changed,
+    and neither is the **encoding**. Call **close()** to close the database.
+
+    .. _the config module API page: config.html
+
+    """
+
+    #: Default configuration file name, **cfgfile**, if none is specified during class instantiation
+    DEFAULT_CFG_FILE   = "config.db"
+
+    #: Default configuration dictionary, **cfgdict**, if none is specified during class instantiation.
+    DEFAULT_CFG_DICT   = {}
+
+    #: Default number of values kept by **get()**, **cache_size**, if none is specified during class instantiation.
+    DEFAULT_CACHE_SIZE = 4096
+
+
+    def __init__(self, cfgdict=None, cfgfile=None, encoding=None, force=None, write_thru=None, compact=None,
+                 cache_size=None):
+        self._cache_size = cache_size if isinstance(cache_size, int) else self.DEFAULT_CACHE_SIZE
+        self._conn       = None
+        # path --> value, least recently used first
+        self._cache      = OrderedDict()
+        # the database's data_version when the cache was last checked
+        self._data_version = None
+        # the top-level keys in the database
+        self._sections   = set()
+        # top-level key --> snapshot of the section as it is in the database
+        self._written    = {}
+
+        super().__init__(cfgdict, cfgfile, encoding, force, write_thru, compact)
+
+    def _initCfg(self):
+        """
+        Opens the database and loads the configuration from it or, if **force** is
+        True or the database does not exist yet, stores the configuration passed to
+        the constructor in it.
+        """
+        exists = os.path.exists(self._cfgfile)
+        if not exists:
+            os.makedirs(os.path.dirname(self._cfgfile), exist_ok=True)
+        self._connect()
+        if self._force or not exists:
+            self._sections = self._top_keys()
+            self.write()
+        else:
+            self.read()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database. Any other method re-opens it.
+        """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    #--------------------------------------------------------------------------
+    def _connect(self):
+        if self._conn is None:
+            # autocommit mode; transactions are begun explicitly
+            self._conn = sqlite3.connect(self._cfgfile, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(SCHEMA)
+            self._cache.clear()
+            self._data_version = None
+        return(self._conn)
+
+    def _transaction(self, apply):
+        # runs apply(conn) in a write transaction, and returns what it returns
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = apply(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return(result)
+
+    def _fresh_cache(self):
+        # the cache, emptied if another connection has changed the database since it was filled
+        version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+        return(self._cache)
+
+    def _forget(self, path):
+        # drops the values at, above or under path from the cache
+        keys = configjournal.split(path)
+        for i in range(len(keys) + 1):
+            self._cache.pop(configjournal.pointer(keys[:i]), None)
+        low, high = _range(path)
+        for p in [p for p in self._cache if low <= p < high]:
+            del self._cache[p]
+
+    def _rows(self, path):
+        # the rows at or under path, in path order
+        if not path:
+            return(self._connect().execute("SELECT path, value FROM config ORDER BY path"))
+        low, high = _range(path)
+        return(self._connect().execute("SELECT path, value FROM config WHERE path = ? OR (path >= ? AND path < ?) ORDER BY path",
+                                       (path, low, high)))
+
+    def _top_keys(self):
+        # the top-level keys, each found with one index lookup
+        conn, keys, after, inclusive = self._connect(), set(), '', False
+        while True:
+            op  = '>=' if inclusive else '>'
+            row = conn.execute("SELECT path FROM config WHERE path %s ? ORDER BY path LIMIT 1" % op, (after,)).fetchone()
+            if row is None:
+                return(keys)
+            top = configjournal.split(row[0])[0]
+            keys.add(top)
+            top = configjournal.pointer((top,))
+            if row[0] == top:
+                after, inclusive = top, False
+            else:
+                after, inclusive = _range(top)[1], True
+
+    def _delete(self, conn, keys):
+        # deletes the rows at and under keys, and the rows of any values above them
+        path = configjournal.pointer(keys)
+        for i in range(1, len(keys)):
+            conn.execute("DELETE FROM config WHERE path = ?", (configjournal.pointer(keys[:i]),))
+        low, high = _range(path)
+        return(conn.execute("DELETE FROM config WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high)).rowcount)
+
+    def _insert(self, conn, value, keys):
+        rows = [(p, _encode(v)) for p, v in flatten(value, configjournal.pointer(keys))]
+        conn.executemany("INSERT INTO config (path, value) VALUES (?, ?)", rows)
+        return(len(rows))
+
+    def _load_section(self, name):
+        # the value of the top-level key name, from the database
+        rows  = self._rows(configjournal.pointer((name,))).fetchall()
+        value = _tree(rows, configjournal.pointer((name,)))
+        if self._compact:
+            value = configcompact.compact(value)
+        self._written[name] = configsnapshot.freeze(value)
+        if self._instrumented():
+            self._record('read', section=name, rows=len(rows))
+        return(value)
+
+    def _write_sections(self, conn, sections, removed, snapshots):
+        # writes the changes to each (name, value) of sections, and deletes the removed;
+        # the snapshot of each section written is added to snapshots
+        rows = 0
+        for name in removed:
+            rows += self._delete(conn, (name,))
+        for name, value in sections:
+            written  = self._written.get(name)
+            snapshot = snapshots[name] = configsnapshot.freeze(value, written)
+            if snapshot is written and name in self._sections:
+                continue
+            if written is None or name not in self._sections:
+                rows += self._delete(conn, (name,))
+                rows += self._insert(conn, value, (name,))
+                continue
+            for op, keys, new in configjournal.changes(written, snapshot, (name,)):
+                rows += self._delete(conn, keys)
+                if op != 'remove':
+                    rows += self._insert(conn, new, keys)
+                elif not configcolumns.resolve(snapshot, keys[1:-1]):
+                    # a dictionary left empty is a row of its own
+                    rows += self._insert(conn, {}, keys[:-1])
+        return(rows)
+
+    #--------------------------------------------------------------------------
+    def read(self):
+        """
+        Finds the top-level keys of the configuration in the database; each
+        top-level section is loaded when it is first fetched from the result.
+
+        Returns:
+
+            The configuration dictionary accessible by the **cfg** property, a **configshard.ShardDict**.
+
+        """
+        self._sections = self._top_keys()
+        self._written  = {}
+        self._cfgdict  = configshard.ShardDict(sorted(self._sections), self._load_section)
+        return(self._cfgdict)
+
+    def write(self):
+        """
+        Writes the values of the configuration dictionary, **cfg**, that have changed
+        since they were read or last written, and deletes those removed from it, in
+        one transaction. Top-level sections that were never loaded are not even
+        looked at.
+
+        Returns:
+
+            None
+
+        """
+        cfgdict = self._cfgdict
+        if isinstance(cfgdict, configshard.ShardDict):
+            sections = cfgdict.loaded_items()
+        else:
+            sections = list(cfgdict.items())
+        removed = [name for name in self._sections if name not in cfgdict]
+
+        snapshots = {}
+        rows = self._transaction(lambda conn: self._write_sections(conn, sections, removed, snapshots))
+        self._sections = set(cfgdict)
+        for name in removed:
+            self._written.pop(name, None)
+        self._written.update(snapshots)
+        self._cache.clear()
+        if self._instrumented():
+            self._record('write', rows=rows)
+
+    def get(self, path):
+        """
+        Returns the value at **path**, a JSON Pointer string, as in '/flags/search',
+        or a sequence of keys, as it is in the database -- changes made to **cfg** and
+        not yet written are not seen. Values that are not dictionaries are kept, as
+        their JSON text, in a cache of **cache_size** entries, which is emptied whenever
+        another connection changes the database; each call returns a new copy.
+
+        Raises:
+
+            KeyError if there is no value at **path**.
+
+        """
+        keys  = configcolumns.path_keys(path)
+        path  = configjournal.pointer(keys)
+        cache = self._fresh_cache()
+        if path in cache:
+            cache.move_to_end(path)
+            if self._instrumented():
+                self._record('cache_hit', cache='sqlite')
+            return(_decode(cache[path]))
+
+        conn = self._connect()
+        row  = conn.execute("SELECT value FROM config WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            value = _decode(row[0])
+        else:
+            value = _tree(self._rows(path), path) if keys else _tree(self._rows(''))
+            if value is None:
+                # inside a list, or nothing
+                for i in range(len(keys) - 1, 0, -1):
+                    row = conn.execute("SELECT value FROM config WHERE path = ?", (configjournal.pointer(keys[:i]),)).fetchone()
+                    if row is not None:
+                        try:
+                            return(configcolumns.resolve(_decode(row[0]), keys[i:]))
+                        except (LookupError, TypeError, ValueError):
+                            break
+                if not keys:
+                    return({})
+                raise KeyError(path)
+            # sections are not cached, they change with any value inside them
+            return(value)
+
+        if self._cache_size > 0:
+            cache[path] = row[0]
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        return(value)
+
+    def set(self, path, value):
+        """
+        Sets the value at **path**, a JSON Pointer string or a sequence of keys, in the
+        database, in one transaction, creating the dictionaries above it as needed. A
+        **path** into a list, as in '/flags/search/regions/0', sets that element of it.
+        The **cfg** dictionary is not changed; see **read()**.
+
+        Raises:
+
+            ConfigSQLiteException if **path** is the root of the configuration, or
+            leads into a list but names no element of it.
+
+        """
+        keys = configcolumns.path_keys(path)
+        if not keys:
+            raise ConfigSQLiteException("The root of the configuration cannot be set, assign cfg and write() it instead")
+        def apply(conn):
+            # a list is one row, so a value inside it is set in that row
+            above = [configjournal.pointer(keys[:i]) for i in range(1, len(keys))]
+            row   = conn.execute("SELECT path, value FROM config WHERE path IN (%s)" % ','.join('?' * len(above)),
+                                 above).fetchone() if above else None
+            if row is not None:
+                container = _decode(row[1])
+                if isinstance(container, list):
+                    self._set_inside(container, keys[len(_split(row[0])):], value, configjournal.pointer(keys))
+                    conn.execute("UPDATE config SET value = ? WHERE path = ?", (_encode(container), row[0]))
+                    return(1)
+            self._delete(conn, keys)
+            return(self._insert(conn, value, keys))
+        rows = self._transaction(apply)
+        self._sections.add(keys[0])
+        self._forget(configjournal.pointer(keys))
+        if self._instrumented():
+            self._record('write', rows=rows)
+
+    @staticmethod
+    def _set_inside(container, keys, value, path):
+        # sets the value reached from container through keys
+        try:
+            parent = configcolumns.resolve(container, keys[:-1])
+            if isinstance(parent, list):
+                parent[int(keys[-1])] = configcompact.thaw(value)
+            elif isinstance(parent, dict):
+                parent[str(keys[-1])] = configcompact.thaw(value)
+            else:
+                raise TypeError("not a list or a dictionary")
+        except (LookupError, TypeError, ValueError) as e:
+            raise ConfigSQLiteException("Cannot set %s inside a list: %s" % (path, e))
+
+    def delete(self, path):
+        """
+        Deletes the value at **path**, a JSON Pointer string or a sequence of keys, from
+        the database, in one transaction. The **cfg** dictionary is not changed; see **read()**.
+
+        Raises:
+
+            KeyError if there is no value at **path**.
+
+            ConfigSQLiteException if **path** is the root of the configuration.
+
+        """
+        keys = configcolumns.path_keys(path)
+        if not keys:
+            raise ConfigSQLiteException("The root of the configuration cannot be deleted")
+        path = configjournal.pointer(keys)
+        def apply(conn):
+            low, high = _range(path)
+            rows = conn.execute("DELETE FROM config WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high)).rowcount
+            if not rows:
+                raise KeyError(path)
+            parent = configjournal.pointer(keys[:-1])
+            if len(keys) > 1 and conn.execute("SELECT 1 FROM config WHERE path >= ? AND path < ? LIMIT 1", _range(parent)).fetchone() is None:
+                # a dictionary left empty is a row of its own
+                conn.execute("INSERT INTO config (path, value) VALUES (?, '{}')", (parent,))
+            return(rows)
+        rows = self._transaction(apply)
+        if len(keys) == 1:
+            self._sections.discard(keys[0])
+        self._forget(path)
+        if self._instrumented():
+            self._record('write', rows=rows)
+
+    def query(self, path=''):
+        """
+        Generates the (path, value) pairs of the values at or under **path**, a JSON
+        Pointer string or a sequence of keys -- by default the whole configuration --
+        in path order, one per value that is not a dictionary, from the database.
+        """
+        for p, v in self._rows(configjournal.pointer(configcolumns.path_keys(path))):
+            yield((p, _decode(v)))
+
+    def select(self, selector, database=True):
+        """
+        Generates the (path, value) pairs of the values selected by **selector** (see
+        the **configquery** module), lazily, with the paths as JSON Pointer strings.
+
+        If **database** is True, the default, they come from the database, as for
+        **query()**, in path order: the selector is matched against the paths of the
+        rows, only the rows under the keys it starts with are read, and only the
+        values of the rows it can select are decoded. If it is False, they come from
+        **cfg**, as for any Config, which loads the sections the selector goes into.
+
+        Raises:
+
+            configquery.ConfigQueryException if **selector** cannot be parsed.
+
+        """
+        query = configquery.compile(selector)
+        if not database:
+            return(query.find(self._cfgdict))
+        return(self._select(query))
+
+    def _select(self, query):
+        conn   = self._connect()
+        prefix = query.prefix
+
+        # a value above the prefix, such as a list, holds what is under it
+        states = query.start
+        for i, key in enumerate(prefix[:-1]):
+            states = query.advance(states, key)
+            at  = configjournal.pointer(prefix[:i + 1])
+            row = conn.execute("SELECT value FROM config WHERE path = ?", (at,)).fetchone()
+            if row is not None:
+                yield from query.walk(_decode(row[0]), at, states)
+                return
+
+        rows    = self._rows(configjournal.pointer(prefix))
+        # the keys of the last row, and the states each of their prefixes reached
+        path    = []
+        reached = [query.start]
+        pending = None
+        while True:
+            row, pending = pending or next(rows, None), None
+            if row is None:
+                return
+            keys = _split(row[0])
+            common = 0
+            while common < len(reached) - 1 and common < len(keys) and path[common] == keys[common]:
+                common += 1
+            path, reached = keys, reached[:common + 1]
+            # up to the first key from which nothing can be selected, or a selected value above the row
+            for key in keys[common:]:
+                if not reached[-1] or query.accepts(reached[-1]):
+                    break
+                reached.append(query.advance(reached[-1], key))
+
+            depth = len(reached) - 1
+            states = reached[-1]
+            if not states:
+                # skip the rows under the key that cannot match
+                under = configjournal.pointer(keys[:depth]) + '/'
+                for row in rows:
+                    if not row[0].startswith(under):
+                        pending = row
+                        break
+                continue
+            if depth < len(keys):
+                # a dictionary is selected: rebuild it from its rows
+                at    = configjournal.pointer(keys[:depth])
+                under = at + '/'
+                group = [row]
+                for row in rows:
+                    if not row[0].startswith(under):
+                        pending = row
+                        break
+                    group.append(row)
+                yield from query.walk(_tree(group, at), at, states)
+            else:
+                yield from query.walk(_decode(row[1]), row[0], states)
+
+    def count(self, path=''):
+        """
+        Returns the number of values at or under **path**, a JSON Pointer string or a
+        sequence of keys -- by default the whole configuration -- that are not
+        dictionaries, in the database.
+        """
+        path = configjournal.pointer(configcolumns.path_keys(path))
+        if not path:
+            return(self._connect().execute("SELECT COUNT(*) FROM config").fetchone()[0])
+        low, high = _range(path)
+        return(self._connect().execute("SELECT COUNT(*) FROM config WHERE path = ? OR (path >= ? AND path < ?)",
+                                       (path, low, high)).fetchone()[0])
+
+    def import_file(self, filename, format=None):
+        """
+        Replaces the whole configuration, in the database and in **cfg**, with that of
+        the file **filename**, opened by **config.open()** with the registered **format**
+        name, if given, or the format detected from the file.
+        """
+        cfgdict = config.open(filename, format=format).cfg
+        def apply(conn):
+            conn.execute("DELETE FROM config")
+            return(self._insert(conn, cfgdict, ()))
+        rows = self._transaction(apply)
+        self._cache.clear()
+        if self._instrumented():
+            self._record('write', rows=rows)
+        self.read()
+
+    def export_file(self, filename, format=None):
+        """
+        Writes the whole configuration in the database to the file **filename**, in
+        the registered **format**, if given, or the format of its file name extension.
+        """
+        fmt = format if format is not None else config.detect_format(filename)
+        config.format_class(fmt)(_tree(self._rows('')) or {}, cfgfile=filename, force=True)
+
+    @property
+    def cache_size(self):
+        """
+        Property
+
+        **cache_size** - an integer
+
+        The number of values **get()** keeps.
+
+        Raises:
+
+            TypeError if **cache_size** assignment value is not an integer.
+
+        """
+        return(self._cache_size)
+
+    @cache_size.setter
+    def cache_size(self, int_value):
+        if isinstance(int_value, int) and not isinstance(int_value, bool):
+            self._cache_size = int_value
+            while len(self._cache) > max(int_value, 0):
+                self._cache.popitem(last=False)
+        else:
+            raise TypeError("Assignment value to cache_size must be an integer!!")
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configsqlite', verbosity=2)
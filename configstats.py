@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configstats
+
+Instrumentation for **config.Config** and its sub-classes.
+
+A **Stats** object counts what its configurations do: reads and writes, bytes read
+and written, time spent in file I/O separately from time spent parsing and
+serializing, write thru updates, journal appends and cache hits. It can also
+pass every event on to hooks.
+
+Instrumentation is off until it is asked for, either for one configuration::
+
+    c = configjson.Config()
+    c.stats = configstats.Stats()
+
+or for every configuration in the process::
+
+    configstats.enable()
+    ...
+    print(configstats.summary(configstats.GLOBAL))
+
+When it is off the only cost is an attribute test on each read and write.
+
+A hook is any callable taking (event, config, fields) -- the event name, the
+Config instance, and a dictionary of the event's measurements. **MetricsAdapter**
+is a hook that feeds a statsd style metrics client.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import threading
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: The process wide **Stats**, or None when global instrumentation is disabled.
+GLOBAL = None
+
+#: Names of the counters kept by **Stats**.
+COUNTERS = ('reads', 'writes', 'bytes_read', 'bytes_written',
+            'read_io_time', 'parse_time', 'write_io_time', 'serialize_time',
+            'write_thrus', 'journal_appends', 'cache_hits')
+
+# event --> {field of the event : counter it is added to}
+_EVENT_COUNTERS = {
+    'read'           : {'bytes' : 'bytes_read', 'io_time' : 'read_io_time', 'parse_time' : 'parse_time'},
+    'write'          : {'bytes' : 'bytes_written', 'io_time' : 'write_io_time', 'serialize_time' : 'serialize_time'},
+    'journal_append' : {'bytes' : 'bytes_written'},
+}
+
+# event --> counter incremented once per event
+_EVENT_COUNTS = {
+    'read'           : 'reads',
+    'write'          : 'writes',
+    'write_thru'     : 'write_thrus',
+    'journal_append' : 'journal_appends',
+    'cache_hit'      : 'cache_hits',
+}
+
+#------------------------------------------------------------------------------
+class Stats(object):
+    """
+    A set of counters, see **COUNTERS**, plus a list of hooks.
+
+    Args:
+
+        **hooks** - a list of callables
+
+        Hooks called, as hook(event, config, fields), for every event recorded.
+
+    """
+    def __init__(self, hooks=None):
+        self.hooks    = list(hooks) if hooks else []
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock    = threading.Lock()
+
+    def add_hook(self, hook):
+        """
+        Adds **hook** to the hooks called for every event recorded.
+        """
+        self.hooks.append(hook)
+
+    def record(self, event, config=None, **fields):
+        """
+        Records one **event** of the Config instance, **config**, with its measurements,
+        **fields**, and passes it on to the hooks.
+        """
+        with self._lock:
+            counter = _EVENT_COUNTS.get(event)
+            if counter:
+                self.counters[counter] += 1
+            for field, counter in _EVENT_COUNTERS.get(event, {}).items():
+                if field in fields:
+                    self.counters[counter] += fields[field]
+        for hook in self.hooks:
+            hook(event, config, fields)
+
+    def reset(self):
+        """
+        Sets all of the counters back to zero.
+        """
+        with self._lock:
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def __getitem__(self, counter):
+        return(self.counters[counter])
+
+#------------------------------------------------------------------------------
+class MetricsAdapter(object):
+    """
+    A hook that forwards events to a statsd style metrics **client**, which must
+    provide incr(name, count) and timing(name, milliseconds).
+
+    Every event increments the counter <prefix>.<event>; each measurement of an
+    event is sent as <prefix>.<event>.<field>, as a timing if its name ends in
+    *_time* and as a counter otherwise.
+    """
+    def __init__(self, client, prefix='config'):
+        self.client = client
+        self.prefix = prefix
+
+    def __call__(self, event, config, fields):
+        name = "%s.%s" % (self.prefix, event)
+        self.client.incr(name, 1)
+        for field, value in fields.items():
+            if field.endswith('_time'):
+                self.client.timing("%s.%s" % (name, field), value * 1000.0)
+            else:
+                self.client.incr("%s.%s" % (name, field), value)
+
+#------------------------------------------------------------------------------
+def enable(hooks=None):
+    """
+    Turns on process wide instrumentation of every Config instance, recording in
+    a new **GLOBAL** Stats object that is also returned.
+    """
+    global GLOBAL
+    GLOBAL = Stats(hooks)
+    return(GLOBAL)
+
+def disable():
+    """
+    Turns off process wide instrumentation.
+    """
+    global GLOBAL
+    GLOBAL = None
+
+def summary(stats):
+    """
+    Returns a human readable, multi-line, summary of the counters of **stats**.
+    """
+    c = stats.counters
+    lines = [
+        "reads           : %d (%d bytes, %.6fs I/O, %.6fs parse)" % (c['reads'], c['bytes_read'], c['read_io_time'], c['parse_time']),
+        "writes          : %d (%d bytes, %.6fs I/O, %.6fs serialize)" % (c['writes'], c['bytes_written'], c['write_io_time'], c['serialize_time']),
+        "write thrus     : %d" % c['write_thrus'],
+        "journal appends : %d" % c['journal_appends'],
+        "cache hits      : %d" % c['cache_hits'],
+    ]
+    return("\n".join(lines))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configstats', verbosity=2)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+Module configview
+
+Projects a configuration dictionary onto generated, frozen, slotted classes --
+one class per section -- so that configuration values can be read with plain
+attribute access rather than string keyed dictionary lookups::
+
+    v = configview.build({'Logging' : {'LogFileName' : 'app.log'}})
+    v.Logging.LogFileName          # 'app.log'
+    v.to_dict()                    # {'Logging': {'LogFileName': 'app.log'}}
+
+Generated classes are cached by section name and key set, so re-building a view
+of a configuration whose shape has not changed re-uses the same classes. The cache
+holds the last **CACHE_SIZE** classes used.
+
+A section whose keys are not all valid Python identifiers cannot be expressed as
+a class; it is presented as a read-only **ReadOnlyMapping** instead, which has a
+**to_dict()** method too.
+
+The **config.Config.view** property is the usual way to obtain a view.
+
+.. moduleauthor:: E.R. Uber <eruber@gmail.com>
+
+"""
+#------------------------------------------------------------------------------
+# Python Standard Library
+#------------------------------------------------------------------------------
+import dataclasses
+import keyword
+import types
+from collections import OrderedDict
+from collections.abc import Mapping
+
+#------------------------------------------------------------------------------
+# Module Attributes
+#------------------------------------------------------------------------------
+
+#: Name given to the class generated for the top level of the configuration.
+ROOT_VIEW_NAME = "ConfigView"
+
+#: The number of generated view classes kept by **view_class()**.
+CACHE_SIZE = 256
+
+# (class name, tuple of keys) --> generated view class, least recently used first
+_view_classes = OrderedDict()
+
+#------------------------------------------------------------------------------
+def _is_field_name(key):
+    return(isinstance(key, str) and key.isidentifier() and not keyword.iskeyword(key)
+           and key != 'to_dict')
+
+def _class_name(key):
+    name = str(key)
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return(name)
+    return(ROOT_VIEW_NAME)
+
+def _to_dict(self):
+    """
+    Returns a new, mutable, configuration dictionary equal to the one
+    the view was built from, suitable for assignment to **cfg**.
+    """
+    return(thaw(self))
+
+#------------------------------------------------------------------------------
+class ReadOnlyMapping(Mapping):
+    """
+    A read-only mapping, the view of a section whose keys are not all valid Python
+    identifiers.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return(self._data[key])
+
+    def __iter__(self):
+        return(iter(self._data))
+
+    def __len__(self):
+        return(len(self._data))
+
+    def __repr__(self):
+        return("%s(%r)" % (self.__class__.__name__, self._data))
+
+    to_dict = _to_dict
+
+#------------------------------------------------------------------------------
+def view_class(name, keys):
+    """
+    Returns the frozen, slotted class used for a section named **name** having
+    the keys, **keys**. Classes are generated once and then kept in a cache of
+    the last **CACHE_SIZE** used.
+    """
+    keys = tuple(keys)
+    cls = _view_classes.get((name, keys))
+    if cls is None:
+        cls = dataclasses.make_dataclass(name, keys, frozen=True, slots=True,
+                                         namespace={'to_dict' : _to_dict})
+        _view_classes[(name, keys)] = cls
+        while len(_view_classes) > CACHE_SIZE:
+            _view_classes.popitem(last=False)
+    else:
+        _view_classes.move_to_end((name, keys))
+    return(cls)
+
+def build(value, name=ROOT_VIEW_NAME):
+    """
+    Builds and returns a view of **value**.
+
+    Dictionaries become instances of generated view classes (or **ReadOnlyMapping**s
+    if their keys are not valid identifiers), lists become tuples, and all other
+    values are used as is. Either way, the view of a dictionary has a **to_dict()**
+    method.
+    """
+    if isinstance(value, Mapping):
+        if all(_is_field_name(k) for k in value):
+            cls = view_class(name, value.keys())
+            return(cls(*(build(v, _class_name(k)) for k, v in value.items())))
+        return(ReadOnlyMapping({k : build(v, _class_name(k)) for k, v in value.items()}))
+    if isinstance(value, (list, tuple)):
+        return(tuple(build(v, name) for v in value))
+    return(value)
+
+def thaw(value):
+    """
+    Converts a view, **value**, back to plain dictionaries and lists.
+    """
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return({f.name : thaw(getattr(value, f.name)) for f in dataclasses.fields(value)})
+    if isinstance(value, (ReadOnlyMapping, types.MappingProxyType)):
+        return({k : thaw(v) for k, v in value.items()})
+    if isinstance(value, tuple):
+        return([thaw(v) for v in value])
+    return(value)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    from unittest import main
+    main(module='tests.test_configview', verbosity=2)
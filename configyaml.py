@@ -14,19 +14,76 @@ to provide YAML specific configuration read and write methods.
 # Python Standard Library
 #------------------------------------------------------------------------------
 import os.path
+import io
 
 #------------------------------------------------------------------------------
 # Application Specific 
 #------------------------------------------------------------------------------
 import config
+import configcow
+import configcompact
+import configsplice
+import configinclude
 
 #------------------------------------------------------------------------------
 # Third Party Dependencies
 #------------------------------------------------------------------------------
-#import yaml
-import ruamel.yaml
+# ruamel.yaml is imported on first use, by _ruamel_yaml(), rather than here,
+# so that importing this module stays cheap for programs that never touch YAML.
+_ruamel = None
 
-from ruamel.yaml import YAML
+# ruamel.yaml representer or constructor class --> its sub-class made by _own_class()
+_yaml_classes = {}
+
+def _ruamel_yaml():
+    """
+    Returns the **ruamel.yaml** module, importing it on first use.
+    """
+    global _ruamel
+    if _ruamel is None:
+        import ruamel.yaml
+        import ruamel.yaml.error
+        _ruamel = ruamel.yaml
+    return(_ruamel)
+
+def _own_class(base):
+    # a sub-class of ruamel.yaml's representer or constructor class, base, that
+    # represents copy-on-write dictionaries as dictionaries and reads and writes
+    # !include tags, leaving the classes shared by every other user of ruamel.yaml
+    # as they are
+    cls = _yaml_classes.get(base)
+    if cls is None:
+        import ruamel.yaml.representer
+        import ruamel.yaml.constructor
+        cls = base
+        if issubclass(base, ruamel.yaml.representer.SafeRepresenter):
+            cls = type(base.__name__, (base,), {})
+            cls.add_representer(configcow.CowDict, base.represent_dict)
+            cls.add_representer(configinclude.Include, _represent_include)
+        elif issubclass(base, ruamel.yaml.constructor.SafeConstructor):
+            cls = type(base.__name__, (base,), {})
+            cls.add_constructor(configinclude.INCLUDE_TAG, _construct_include)
+        _yaml_classes[base] = cls
+    return(cls)
+
+def _new_yaml(**kwargs):
+    """
+    Returns a new **ruamel.yaml.YAML** instance, made with the keyword arguments,
+    **kwargs**, that knows the copy-on-write dictionaries of config.Config and the
+    !include tags (see the includes property of config.Config).
+    """
+    yaml = _ruamel_yaml().YAML(**kwargs)
+    yaml.Representer = _own_class(yaml.Representer)
+    yaml.Constructor = _own_class(yaml.Constructor)
+    return(yaml)
+
+def _construct_include(constructor, node):
+    return(configinclude.Include(constructor.construct_scalar(node), tag=True))
+
+def _represent_include(representer, include):
+    if include.tag:
+        return(representer.represent_scalar(configinclude.INCLUDE_TAG, include.path))
+    return(representer.represent_dict(include.mapping()))
 
 #------------------------------------------------------------------------------
 class Config(config.Config):
@@ -138,8 +195,19 @@ class Config(config.Config):
     #: Default configuration file text encoding, **encoding**, if none is specified during class instantiation.
     DEFAULT_ENCODING   = 'utf-8'
 
+    #: Default incremental parameter value, **incremental**, if none is specified during class instantiation.
+    DEFAULT_INCREMENTAL = False
+
+    #: Default value of the **render_cache** property; a YAML dump costs far more than checking the cache.
+    DEFAULT_RENDER_CACHE = True
+
 
-    def __init__(self, cfgobj=None, cfgfile=None, encoding=None, force=None, write_thru=None, **kwargs):
+    def __init__(self, cfgobj=None, cfgfile=None, encoding=None, force=None, write_thru=None, incremental=None, compact=None, includes=None, **kwargs):
+
+        if incremental is None:
+            incremental = self.DEFAULT_INCREMENTAL
+        self.incremental = incremental
+        self._splicer    = None
 
         if not cfgobj:
             cfgobj = self.DEFAULT_CFG_DICT
@@ -149,7 +217,7 @@ class Config(config.Config):
         if 'typ' not in kwargs:
             kwargs['typ'] = 'safe'
 
-        self.yaml = YAML(**kwargs) # default if not specfied is round-trip
+        self.yaml = _new_yaml(**kwargs) # default if not specfied is round-trip
 
         self.yaml.default_flow_style = False  # blow style, not flow style
         self.yaml.indent = 4
@@ -165,12 +233,12 @@ class Config(config.Config):
             # cfgobj must be either a string, a fliepointer, or a pathlib.Path() object
             try:
                 cfgdict = self.yaml.load(cfgobj)
-            except ruamel.yaml.error.YAMLStreamError as e:
+            except _ruamel_yaml().error.YAMLStreamError as e:
                 raise(e)
 
 
         # Call the base class's constructor
-        super(Config, self).__init__(cfgdict=cfgdict, cfgfile=cfgfile, encoding=encoding, force=force, write_thru=write_thru)
+        super(Config, self).__init__(cfgdict=cfgdict, cfgfile=cfgfile, encoding=encoding, force=force, write_thru=write_thru, compact=compact, includes=includes)
 
 
     def read(self, cfgobj=None, **kwargs):
@@ -185,6 +253,7 @@ class Config(config.Config):
         The dictionary will also be accessible via the **cfg** property.
 
         If **cfgobj** is not defined, then the **cfgfile** will be loaded and its contents returned as a dictionary that is also accessible via the **cfg** property.
+        Any changes recorded in the **journalfile** are applied to the result.
 
         See `yaml documentation`_ for more details on what other keyword/value pairs,
         **kwargs**, might be available as arguments.
@@ -199,20 +268,90 @@ class Config(config.Config):
 
         """
         if cfgobj:
+            self._splicer = None
             try:
                 self._cfgdict = self.yaml.load(cfgobj)
                 return(self._cfgdict)
-            except ruamel.yaml.error.YAMLStreamError as e:
+            except _ruamel_yaml().error.YAMLStreamError as e:
                 raise(e)
 
         else:
             # read from cfgfile
-            with open(self._cfgfile, encoding=self._encoding, mode='r') as cp:
-                self._cfgdict = self.yaml.load(cp, **kwargs)
+            cfgdict = self._load_cfgfile(lambda text: self._load(text, **kwargs))
+
+            self._cfgdict = self._journal_replay(cfgdict)
 
             return(self._cfgdict)
 
 
+    @property
+    def incremental(self):
+        """
+        A boolean. When True, and the YAML subsystem is round-trip (typ='rt'), **write()**
+        re-renders only the entries of the **cfgfile** that have changed since it was
+        last read or written, leaving the rest of the file -- comments, blank lines,
+        quoting -- as it was. See the **configsplice** module.
+
+        It takes effect from the next **read()** of the **cfgfile**. Edits that cannot
+        be spliced in, such as replacing the whole **cfg**, fall back to dumping the whole
+        file, after which incremental writes resume with the next **read()**.
+        """
+        return(self._incremental)
+
+    @incremental.setter
+    def incremental(self, value):
+        if not isinstance(value, bool):
+            raise TypeError("Assignment value to incremental must be a boolean!!")
+        self._incremental = value
+        if not value:
+            self._splicer = None
+
+    def _load(self, text, **kwargs):
+        cfgdict = self.yaml.load(text, **kwargs)
+        if self._incremental and not self._includes and 'rt' in self.yaml.typ and isinstance(text, str):
+            self._splicer = configsplice.Splicer(self.yaml, text, cfgdict)
+        else:
+            self._splicer = None
+        return(cfgdict)
+
+    def _render(self, inp, **kwargs):
+        """
+        Returns the text of the **cfgfile** for **inp**, spliced into the text last
+        read or written when possible.
+        """
+        if self._splicer is not None:
+            if inp is self._cfgdict and not kwargs:
+                text = self._splicer.render(inp)
+                if text is not None:
+                    return(text)
+            self._splicer = None
+        if inp is self._cfgdict:
+            return(self._rendered(lambda: self._dumps(inp, **kwargs), self._render_options(kwargs)))
+        return(self._dumps(inp, **kwargs))
+
+    def _render_options(self, kwargs):
+        """
+        Returns the options the text of a dump depends on: the keyword arguments,
+        **kwargs**, and the settings of the YAML subsystem, such as its indent.
+        """
+        settings = []
+        for name, value in vars(self.yaml).items():
+            if name.startswith('_'):
+                continue
+            if isinstance(value, list):
+                value = tuple(value)
+            if value is None or isinstance(value, (bool, int, float, str, tuple)):
+                settings.append((name, value))
+        return(dict(kwargs, _yaml=tuple(sorted(settings))))
+
+    def _dumps(self, inp, **kwargs):
+        """
+        Returns **inp** serialized as a YAML string.
+        """
+        buf = io.StringIO()
+        self.yaml.dump(configcompact.thaw(self._persisted(inp)), buf, **kwargs)
+        return(buf.getvalue())
+
     def write(self, cfgdict=None, stream=None, **kwargs):
         """
         This method writes its input, **cfgdict**, via the output **stream**. The file written will be in YAML format.
@@ -231,6 +370,10 @@ class Config(config.Config):
 
         where transform_func is a function that takes a string as input and returns a transformed string as output.
 
+        Writing **cfg** to the **cfgfile**, to a text stream or to a pathlib.Path() object
+        re-uses the text of an earlier write with the same **kwargs** and settings of
+        **yaml** when **cfg** has not changed since -- see the **render_cache** property.
+
         See `yaml documentation`_ for more details on what other keyword/value pairs,
         **kwargs**, might be available as arguments.
 
@@ -250,11 +393,21 @@ class Config(config.Config):
 
         if stream:
             # stream is a filepointer or a pathlib.Path() object
-            self.yaml.dump(inp, stream, **kwargs)
+            if inp is self._cfgdict and isinstance(stream, (io.TextIOBase, os.PathLike)):
+                text = self._rendered(lambda: self._dumps(inp, **kwargs), self._render_options(kwargs))
+                if isinstance(stream, os.PathLike):
+                    with open(stream, 'w', encoding=self._encoding) as fp:
+                        fp.write(text)
+                else:
+                    stream.write(text)
+            else:
+                self.yaml.dump(configcompact.thaw(self._persisted(inp)), stream, **kwargs)
         else:
             # use the object's cfgfile to create a fliepointer to write to
-            with open(self._cfgfile, encoding=self._encoding, mode='w') as cp:
-                self.yaml.dump(inp, cp, **kwargs)
+            self._write_cfgfile(lambda: self._render(inp, **kwargs), cfgdict=inp)
+
+            if inp is self._cfgdict:
+                self._journal_reset()
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+benchmarks.bench unit tests
+"""
+import json
+
+# module under test
+from benchmarks import bench
+
+# unit testing framweork
+import unittest
+
+
+class BenchTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_synthetic_cfg_size(self):
+        for depth in (1, 3):
+            size = len(json.dumps(bench.synthetic_cfg(bench.SIZES['100KB'], depth)))
+            self.assertGreater(size, bench.SIZES['100KB'] // 2)
+            self.assertLess(size, bench.SIZES['100KB'] * 2)
+
+    def test_run_produces_result_per_case(self):
+        results = bench.run(sizes=['1KB'], depths=[1], repeat=1)
+        cases = {(r['case'], r['format']) for r in results['results']}
+        self.assertIn(('write_thru', 'json'), cases)
+        self.assertIn(('yaml_rt_round_trip', 'yaml'), cases)
+        self.assertIn(('import', 'yaml'), cases)
+        self.assertNotIn(('yaml_rt_round_trip', 'json'), cases)
+        self.assertTrue(all(r['best'] >= 0 for r in results['results']))
+        json.dumps(results)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results' : [{'case' : 'read', 'format' : 'json', 'size' : '1KB', 'depth' : 1, 'best' : 1.0}]}
+        slower   = {'results' : [{'case' : 'read', 'format' : 'json', 'size' : '1KB', 'depth' : 1, 'best' : 1.5}]}
+        self.assertEqual(len(bench.compare(slower, baseline, tolerance=0.10)), 1)
+        self.assertEqual(bench.compare(slower, baseline, tolerance=0.60), [])
+
+    def test_import_time(self):
+        self.assertGreater(bench.import_time('configyaml'), 0)
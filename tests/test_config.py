@@ -4,6 +4,7 @@
 config unit tests
 """
 import os.path
+import importlib.util
 
 # module under test
 # this is an abstract base class
@@ -24,3 +25,169 @@ class ConfigTest(unittest.TestCase):
             self.c = config.Config(force=True)
         except TypeError:
             self.assertRaises(TypeError)
+
+
+SNIFF_FILE = 'sniffed.cfg'
+
+class ConfigFormatRegistryTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        config.clear_format_cache()
+        for name in (SNIFF_FILE, 'registry.json', 'registry.yml'):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def write_bytes(self, data):
+        with open(SNIFF_FILE, 'wb') as fp:
+            fp.write(data)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_open_by_extension(self):
+        import configjson
+        import configyaml
+        self.assertIsInstance(config.open('registry.json', cfgdict={'a' : 1}), configjson.Config)
+        self.assertIsInstance(config.open('registry.yml'), configyaml.Config)
+        self.assertEqual(config.open('registry.json').cfg, {'a' : 1})
+
+    def test_open_with_explicit_format(self):
+        import configjson
+        c = config.open(SNIFF_FILE, format='json', cfgdict={'a' : 1})
+        self.assertIsInstance(c, configjson.Config)
+
+    def test_detect_by_content(self):
+        self.write_bytes(b'  {"a": 1}')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'json')
+        config.clear_format_cache()
+
+        self.write_bytes(b'a: 1\n')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'yaml')
+        config.clear_format_cache()
+
+        self.write_bytes(b'\x81\xa1a\x01')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'msgpack')
+        config.clear_format_cache()
+
+        self.write_bytes(b'\xa1aa\x01')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'cbor')
+
+    def test_detection_is_cached_per_path(self):
+        self.write_bytes(b'{"a": 1}')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'json')
+        self.write_bytes(b'a: 1\n')
+        self.assertEqual(config.detect_format(SNIFF_FILE), 'json')
+
+    def test_unknown_format(self):
+        with self.assertRaises(config.ConfigFormatException):
+            config.detect_format('no-such-file.unknown')
+        with self.assertRaises(config.ConfigFormatException):
+            config.format_class('no-such-format')
+
+    def test_register_format_is_lazy(self):
+        config.register_format('fake', 'no_such_module_for_tests', ('.fake',))
+        try:
+            self.assertEqual(config.detect_format('x.fake'), 'fake')
+            with self.assertRaises(ImportError):
+                config.open('x.fake')
+        finally:
+            config._formats.pop('fake')
+            config._extensions.pop('.fake')
+
+    def test_import_config_does_not_import_formats(self):
+        import subprocess, sys
+        code = "import sys, config; print(any(m in sys.modules for m in ('configjson', 'configyaml', 'configmsgpack', 'configcbor')))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out  = subprocess.run([sys.executable, '-c', code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(out.stdout.strip(), 'False')
+
+    def test_import_does_not_import_optional_features(self):
+        import subprocess, sys
+        code = ("import sys, configjson, configyaml; "
+                "print(any(m in sys.modules for m in ('confighistory', 'configquery', 'configinterp', 'hashlib', 'tempfile', 'pathlib')))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out  = subprocess.run([sys.executable, '-c', code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(out.stdout.strip(), 'False')
+
+
+COMPRESSED_FILES = ('compressed.json.gz', 'compressed.yaml.bz2', 'compressed.json.xz',
+                    'compressed.yaml.zst', 'compressed.cfg.gz')
+
+# leading bytes of each codec's files
+MAGIC = {'.gz' : b'\x1f\x8b', '.bz2' : b'BZh', '.xz' : b'\xfd7zXZ', '.zst' : b'\x28\xb5\x2f\xfd'}
+
+HAS_ZSTANDARD = importlib.util.find_spec('zstandard') is not None
+
+class ConfigCompressionTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        config.clear_format_cache()
+        for name in COMPRESSED_FILES:
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def cfgdict(self):
+        return({'routes' : [{'path' : '/r%d' % (i * 7919 % 10007), 'port' : 8000 + i, 'name' : 'caf\u00e9'} for i in range(500)]})
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_round_trip(self):
+        for name in COMPRESSED_FILES[:4]:
+            if name.endswith('.zst') and not HAS_ZSTANDARD:
+                continue
+            with self.subTest(name=name):
+                magic = MAGIC[os.path.splitext(name)[1]]
+                config.format_class(config.detect_format(name))(self.cfgdict(), cfgfile=name, force=True)
+                with open(name, 'rb') as fp:
+                    self.assertEqual(fp.read(len(magic)), magic)
+                self.assertEqual(config.open(name).cfg, self.cfgdict())
+
+    def test_detect_format_strips_suffix(self):
+        self.assertEqual(config.detect_format('x.json.gz'), 'json')
+        self.assertEqual(config.detect_format('x.YAML.XZ'), 'yaml')
+        self.assertEqual(config.compression('x.json.zst'), 'zstd')
+        self.assertIsNone(config.compression('x.json'))
+        self.assertEqual(config.strip_compression('x.json.bz2'), 'x.json')
+
+    def test_sniffs_decompressed_contents(self):
+        with config.open_stream('compressed.cfg.gz', 'w', binary=True) as fp:
+            fp.write(b'{"a": 1}')
+        self.assertEqual(config.detect_format('compressed.cfg.gz'), 'json')
+
+    def test_compresslevel(self):
+        import configjson
+        c = configjson.Config(self.cfgdict(), cfgfile='compressed.json.gz', force=True)
+        sizes = []
+        for level in (1, 9):
+            c.compresslevel = level
+            c.write()
+            sizes.append(os.path.getsize('compressed.json.gz'))
+        self.assertGreater(sizes[0], sizes[1])
+        with self.assertRaises(TypeError):
+            c.compresslevel = True
+        with self.assertRaises(TypeError):
+            c.compresslevel = '9'
+
+    def test_stats_count_compressed_bytes(self):
+        import configjson
+        import configstats
+        c = configjson.Config(self.cfgdict(), cfgfile='compressed.json.gz', force=True)
+        c.stats = configstats.Stats()
+        c.write()
+        c.read()
+        size = os.path.getsize('compressed.json.gz')
+        self.assertEqual(c.stats['bytes_written'], size)
+        self.assertEqual(c.stats['bytes_read'], size)
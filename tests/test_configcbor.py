@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configcbor unit tests
+"""
+import os.path
+import importlib.util
+
+# module under test
+import configcbor
+
+import configjson
+
+# unit testing framweork
+import unittest
+
+D = {'log' : 'whatever-log-filename.log', 'verbose' : True, 'sizes' : [1, 2.5, None], 'nested' : {'a' : {'b' : 'c'}}}
+
+CUSTOM_CFG_FILE = 'custom.cbor'
+
+HAVE_CODEC = importlib.util.find_spec('cbor2') is not None
+
+
+@unittest.skipUnless(HAVE_CODEC, "cbor2 is not installed")
+class ConfigCborTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.c = configcbor.Config(force=True)
+
+    def tearDown(self):
+        for name in (CUSTOM_CFG_FILE, self.c.DEFAULT_CFG_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_default_init_and_cfg_getter(self):
+        self.assertEqual(self.c.cfg, self.c.DEFAULT_CFG_DICT)
+        self.assertEqual(os.path.basename(self.c.cfgfile), self.c.DEFAULT_CFG_FILE)
+
+    def test_write_read_basic(self):
+        self.c.cfg = D
+        self.c.write()
+        self.assertEqual(self.c.read(), D)
+
+    def test_init_reads_existing_cfgfile(self):
+        configcbor.Config(cfgdict=D, cfgfile=CUSTOM_CFG_FILE, force=True)
+        c = configcbor.Config(cfgfile=CUSTOM_CFG_FILE)
+        self.assertEqual(c.cfg, D)
+
+    def test_write_thru_enabled_via_constructor(self):
+        c = configcbor.Config(cfgfile=CUSTOM_CFG_FILE, force=True, write_thru=True)
+        c.cfg = {'width': 12}
+        self.assertEqual(c.read(), {'width': 12})
+
+    def test_cfgfile_is_binary_and_smaller_than_json(self):
+        c = configcbor.Config(cfgdict=D, cfgfile=CUSTOM_CFG_FILE, force=True)
+        j = configjson.Config(cfgdict=D, cfgfile='custom.json', force=True)
+        try:
+            self.assertLess(os.path.getsize(c.cfgfile), os.path.getsize(j.cfgfile))
+        finally:
+            os.remove(j.cfgfile)
+
+    def test_journal(self):
+        c = configcbor.Config(cfgdict=dict(D), cfgfile=CUSTOM_CFG_FILE, force=True)
+        c.journal = True
+        c.commit()
+        c.cfg = dict(c.cfg, verbose=False)
+        c.commit()
+        try:
+            self.assertEqual(configcbor.Config(cfgfile=CUSTOM_CFG_FILE).cfg['verbose'], False)
+        finally:
+            os.remove(c.journalfile)
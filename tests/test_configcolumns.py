@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configcolumns unit tests
+"""
+import os.path
+import importlib.util
+
+# module under test
+import configcolumns
+
+import configjson
+import configstats
+
+# unit testing framweork
+import unittest
+
+D = {'Balancer' : {'backends' : [{'host' : 'alpha', 'port' : 8080, 'weight' : 0.5},
+                                  {'host' : 'beta',  'port' : 8081, 'weight' : 1.5},
+                                  {'host' : 'gamma', 'port' : 8082, 'weight' : 2.0}]},
+     'name'     : 'lb'}
+
+COLUMNS_FILE = 'columns.json'
+
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+@unittest.skipUnless(HAVE_NUMPY, "numpy is not installed")
+class ConfigColumnsTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.c = configjson.Config(D, cfgfile=COLUMNS_FILE, force=True)
+
+    def tearDown(self):
+        f = os.path.abspath(COLUMNS_FILE)
+        if os.path.exists(f):
+            os.remove(f)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_columns(self):
+        cols = self.c.columns('/Balancer/backends')
+        self.assertEqual(list(cols), ['host', 'port', 'weight'])
+        self.assertEqual(cols['host'].tolist(), ['alpha', 'beta', 'gamma'])
+        self.assertEqual(cols['port'].dtype.kind, 'i')
+        self.assertEqual(cols['weight'].sum(), 4.0)
+        with self.assertRaises(ValueError):
+            cols['port'][0] = 1
+
+    def test_structured(self):
+        arr = self.c.columns(('Balancer', 'backends'), fields=('port', 'weight'), structured=True)
+        self.assertEqual(arr.dtype.names, ('port', 'weight'))
+        self.assertEqual(arr['port'].tolist(), [8080, 8081, 8082])
+        self.assertEqual(arr[1]['weight'], 1.5)
+
+    def test_missing_and_nested_values(self):
+        records = [{'a' : 1, 'b' : [1, 2]}, {'a' : None, 'b' : [3, 4]}]
+        cols = configcolumns.columns(records, fields=('a', 'b', 'c'))
+        self.assertEqual(cols['a'].dtype, object)
+        self.assertEqual(cols['b'][1], [3, 4])
+        self.assertEqual(cols['c'].tolist(), [None, None])
+
+    def test_not_records(self):
+        with self.assertRaises(TypeError):
+            self.c.columns('/Balancer')
+        with self.assertRaises(TypeError):
+            self.c.columns('/name')
+        with self.assertRaises(KeyError):
+            self.c.columns('/Balancer/servers')
+
+    def test_cached_until_cfg_changes(self):
+        self.c.stats = configstats.Stats()
+        first  = self.c.columns('/Balancer/backends')
+        second = self.c.columns('/Balancer/backends')
+        self.assertIs(first['port'], second['port'])
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+        self.c.cfg = {'Balancer' : {'backends' : [{'port' : 1}]}}
+        self.assertEqual(self.c.columns('/Balancer/backends')['port'].tolist(), [1])
+
+    def test_cache_follows_changes_inside_cfg(self):
+        self.c.stats = configstats.Stats()
+        ports = self.c.columns('/Balancer/backends')['port'].tolist()
+        self.c.cfg['Balancer']['backends'][0]['port'] = 1
+        self.assertEqual(self.c.columns('/Balancer/backends')['port'].tolist(), [1] + ports[1:])
+        self.c.cfg['Balancer']['backends'].append({'host' : 'delta', 'port' : 2, 'weight' : 1.0})
+        self.assertEqual(self.c.columns('/Balancer/backends')['port'].tolist(), [1] + ports[1:] + [2])
+        self.assertEqual(self.c.stats['cache_hits'], 0)
+
+        # a change elsewhere keeps the arrays
+        self.c.cfg['name'] = 'changed'
+        self.c.columns('/Balancer/backends')
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+    def test_compact_records(self):
+        c = configjson.Config(cfgfile=COLUMNS_FILE, compact=True)
+        c.stats = configstats.Stats()
+        arr = c.columns('/Balancer/backends', structured=True)
+        self.assertEqual(arr['host'].tolist(), ['alpha', 'beta', 'gamma'])
+        self.assertIs(c.columns('/Balancer/backends', structured=True), arr)
+        self.assertEqual(c.stats['cache_hits'], 1)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configcompact unit tests
+"""
+import os.path
+import json
+import math
+import pickle
+import tracemalloc
+
+# module under test
+import configcompact
+
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+COMPACT_JSON_FILE = 'compact.json'
+COMPACT_YAML_FILE = 'compact.yaml'
+
+ROUTES = {'version' : 1,
+          'routes'  : [{'prefix' : '10.0.%d.0/24' % i, 'next_hop' : '192.168.0.%d' % (i % 4),
+                        'metric' : i % 10, 'weight' : 0.5, 'enabled' : True} for i in range(64)],
+          'ports'   : list(range(1000, 1100)),
+          'loads'   : [i / 4 for i in range(32)],
+          'mixed'   : [1, 2.5, 'three', None]}
+
+
+class ConfigCompactTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        for name in (COMPACT_JSON_FILE, COMPACT_YAML_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_compact_representation(self):
+        cfg = configcompact.compact(ROUTES)
+        self.assertEqual(cfg, ROUTES)
+        self.assertIsInstance(cfg['routes'], configcompact.FrozenList)
+        # the first dictionary with a set of keys may not be a Record, those after it are
+        self.assertIsInstance(cfg['routes'][1], configcompact.Record)
+        self.assertIs(type(cfg['routes'][1]), type(cfg['routes'][63]))
+        self.assertEqual(cfg['ports'].typecode, 'q')
+        self.assertEqual(cfg['loads'].typecode, 'd')
+        self.assertEqual(cfg['mixed'], (1, 2.5, 'three', None))
+        # repeated values are shared
+        self.assertIs(cfg['routes'][1]['next_hop'], cfg['routes'][5]['next_hop'])
+
+    def test_record_mapping_interface(self):
+        r = configcompact.compact([{'a' : 1, 'b' : [2]}, {'a' : 3, 'b' : [4]}])[1]
+        self.assertEqual(list(r), ['a', 'b'])
+        self.assertEqual(len(r), 2)
+        self.assertIn('a', r)
+        self.assertNotIn(0, r)
+        self.assertEqual(r['b'], [4])
+        self.assertEqual(r.get('c', 'default'), 'default')
+        self.assertEqual(dict(r.items()), {'a' : 3, 'b' : [4]})
+        self.assertEqual(r, {'a' : 3, 'b' : [4]})
+        self.assertNotEqual(r, {'a' : 3})
+        self.assertNotEqual(r, (3, [4]))
+        self.assertNotEqual((3, [4]), r)
+        self.assertFalse(r == (3, [4]))
+        with self.assertRaises(KeyError):
+            r['c']
+        with self.assertRaises(TypeError):
+            r['a'] = 2
+
+    def test_signed_zero_and_nan(self):
+        cfg = configcompact.compact({'a' : 0.0, 'b' : -0.0, 'c' : float('nan'), 'd' : -1.5, 'e' : -1.5})
+        self.assertEqual(math.copysign(1.0, cfg['a']), 1.0)
+        self.assertEqual(math.copysign(1.0, cfg['b']), -1.0)
+        self.assertTrue(math.isnan(cfg['c']))
+        self.assertEqual(cfg['d'], -1.5)
+
+        cfg = configcompact.compact({'b' : -0.0, 'a' : 0.0})
+        self.assertEqual(math.copysign(1.0, cfg['a']), 1.0)
+
+    def test_thaw_and_pickle(self):
+        cfg = configcompact.compact(ROUTES)
+        self.assertEqual(configcompact.thaw(cfg), ROUTES)
+        self.assertIs(type(configcompact.thaw(cfg)['ports']), list)
+        self.assertEqual(pickle.loads(pickle.dumps(cfg)), ROUTES)
+
+    def test_compact_uses_less_memory(self):
+        big  = {'routes' : [dict(r, prefix='10.%d.0.0/16' % i) for i, r in enumerate(ROUTES['routes'] * 50)]}
+        text = json.dumps(big)
+
+        def traced(parse):
+            tracemalloc.start()
+            cfg  = parse()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return(size)
+
+        plain   = traced(lambda: json.loads(text))
+        compact = traced(lambda: json.loads(text, object_pairs_hook=configcompact.Compactor().mapping))
+        self.assertLess(compact, plain * 0.75)
+
+    def test_json_config_compact_mode(self):
+        configjson.Config(ROUTES, cfgfile=COMPACT_JSON_FILE, force=True)
+
+        c = configjson.Config(cfgfile=COMPACT_JSON_FILE, compact=True)
+        self.assertTrue(configcompact.is_compact(c.cfg))
+        self.assertEqual(c.cfg, ROUTES)
+        self.assertEqual(c.view.routes[3].prefix, '10.0.3.0/24')
+
+        c.write()
+        self.assertEqual(configjson.Config(cfgfile=COMPACT_JSON_FILE).cfg, ROUTES)
+
+    def test_compact_property(self):
+        c = configyaml.Config(ROUTES, cfgfile=COMPACT_YAML_FILE, force=True)
+        self.assertFalse(c.compact)
+        with self.assertRaises(TypeError):
+            c.compact = 'yes'
+
+        c.compact = True
+        c.read()
+        self.assertTrue(configcompact.is_compact(c.cfg))
+        self.assertEqual(c.cfg, ROUTES)
+        c.write()
+        self.assertEqual(configyaml.Config(cfgfile=COMPACT_YAML_FILE).cfg, ROUTES)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configconvert unit tests
+"""
+import os
+import shutil
+import tempfile
+
+# module under test
+import configconvert
+
+import config
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+D = {'Logging' : {'LogFileName' : 'logfile.log'}, 'Application' : {'media' : ['avi', '.mp4']}}
+
+
+class ConfigConvertTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        self.dst = os.path.join(self.tmp, 'dst')
+        os.makedirs(os.path.join(self.src, 'sub'))
+        configjson.Config(D, cfgfile=os.path.join(self.src, 'a.json'), force=True)
+        configjson.Config({'x' : 1}, cfgfile=os.path.join(self.src, 'sub', 'b.json'), force=True)
+        with open(os.path.join(self.src, 'README.txt'), 'w') as fp:
+            fp.write('not a configuration\n')
+
+    def tearDown(self):
+        config.clear_format_cache()
+        shutil.rmtree(self.tmp)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_convert_file_matches_config_write(self):
+        dst = os.path.join(self.tmp, 'a.yaml')
+        configconvert.convert_file(os.path.join(self.src, 'a.json'), dst)
+        expected = os.path.join(self.tmp, 'expected.yaml')
+        configyaml.Config(D, cfgfile=expected, force=True)
+        with open(dst) as fp1, open(expected) as fp2:
+            self.assertEqual(fp1.read(), fp2.read())
+
+    def test_convert_multi_document_yaml(self):
+        src = os.path.join(self.tmp, 'multi.yaml')
+        with open(src, 'w') as fp:
+            fp.write('a: 1\n---\nb: 2\n---\nc: 3\n')
+        dst = os.path.join(self.tmp, 'multi.json')
+
+        self.assertEqual(configconvert.convert_file(src, dst), 3)
+        self.assertEqual(list(configconvert.documents(dst)), [{'a' : 1}, {'b' : 2}, {'c' : 3}])
+
+        back = os.path.join(self.tmp, 'back.yaml')
+        configconvert.convert_file(dst, back)
+        self.assertEqual(list(configconvert.documents(back)), [{'a' : 1}, {'b' : 2}, {'c' : 3}])
+
+    def test_convert_compressed(self):
+        src = os.path.join(self.src, 'c.json.gz')
+        configjson.Config(D, cfgfile=src, force=True)
+        dst = os.path.join(self.tmp, 'multi.json.xz')
+        with open(os.path.join(self.tmp, 'multi.yaml'), 'w') as fp:
+            fp.write('a: 1\n---\nb: 2\n')
+        self.assertEqual(configconvert.convert_file(os.path.join(self.tmp, 'multi.yaml'), dst), 2)
+        self.assertEqual(list(configconvert.documents(dst)), [{'a' : 1}, {'b' : 2}])
+
+        self.assertEqual(configconvert.target_path(src, self.src, self.dst, 'yaml'), os.path.join(self.dst, 'c.yaml'))
+        configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        self.assertEqual(configyaml.Config(cfgfile=os.path.join(self.dst, 'c.yaml')).cfg, D)
+
+    def test_convert_tree(self):
+        report = configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=2)
+        self.assertEqual((report.converted, report.skipped, report.failed), (2, 0, []))
+        self.assertEqual(configyaml.Config(cfgfile=os.path.join(self.dst, 'a.yaml')).cfg, D)
+        self.assertEqual(configyaml.Config(cfgfile=os.path.join(self.dst, 'sub', 'b.yaml')).cfg, {'x' : 1})
+        self.assertIn('files/s', str(report))
+
+    def test_convert_tree_skips_other_files(self):
+        for name in ('NOTES.txt', 'run.sh', 'Makefile'):
+            with open(os.path.join(self.src, name), 'w') as fp:
+                fp.write('echo hi\n')
+        # the JSON files are the target format already, the rest are not configurations
+        report = configconvert.convert_tree(self.src, self.dst, 'json', jobs=1)
+        self.assertEqual(report.converted, 0)
+        self.assertFalse(os.path.exists(self.dst))
+
+        configyaml.Config(D, cfgfile=os.path.join(self.src, 'c.yaml'))
+        report = configconvert.convert_tree(self.src, self.dst, 'json', jobs=1)
+        self.assertEqual(report.converted, 1)
+        self.assertEqual(sorted(os.listdir(self.dst)), [configconvert.MANIFEST_FILE, 'c.json'])
+
+    def test_json_lines(self):
+        src = os.path.join(self.tmp, 'lines.json')
+        with open(src, 'w') as fp:
+            fp.write('{"a": 1}\n\n{"b": 2}\n')
+        docs = configconvert.documents(src)
+        self.assertEqual(next(docs), {'a' : 1})
+        self.assertEqual(list(docs), [{'b' : 2}])
+        self.assertEqual(list(configconvert.documents(os.path.join(self.src, 'a.json'))), [D])
+
+        with open(src, 'w') as fp:
+            fp.write('')
+        self.assertEqual(list(configconvert.documents(src)), [])
+
+    def test_convert_tree_skips_up_to_date(self):
+        configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        report = configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        self.assertEqual((report.converted, report.skipped), (0, 2))
+
+    def test_convert_tree_skips_touched_but_unchanged(self):
+        configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        src = os.path.join(self.src, 'a.json')
+        dst = os.path.join(self.dst, 'a.yaml')
+        later = os.path.getmtime(dst) + 10
+        os.utime(src, (later, later))
+
+        report = configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        self.assertEqual((report.converted, report.skipped), (0, 2))
+
+    def test_convert_tree_reconverts_changed(self):
+        configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        src = os.path.join(self.src, 'a.json')
+        dst = os.path.join(self.dst, 'a.yaml')
+        configjson.Config({'changed' : True}, cfgfile=src, force=True)
+        later = os.path.getmtime(dst) + 10
+        os.utime(src, (later, later))
+
+        report = configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        self.assertEqual((report.converted, report.skipped), (1, 1))
+        self.assertEqual(configyaml.Config(cfgfile=dst).cfg, {'changed' : True})
+
+    def test_convert_tree_reports_failures(self):
+        with open(os.path.join(self.src, 'bad.json'), 'w') as fp:
+            fp.write('{not json')
+        report = configconvert.convert_tree(self.src, self.dst, 'yaml', jobs=1)
+        self.assertEqual(report.converted, 2)
+        self.assertEqual(len(report.failed), 1)
+
+    def test_main(self):
+        self.assertEqual(configconvert.main([self.src, self.dst, '--to', 'json', '--from', 'json', '--jobs', '1', '--force']), 0)
+        self.assertTrue(os.path.exists(os.path.join(self.dst, 'a.json')))
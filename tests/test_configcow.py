@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configcow unit tests
+"""
+import os.path
+import copy
+import json
+import pickle
+import threading
+import time
+from unittest import mock
+
+# module under test
+import configcow
+
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+COW_JSON_FILE_1 = 'cow1.json'
+COW_JSON_FILE_2 = 'cow2.json'
+COW_YAML_FILE   = 'cow.yaml'
+
+
+class DefaultsConfig(configjson.Config):
+
+    DEFAULT_CFG_DICT = {'Logging'     : {'level' : 'DEBUG', 'handlers' : ['console']},
+                        'Application' : {'size' : {'width' : 80, 'height' : 24}}}
+
+
+class ConfigCowTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        for name in (COW_JSON_FILE_1, COW_JSON_FILE_2, COW_YAML_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def source(self):
+        return({'a' : {'b' : {'c' : 1}, 'd' : [1, 2]}, 'e' : {'f' : 2}, 'g' : 3})
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_share_only_wraps_plain_dicts(self):
+        d = self.source()
+        self.assertIsInstance(configcow.share(d), configcow.CowDict)
+        self.assertIsInstance(configcow.share(configcow.share(d)), configcow.CowDict)
+
+        class Other(dict):
+            pass
+        o = Other()
+        self.assertIs(configcow.share(o), o)
+
+    def test_changes_copy_only_the_touched_path(self):
+        src = self.source()
+        cow = configcow.share(src)
+        cow['a']['b']['c'] = 99
+
+        self.assertEqual(src['a']['b']['c'], 1)
+        self.assertEqual(cow['a']['b']['c'], 99)
+        # the untouched sections are still shared
+        self.assertIs(dict.__getitem__(cow, 'e'), src['e'])
+        self.assertIs(dict.__getitem__(dict.__getitem__(cow, 'a'), 'd'), src['a']['d'])
+
+    def test_lists_are_copied(self):
+        src = self.source()
+        cow = configcow.share(src)
+        cow['a']['d'].append(3)
+        self.assertEqual(src['a']['d'], [1, 2])
+        self.assertEqual(cow['a']['d'], [1, 2, 3])
+
+    def test_threads_get_one_copy(self):
+        cow     = configcow.share({'d' : [1, 2]})
+        barrier = threading.Barrier(4)
+        fetched = []
+        deepcopy = copy.deepcopy
+
+        def slow_deepcopy(value, *args):
+            # widens the window between seeing the list unowned and storing its copy
+            time.sleep(0.05)
+            return(deepcopy(value, *args))
+
+        def fetch():
+            barrier.wait()
+            fetched.append(cow['d'])
+
+        with mock.patch('copy.deepcopy', slow_deepcopy):
+            threads = [threading.Thread(target=fetch) for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertTrue(all(d is cow['d'] for d in fetched))
+
+    def test_dict_methods(self):
+        src = self.source()
+        cow = configcow.share(src)
+        cow.get('e')['f'] = 5
+        cow.setdefault('a')['new'] = True
+        cow.setdefault('h', {})['i'] = 1
+        self.assertEqual(cow.pop('e'), {'f' : 5})
+        cow.update(g=4)
+        del cow['h']
+
+        self.assertEqual(cow, {'a' : {'b' : {'c' : 1}, 'd' : [1, 2], 'new' : True}, 'g' : 4})
+        self.assertEqual(src, self.source())
+
+        cow.clear()
+        self.assertEqual(cow, {})
+        self.assertEqual(src, self.source())
+
+    def test_iteration_copies(self):
+        src = self.source()
+        cow = configcow.share(src)
+        for k, v in cow.items():
+            if isinstance(v, dict):
+                v['leak'] = True
+        for v in cow.values():
+            if isinstance(v, dict):
+                v['leak'] = True
+        self.assertEqual(src, self.source())
+        self.assertTrue(cow['e']['leak'])
+
+        # dict() and update() fetch each value, rather than take dict's fast path
+        src = self.source()
+        cow = configcow.share(src)
+        d = dict(cow, g=4)
+        d['a']['b']['c'] = 2
+        {}.update(configcow.share(src))
+        other = configcow.share(d)
+        other['e']['f'] = 5
+        self.assertEqual(src, self.source())
+
+        # the sections of a copy are copied again by both
+        cow = configcow.share(src)
+        cow['e']['f'] = 6
+        copied = cow.copy()
+        cow['e']['f'] = 7
+        self.assertEqual(copied['e']['f'], 6)
+        self.assertEqual(src, self.source())
+
+    def test_transaction_idiom(self):
+        d = self.source()
+        c = configjson.Config(d, cfgfile=COW_JSON_FILE_1, force=True)
+        c.cfg = dict(c.cfg, verbose=True)
+        c.cfg['a']['b']['c'] = 'X'
+        for k, v in c.cfg.items():
+            if k == 'e':
+                v['f'] = 'X'
+        self.assertEqual(d, self.source())
+        # writing and taking snapshots still share the untouched sections
+        c.write()
+        c.snapshot()
+        self.assertIs(dict.__getitem__(dict.__getitem__(c.cfg, 'a'), 'd'), d['a']['d'])
+
+    def test_serializes_as_a_dict(self):
+        cow = configcow.share(self.source())
+        self.assertEqual(json.loads(json.dumps(cow, indent=4)), self.source())
+        self.assertIs(type(copy.deepcopy(cow)), dict)
+        self.assertEqual(pickle.loads(pickle.dumps(cow)), self.source())
+
+    def test_instances_share_defaults(self):
+        a = DefaultsConfig(cfgfile=COW_JSON_FILE_1, force=True)
+        b = DefaultsConfig(cfgfile=COW_JSON_FILE_2, force=True)
+        self.assertIs(dict.__getitem__(a.cfg, 'Application'), dict.__getitem__(b.cfg, 'Application'))
+
+        a.cfg['Logging']['level'] = 'INFO'
+        a.cfg['Logging']['handlers'].append('file')
+
+        self.assertEqual(b.cfg['Logging'], {'level' : 'DEBUG', 'handlers' : ['console']})
+        self.assertEqual(DefaultsConfig.DEFAULT_CFG_DICT['Logging'], {'level' : 'DEBUG', 'handlers' : ['console']})
+        self.assertIs(dict.__getitem__(a.cfg, 'Application'), DefaultsConfig.DEFAULT_CFG_DICT['Application'])
+
+        a.write()
+        self.assertEqual(a.read()['Logging'], {'level' : 'INFO', 'handlers' : ['console', 'file']})
+
+    def test_passed_cfgdict_is_not_changed(self):
+        d = self.source()
+        c = configjson.Config(d, cfgfile=COW_JSON_FILE_1, force=True)
+        c.cfg['a']['b']['c'] = 2
+        self.assertEqual(d, self.source())
+
+    def test_yaml_writes_cow_dicts(self):
+        for typ in ('safe', 'rt'):
+            c = configyaml.Config(self.source(), cfgfile=COW_YAML_FILE, force=True, typ=typ)
+            self.assertEqual(configyaml.Config(cfgfile=COW_YAML_FILE).cfg, self.source())
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
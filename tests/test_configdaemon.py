@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configdaemon unit tests
+"""
+import os
+import os.path
+import json
+import time
+import socket
+import importlib.util
+from unittest import mock
+
+# module under test
+import configdaemon
+
+import configjson
+import configstats
+
+# unit testing framweork
+import unittest
+
+DAEMON_SOCKET    = 'daemon.sock'
+DAEMON_JSON_FILE = 'daemon.json'
+DAEMON_NEW_FILE  = 'daemon_new.json'
+
+CFG = {'Logging' : {'level' : 'DEBUG', 'handlers' : ['console']}, 'workers' : 4}
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix domain sockets are not available")
+class ConfigDaemonTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        configjson.Config(CFG, cfgfile=DAEMON_JSON_FILE, force=True)
+        self.daemon  = configdaemon.Daemon(DAEMON_SOCKET, interval=0.05)
+        self.daemon.start()
+        self.clients = []
+
+    def tearDown(self):
+        for c in self.clients:
+            c.close()
+        self.daemon.close()
+        for name in (DAEMON_JSON_FILE, DAEMON_NEW_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def client(self, cfgfile=DAEMON_JSON_FILE, **kwargs):
+        c = configdaemon.Config(cfgfile=cfgfile, address=DAEMON_SOCKET, **kwargs)
+        self.clients.append(c)
+        return(c)
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the daemon")
+            time.sleep(0.01)
+
+    def edit_file(self, cfgdict):
+        # a different size, so the change is seen whatever the mtime resolution
+        with open(DAEMON_JSON_FILE, mode='w') as fp:
+            json.dump(cfgdict, fp, indent=len(cfgdict) % 7 + 1)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_socket_permissions(self):
+        self.assertEqual(os.stat(DAEMON_SOCKET).st_mode & 0o777, 0o600)
+
+    def test_private_socket_dir(self):
+        directory = os.path.abspath('daemon_sockets')
+        self.addCleanup(os.rmdir, directory)
+        configdaemon._private_dir(directory)
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+        configdaemon._private_dir(directory)
+        os.chmod(directory, 0o755)
+        with self.assertRaises(configdaemon.ConfigDaemonException):
+            configdaemon._private_dir(directory)
+
+    def test_not_a_socket(self):
+        with open(DAEMON_NEW_FILE, 'w') as fp:
+            fp.write('{}')
+        with self.assertRaises(configdaemon.ConfigDaemonException):
+            configdaemon.Daemon(DAEMON_NEW_FILE)
+        self.assertTrue(os.path.isfile(DAEMON_NEW_FILE))
+
+    @unittest.skipUnless(hasattr(socket, 'SO_PEERCRED'), "the system does not report the peer's user")
+    def test_other_users_refused(self):
+        peer_uid = configdaemon._peer_uid
+        self.addCleanup(setattr, configdaemon, '_peer_uid', peer_uid)
+        self.assertEqual(peer_uid(self.client()._listener[0]), os.getuid())
+
+        # a daemon run by another user
+        configdaemon._peer_uid = lambda sock: os.getuid() + 1 if not sock.getsockname() else os.getuid()
+        with self.assertRaises(configdaemon.ConfigDaemonException):
+            self.client()
+
+        # a client run by another user
+        configdaemon._peer_uid = lambda sock: os.getuid() + 1 if sock.getsockname() else os.getuid()
+        with self.assertRaises(OSError):
+            self.client()
+
+    def test_read_and_get(self):
+        c = self.client()
+        self.assertEqual(c.cfg, CFG)
+        self.assertIsInstance(c, configdaemon.Config)
+        self.assertEqual(c.get('/Logging/level'), 'DEBUG')
+        self.assertEqual(c.get(['Logging', 'handlers', 0]), 'console')
+        with self.assertRaises(KeyError):
+            c.get('/missing')
+
+    def test_cache_hits_until_notified(self):
+        c = self.client()
+        c.stats = configstats.Stats()
+        self.assertFalse(c.stale)
+        c.read()
+        c.get('/workers')
+        self.assertEqual(c.stats['cache_hits'], 2)
+
+        self.edit_file(dict(CFG, workers=8))
+        self.wait_for(lambda: c.stale)
+        self.assertEqual(c.get('/workers'), 8)
+        self.assertEqual(c.read()['workers'], 8)
+        self.assertFalse(c.stale)
+        self.assertEqual(c.stats['cache_hits'], 2)
+
+    def test_local_changes_do_not_touch_cache(self):
+        c = self.client()
+        c.cfg['Logging']['handlers'].append('file')
+        self.assertEqual(c.get('/Logging/handlers'), ['console'])
+        self.assertEqual(c.read()['Logging']['handlers'], ['console'])
+
+    def test_write_notifies_other_clients(self):
+        a = self.client()
+        b = self.client()
+        a.cfg['workers'] = 16
+        a.write()
+        self.wait_for(lambda: b.stale)
+        self.assertEqual(b.read()['workers'], 16)
+        self.assertEqual(configjson.Config(cfgfile=DAEMON_JSON_FILE).cfg['workers'], 16)
+        # the daemon does not reload its own write
+        self.assertEqual(self.daemon.check(), [])
+
+    def test_write_thru(self):
+        c = self.client(write_thru=True)
+        c.cfg = {'workers' : 2}
+        self.assertEqual(self.client().cfg, {'workers' : 2})
+
+    def test_new_file(self):
+        c = self.client(DAEMON_NEW_FILE, cfgdict={'new' : True})
+        self.assertTrue(os.path.isfile(DAEMON_NEW_FILE))
+        self.assertEqual(self.client(DAEMON_NEW_FILE).cfg, {'new' : True})
+        c.cfg['new'] = False
+        c.write()
+        self.assertFalse(c.read()['new'])
+
+    def test_compact(self):
+        c = self.client(compact=True)
+        self.assertEqual(c.cfg['Logging']['level'], 'DEBUG')
+        with self.assertRaises(TypeError):
+            c.cfg['workers'] = 1
+
+    def test_only_listed_files(self):
+        self.daemon.close()
+        self.daemon = configdaemon.Daemon(DAEMON_SOCKET, [DAEMON_JSON_FILE])
+        self.daemon.start()
+        self.assertEqual(self.client().cfg, CFG)
+        with self.assertRaises(configdaemon.ConfigDaemonException):
+            self.client(DAEMON_NEW_FILE)
+
+    def test_daemon_gone(self):
+        c = self.client()
+        self.daemon.close()
+        self.wait_for(lambda: c.stale)
+        with self.assertRaises(OSError):
+            c.read()
+        self.assertEqual(c.cfg, CFG)
+
+    def test_daemon_restarted(self):
+        c = self.client()
+        c.stats = configstats.Stats()
+        c.cfg['workers'] = 2
+        c.write()
+        c.write()
+        self.daemon.close()
+        self.wait_for(lambda: c.stale)
+
+        # the new daemon's versions start afresh
+        self.edit_file(dict(CFG, workers=6))
+        self.daemon = configdaemon.Daemon(DAEMON_SOCKET, interval=0.05)
+        self.daemon.start()
+        self.assertEqual(c.read()['workers'], 6)
+        self.assertFalse(c.stale)
+        self.assertEqual(c.get('/workers'), 6)
+        self.assertEqual(c.stats['cache_hits'], 1)
+
+        # and its notifications are heard
+        self.edit_file(dict(CFG, workers=7))
+        self.wait_for(lambda: c.stale)
+        self.assertEqual(c.read()['workers'], 7)
+
+
+class ConfigDaemonNoUnixSocketsTest(unittest.TestCase):
+
+    def test_import_without_unix_sockets(self):
+        # as on Windows, where neither exists
+        with mock.patch.object(socket, 'AF_UNIX', create=True), mock.patch.object(os, 'getuid', create=True), \
+             mock.patch.dict(os.environ, {'USERNAME' : 'user'}):
+            del socket.AF_UNIX
+            del os.getuid
+            spec   = importlib.util.spec_from_file_location('configdaemon_nounix', configdaemon.__file__)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.assertTrue(module.DEFAULT_SOCKET_DIR)
+            with self.assertRaises(module.ConfigDaemonException):
+                module.Daemon(DAEMON_SOCKET)
+            with self.assertRaises(module.ConfigDaemonException):
+                module.Config(cfgfile=DAEMON_JSON_FILE, address=DAEMON_SOCKET)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
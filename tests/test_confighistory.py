@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+confighistory unit tests
+"""
+import os
+import os.path
+import time
+import shutil
+
+# module under test
+import confighistory
+
+import configjson
+import configyaml
+import configstats
+
+# unit testing framweork
+import unittest
+
+HISTORY_JSON_FILE = 'history_test.json'
+HISTORY_YAML_FILE = 'history_test.yaml'
+HISTORY_GZ_FILE   = 'history_test.json.gz'
+
+
+class ConfigHistoryTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.tearDown()
+
+    def tearDown(self):
+        for name in (HISTORY_JSON_FILE, HISTORY_YAML_FILE, HISTORY_GZ_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+            shutil.rmtree(f + '.history', ignore_errors=True)
+
+    def objects(self, c):
+        return(sorted(name for _, _, names in os.walk(os.path.join(c.historydir, 'objects')) for name in names))
+
+    def written(self, levels, cfgfile=HISTORY_JSON_FILE, cls=configjson.Config):
+        c = cls({'level' : levels[0]}, cfgfile=cfgfile)
+        c.history = True
+        for level in levels[1:]:
+            c.cfg = {'level' : level}
+            c.write()
+        return(c)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_versions(self):
+        c = self.written(['INFO', 'DEBUG', 'WARNING'])
+        # the file written before the history was on is kept too
+        versions = c.versions()
+        self.assertEqual(len(versions), 3)
+        self.assertEqual(len(self.objects(c)), 3)
+        self.assertTrue(all(isinstance(v, confighistory.Version) for v in versions))
+
+        # writing the same content again adds nothing
+        c.write()
+        self.assertEqual(len(c.versions()), 3)
+
+        history = confighistory.History(c.historydir)
+        with open(HISTORY_JSON_FILE, 'rb') as fp:
+            self.assertEqual(history.get(versions[-1].hash), fp.read())
+        self.assertEqual(history.latest(), versions[-1])
+        self.assertIsNone(history.tree(versions[-1]))
+
+    def test_rollback(self):
+        c = self.written(['INFO', 'DEBUG', 'WARNING'])
+        c.stats = configstats.Stats()
+        self.assertEqual(c.rollback(), {'level' : 'DEBUG'})
+        self.assertEqual(c.stats['cache_hits'], 1)
+        self.assertEqual(configjson.Config(cfgfile=HISTORY_JSON_FILE).cfg, {'level' : 'DEBUG'})
+
+        # a rollback is a new version, its content stored once
+        self.assertEqual(len(c.versions()), 4)
+        self.assertEqual(len(self.objects(c)), 3)
+
+        # the version written before the history was on was never parsed by it
+        self.assertEqual(c.rollback(3), {'level' : 'INFO'})
+        self.assertEqual(c.stats['cache_hits'], 1)
+        self.assertEqual(c.stats['reads'], 1)
+
+        # another instance has the history but not the parsed versions
+        other = configjson.Config(cfgfile=HISTORY_JSON_FILE)
+        other.stats = configstats.Stats()
+        self.assertEqual(other.rollback(2), {'level' : 'WARNING'})
+        self.assertEqual(other.stats['reads'], 1)
+
+        with self.assertRaises(confighistory.ConfigHistoryException):
+            c.rollback(len(c.versions()))
+
+    def test_rollback_parses_keys_the_format_changes(self):
+        c = self.written([1, 2])
+        c.cfg = {1 : 'x'}
+        c.write()
+        c.cfg = {'level' : 3}
+        c.write()
+        c.stats = configstats.Stats()
+        # JSON wrote the key 1 as '1', which is what a read gives back
+        self.assertEqual(c.rollback(), {'1' : 'x'})
+        self.assertEqual(c.stats['reads'], 1)
+        self.assertEqual(c.stats['cache_hits'], 0)
+
+    def test_outside_changes_kept(self):
+        c = self.written(['INFO', 'DEBUG'])
+        with open(HISTORY_JSON_FILE, 'w') as fp:
+            fp.write('{"level": "ERROR"}')
+        c.cfg = {'level' : 'WARNING'}
+        c.write()
+        self.assertEqual(len(c.versions()), 4)
+        self.assertEqual(c.rollback(), {'level' : 'ERROR'})
+
+    def test_prune(self):
+        c = self.written(['A', 'B', 'C', 'D', 'E'])
+        self.assertEqual(c.prune_history(keep=2), 3)
+        self.assertEqual(len(c.versions()), 2)
+        self.assertEqual(len(self.objects(c)), 2)
+        self.assertEqual(c.rollback(), {'level' : 'D'})
+        self.assertEqual(c.prune_history(keep=10), 0)
+
+        time.sleep(0.01)
+        c.cfg = {'level' : 'F'}
+        c.write()
+        self.assertEqual(c.prune_history(max_age=0), 3)
+        self.assertEqual(len(c.versions()), 1)
+        self.assertEqual(self.objects(c), [c.versions()[0].hash[2:]])
+
+        c.HISTORY_LIMIT = 2
+        for level in 'GHIJ':
+            c.cfg = {'level' : level}
+            c.write()
+        self.assertEqual(len(c.versions()), 2)
+
+    def test_formats(self):
+        c = self.written(['INFO', 'DEBUG'], HISTORY_GZ_FILE)
+        with open(HISTORY_GZ_FILE, 'rb') as fp:
+            self.assertEqual(fp.read(2), b'\x1f\x8b')
+        self.assertEqual(c.rollback(), {'level' : 'INFO'})
+        self.assertEqual(configjson.Config(cfgfile=HISTORY_GZ_FILE).cfg, {'level' : 'INFO'})
+
+        c = self.written(['INFO', 'DEBUG'], HISTORY_YAML_FILE, configyaml.Config)
+        self.assertEqual(c.rollback(), {'level' : 'INFO'})
+        self.assertEqual(configyaml.Config(cfgfile=HISTORY_YAML_FILE).cfg, {'level' : 'INFO'})
+
+        with self.assertRaises(TypeError):
+            c.history = 'yes'
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
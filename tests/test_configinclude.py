@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configinclude unit tests
+"""
+import os
+import os.path
+import json
+import shutil
+
+# module under test
+import configinclude
+
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+INCLUDE_DIR = 'include_test'
+
+
+class ConfigIncludeTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        os.makedirs(os.path.join(INCLUDE_DIR, 'sub'), exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(INCLUDE_DIR, ignore_errors=True)
+
+    def path(self, name):
+        return(os.path.join(INCLUDE_DIR, name))
+
+    def put(self, name, text):
+        # the size is bumped each time, so the change is seen whatever the mtime resolution
+        path = self.path(name)
+        pad  = os.path.getsize(path) + 1 if os.path.exists(path) else 0
+        with open(path, mode='w') as fp:
+            fp.write(text + ' ' * pad + '\n')
+        return(path)
+
+    def put_json(self, name, cfgdict):
+        return(self.put(name, json.dumps(cfgdict)))
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_directive(self):
+        self.assertEqual(configinclude.directive({'$include' : 'a.json'}), configinclude.Include('a.json'))
+        self.assertIsNone(configinclude.directive({'$include' : 'a.json', 'other' : 1}))
+        self.assertIsNone(configinclude.directive({'$include' : 1}))
+        self.assertIsNone(configinclude.directive('a.json'))
+
+    def test_json_includes(self):
+        self.put_json('shared.json', {'level' : 'INFO'})
+        self.put_json('sub/db.json', {'host' : 'localhost', 'logging' : {'$include' : '../shared.json'}})
+        top = self.put_json('app.json', {'db' : {'$include' : 'sub/db.json'},
+                                         'logging' : {'$include' : 'shared.json'},
+                                         'plugins' : [{'$include' : 'shared.json'}]})
+
+        c = configjson.Config(cfgfile=top, includes=True)
+        self.assertEqual(c.cfg, {'db' : {'host' : 'localhost', 'logging' : {'level' : 'INFO'}},
+                                 'logging' : {'level' : 'INFO'},
+                                 'plugins' : [{'level' : 'INFO'}]})
+        # the shared file is parsed once, and each site gets a copy of its own
+        self.assertEqual(c._resolver.parses, 3)
+        self.assertIsNot(c.cfg['logging'], c.cfg['plugins'][0])
+        deps = c.dependencies
+        self.assertEqual(deps[os.path.abspath(top)], {os.path.abspath(self.path('sub/db.json')),
+                                                     os.path.abspath(self.path('shared.json'))})
+
+        # nothing changed: nothing parsed again
+        c.read()
+        self.assertEqual(c._resolver.parses, 3)
+
+        # off by default
+        self.assertEqual(configjson.Config(cfgfile=top).cfg['logging'], {'$include' : 'shared.json'})
+        self.assertEqual(configjson.Config(cfgfile=top).dependencies, {})
+
+    def test_reload_parses_only_changed_files(self):
+        self.put_json('db.json', {'host' : 'localhost'})
+        self.put_json('log.json', {'level' : 'INFO'})
+        top = self.put_json('app.json', {'db' : {'$include' : 'db.json'}, 'log' : {'$include' : 'log.json'}})
+
+        c = configjson.Config(cfgfile=top, includes=True)
+        db, version = c.cfg['db'], c.cfgversion
+        self.assertEqual(c._resolver.parses, 3)
+        self.assertEqual(c.reload()['log'], {'level' : 'INFO'})
+        self.assertEqual(c.cfgversion, version)
+
+        self.put_json('log.json', {'level' : 'DEBUG'})
+        self.assertEqual(c.reload()['log'], {'level' : 'DEBUG'})
+        self.assertEqual(c._resolver.parses, 4)
+        self.assertIs(c.cfg['db'], db)
+        self.assertGreater(c.cfgversion, version)
+
+        # a change to the top file loads everything that changed
+        self.put_json('app.json', {'db' : {'$include' : 'db.json'}})
+        self.assertEqual(c.reload(), {'db' : {'host' : 'localhost'}})
+        self.assertEqual(c._resolver.parses, 5)
+
+    def test_write_restores_directives(self):
+        self.put_json('log.json', {'level' : 'INFO'})
+        top = self.put_json('app.json', {'log' : {'$include' : 'log.json'}, 'workers' : 4})
+
+        c = configjson.Config(cfgfile=top, includes=True)
+        c.cfg['workers'] = 8
+        c.write()
+        with open(top) as fp:
+            self.assertEqual(json.load(fp), {'log' : {'$include' : 'log.json'}, 'workers' : 8})
+        self.assertEqual(c.cfg['log'], {'level' : 'INFO'})
+
+        c.cfg['log']['level'] = 'DEBUG'
+        with self.assertRaises(configinclude.ConfigIncludeException):
+            c.write()
+        del c.cfg['log']
+        with self.assertRaises(configinclude.ConfigIncludeException):
+            c.write()
+
+        # with includes off, everything is written to the cfgfile
+        c.includes = False
+        c.write()
+        self.assertEqual(configjson.Config(cfgfile=top).cfg, {'workers' : 8})
+        with self.assertRaises(TypeError):
+            c.includes = 'yes'
+
+    def test_top_level_directive(self):
+        self.put_json('base.json', {'workers' : 4})
+        top = self.put_json('app.json', {'$include' : 'base.json'})
+
+        c = configjson.Config(cfgfile=top, includes=True)
+        cfg = c.cfg
+        self.assertEqual(cfg, {'workers' : 4})
+        self.put_json('base.json', {'workers' : 8})
+        self.assertEqual(c.reload(), {'workers' : 8})
+        self.assertIs(c.cfg, cfg)
+        self.assertEqual(c._resolver.parses, 3)
+
+        c.write()
+        with open(top) as fp:
+            self.assertEqual(json.load(fp), {'$include' : 'base.json'})
+
+        c.cfg['workers'] = 16
+        with self.assertRaises(configinclude.ConfigIncludeException):
+            c.write()
+
+    def test_cycle(self):
+        self.put_json('a.json', {'b' : {'$include' : 'b.json'}})
+        self.put_json('b.json', {'a' : {'$include' : 'a.json'}})
+        with self.assertRaises(configinclude.ConfigIncludeException):
+            configjson.Config(cfgfile=self.path('a.json'), includes=True)
+
+    def test_compact(self):
+        self.put_json('log.json', {'level' : 'INFO'})
+        top = self.put_json('app.json', {'log' : {'$include' : 'log.json'}})
+        c = configjson.Config(cfgfile=top, includes=True, compact=True)
+        self.assertEqual(c.cfg['log']['level'], 'INFO')
+        with self.assertRaises(TypeError):
+            c.cfg['log'] = {}
+        self.put_json('log.json', {'level' : 'DEBUG'})
+        self.assertEqual(c.reload()['log']['level'], 'DEBUG')
+
+    def test_yaml_includes(self):
+        self.put('log.yaml', "level: INFO\nhandlers:\n    - console")
+        self.put('db.yaml', "host: localhost")
+        top = self.put('app.yaml', "log: !include log.yaml\ndb:\n    $include: db.yaml\nworkers: 4")
+
+        c = configyaml.Config(cfgfile=top, includes=True)
+        self.assertEqual(c.cfg, {'log' : {'level' : 'INFO', 'handlers' : ['console']},
+                                 'db' : {'host' : 'localhost'}, 'workers' : 4})
+        c.cfg['workers'] = 8
+        c.write()
+        with open(top) as fp:
+            text = fp.read()
+        self.assertIn("log: !include log.yaml", text)
+        self.assertIn("$include: db.yaml", text)
+        self.assertEqual(configyaml.Config(cfgfile=top, includes=True).cfg['workers'], 8)
+
+    def test_yaml_round_trip(self):
+        self.put('log.yaml', "level: INFO   # the default\n")
+        top = self.put('app.yaml', "# application\nlog: !include log.yaml\nworkers: 4  # per cpu\n")
+
+        c = configyaml.Config(cfgfile=top, includes=True, typ='rt')
+        self.assertEqual(c.cfg['log']['level'], 'INFO')
+        c.cfg['workers'] = 8
+        c.write()
+        with open(top) as fp:
+            text = fp.read()
+        self.assertIn("# application", text)
+        self.assertIn("log: !include log.yaml", text)
+        self.assertIn("workers: 8  # per cpu", text)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
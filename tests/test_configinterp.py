@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configinterp unit tests
+"""
+import os
+import os.path
+import json
+
+# module under test
+import configinterp
+
+import configjson
+import configstats
+import configsnapshot
+
+# unit testing framweork
+import unittest
+
+INTERP_JSON_FILE = 'interp.json'
+
+CFG = {'base'   : 'https://api.example.com',
+       'users'  : '${base}/users',
+       'server' : {'host' : 'localhost', 'port' : 8080, 'url' : 'http://${server.host}:${/server/port}'},
+       'port'   : '${/server/port}',
+       'copy'   : '${server}',
+       'home'   : '${env:INTERP_HOME}/app',
+       'cache'  : '${env:INTERP_CACHE:-/tmp/cache}',
+       'price'  : '$${amount}',
+       'hosts'  : ['${server.host}', 'other'],
+       'first'  : '${hosts.0}'}
+
+
+class ConfigInterpTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.env = {'INTERP_HOME' : '/home/me'}
+        self.cfg = json.loads(json.dumps(CFG))
+
+    def tearDown(self):
+        f = os.path.abspath(INTERP_JSON_FILE)
+        if os.path.exists(f):
+            os.remove(f)
+
+    def resolved(self, interpolator, cfg, previous=None):
+        snapshot = configsnapshot.freeze(cfg, previous)
+        evaluated = interpolator.update(snapshot)
+        return(snapshot, evaluated, configsnapshot.thaw(interpolator.tree))
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_parse(self):
+        self.assertEqual(configinterp.parse('a.b.0'), ('path', ('a', 'b', '0')))
+        self.assertEqual(configinterp.parse('/a/b~1c'), ('path', ('a', 'b/c')))
+        self.assertEqual(configinterp.parse('env:HOME'), ('env', 'HOME', None))
+        self.assertEqual(configinterp.parse('env:HOME:-/root'), ('env', 'HOME', '/root'))
+        self.assertTrue(configinterp.is_template('$${x}'))
+        self.assertFalse(configinterp.is_template('$5'))
+
+    def test_interpolation(self):
+        i = configinterp.Interpolator(self.env)
+        _, evaluated, tree = self.resolved(i, self.cfg)
+        self.assertEqual(len(evaluated), 9)
+        self.assertEqual(tree['users'], 'https://api.example.com/users')
+        self.assertEqual(tree['server']['url'], 'http://localhost:8080')
+        self.assertEqual(tree['port'], 8080)
+        self.assertEqual(tree['copy'], {'host' : 'localhost', 'port' : 8080, 'url' : 'http://localhost:8080'})
+        self.assertEqual(tree['home'], '/home/me/app')
+        self.assertEqual(tree['cache'], '/tmp/cache')
+        self.assertEqual(tree['price'], '${amount}')
+        self.assertEqual(tree['first'], 'localhost')
+
+    def test_only_dependents_are_evaluated(self):
+        i = configinterp.Interpolator(self.env)
+        snapshot, _, _ = self.resolved(i, self.cfg)
+
+        self.assertEqual(i.update(snapshot), set())
+
+        self.cfg['server']['host'] = 'example.com'
+        snapshot, evaluated, tree = self.resolved(i, self.cfg, snapshot)
+        self.assertEqual(evaluated, {('server', 'url'), ('copy',), ('hosts', '0'), ('first',)})
+        self.assertEqual(tree['first'], 'example.com')
+        self.assertEqual(tree['copy']['url'], 'http://example.com:8080')
+
+        self.env['INTERP_HOME'] = '/root'
+        self.assertEqual(i.update(snapshot), {('home',)})
+        self.assertEqual(i.tree['home'], '/root/app')
+
+        # a new reference, and a reference removed
+        self.cfg['admin'] = '${users}/admin'
+        del self.cfg['price']
+        snapshot, evaluated, tree = self.resolved(i, self.cfg, snapshot)
+        self.assertEqual(evaluated, {('admin',)})
+        self.assertEqual(tree['admin'], 'https://api.example.com/users/admin')
+
+    def test_through_a_section_reference(self):
+        cfg = {'db'    : {'host' : 'db.local', 'port' : 5432, 'url' : '${db.host}:${db.port}'},
+               'alias' : '${db}',
+               'p'     : '${alias.port}',
+               'url'   : 'postgres://${/alias/url}',
+               'other' : '${again.host}',
+               'again' : '${alias}'}
+        i = configinterp.Interpolator(self.env)
+        snapshot, _, tree = self.resolved(i, cfg)
+        self.assertEqual(tree['p'], 5432)
+        self.assertEqual(tree['url'], 'postgres://db.local:5432')
+        self.assertEqual(tree['other'], 'db.local')
+
+        cfg['db']['port'] = 6543
+        snapshot, evaluated, tree = self.resolved(i, cfg, snapshot)
+        self.assertEqual(evaluated, {('db', 'url'), ('alias',), ('p',), ('url',), ('again',), ('other',)})
+        self.assertEqual(tree['p'], 6543)
+        self.assertEqual(tree['url'], 'postgres://db.local:6543')
+
+        with self.assertRaises(configinterp.ConfigInterpolationException):
+            configinterp.Interpolator(self.env).update(configsnapshot.freeze({'a' : '${b.c}', 'b' : '${d}', 'd' : 'x'}))
+
+    def test_errors(self):
+        for cfg in ({'a' : '${b}', 'b' : '${c}', 'c' : '${a}'},
+                    {'a' : {'b' : '${a}'}},
+                    {'a' : '${missing}'},
+                    {'a' : '${env:INTERP_MISSING}'},
+                    {'a' : {'b' : 1}, 'c' : 'x${a}'}):
+            i = configinterp.Interpolator(self.env)
+            with self.assertRaises(configinterp.ConfigInterpolationException):
+                i.update(configsnapshot.freeze(cfg))
+
+        # fixed, it resolves
+        i = configinterp.Interpolator(self.env)
+        cfg = {'a' : '${b}', 'b' : '${a}'}
+        with self.assertRaises(configinterp.ConfigInterpolationException):
+            i.update(configsnapshot.freeze(cfg))
+        cfg['b'] = 'B'
+        i.update(configsnapshot.freeze(cfg))
+        self.assertEqual(i.tree['a'], 'B')
+
+    def test_config_interpolated(self):
+        os.environ['INTERP_HOME'] = '/home/me'
+        try:
+            c = configjson.Config(self.cfg, cfgfile=INTERP_JSON_FILE, force=True)
+            c.stats = configstats.Stats()
+            self.assertEqual(c.interpolated['users'], 'https://api.example.com/users')
+            self.assertEqual(c.interpolated['home'], '/home/me/app')
+            self.assertEqual(c.stats['cache_hits'], 1)
+
+            c.cfg['base'] = 'https://example.org'
+            self.assertEqual(c.interpolated['users'], 'https://example.org/users')
+            self.assertEqual(c._interpolator.evaluations, 10)
+
+            # write() persists the references, not their values
+            c.write()
+            self.assertEqual(configjson.Config(cfgfile=INTERP_JSON_FILE).cfg['users'], '${base}/users')
+            self.assertEqual(c.cfg['users'], '${base}/users')
+
+            # only what changed on disk is evaluated again after a read()
+            data = json.loads(json.dumps(c.cfg))
+            data['server']['port'] = 9090
+            with open(INTERP_JSON_FILE, 'w') as fp:
+                json.dump(data, fp)
+            c.read()
+            self.assertEqual(c.interpolated['port'], 9090)
+            self.assertEqual(c._interpolator.evaluations, 13)
+        finally:
+            del os.environ['INTERP_HOME']
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
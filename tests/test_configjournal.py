@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configjournal unit tests
+"""
+import os.path
+
+# module under test
+import configjournal
+
+import configsnapshot
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+D = {'Logging'     : {'LogFileName' : 'logfile.log', 'level' : 'DEBUG'},
+     'Application' : {'width' : 225, 'media' : ['avi', '.mp4']}}
+
+JOURNAL_JSON_FILE = 'journal.json'
+JOURNAL_YAML_FILE = 'journal.yaml'
+
+
+class ConfigJournalTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        for name in (JOURNAL_JSON_FILE, JOURNAL_YAML_FILE):
+            for f in (name, name + '.journal'):
+                f = os.path.abspath(f)
+                if os.path.exists(f):
+                    os.remove(f)
+
+    def new_config(self, cfgdict=D):
+        c = configjson.Config(cfgdict=configsnapshot.thaw(configsnapshot.freeze(cfgdict)),
+                              cfgfile=JOURNAL_JSON_FILE, force=True, write_thru=True)
+        c.journal = True
+        c.write()
+        return(c)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_pointer_escaping(self):
+        path = configjournal.pointer(['a/b', 'c~d'])
+        self.assertEqual(path, '/a~1b/c~0d')
+        self.assertEqual(configjournal.split(path), ['a/b', 'c~d'])
+
+    def test_diff_and_patch(self):
+        old = configsnapshot.freeze(D)
+        cfg = configsnapshot.thaw(old)
+        cfg['Logging']['level'] = 'INFO'
+        cfg['Application']['height'] = 24
+        del cfg['Application']['media']
+        ops = configjournal.diff(old, configsnapshot.freeze(cfg, old))
+
+        self.assertEqual(len(ops), 3)
+        self.assertEqual(configjournal.patch(configsnapshot.thaw(old), ops), cfg)
+
+    def test_commit_appends_only_the_change(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+
+        self.assertEqual(configjournal.records(c.journalfile),
+                         [[{'op' : 'replace', 'path' : '/Logging/level', 'value' : 'INFO'}]])
+
+    def test_write_thru_assignment_uses_journal(self):
+        c = self.new_config()
+        with open(c.cfgfile) as fp:
+            before = fp.read()
+
+        c.cfg = dict(c.cfg, verbose=True)
+
+        with open(c.cfgfile) as fp:
+            self.assertEqual(fp.read(), before)
+        self.assertTrue(os.path.exists(c.journalfile))
+
+    def test_read_replays_journal(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        c.cfg['Application']['media'].append('.mkv')
+        c.commit()
+
+        c2 = configjson.Config(cfgfile=JOURNAL_JSON_FILE)
+        self.assertEqual(c2.cfg['Logging']['level'], 'INFO')
+        self.assertEqual(c2.cfg['Application']['media'], ['avi', '.mp4', '.mkv'])
+
+    def test_write_compacts_journal(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        c.write()
+
+        self.assertFalse(os.path.exists(c.journalfile))
+        self.assertEqual(configjson.Config(cfgfile=JOURNAL_JSON_FILE).cfg, c.cfg)
+
+    def test_journal_compacted_past_limit(self):
+        c = self.new_config()
+        c.JOURNAL_LIMIT = 200
+        for i in range(20):
+            c.cfg['Application']['width'] = i
+            c.commit()
+            self.assertLessEqual(os.path.getsize(c.journalfile) if os.path.exists(c.journalfile) else 0, 200)
+
+        self.assertEqual(configjson.Config(cfgfile=JOURNAL_JSON_FILE).cfg['Application']['width'], 19)
+
+    def test_interrupted_append_is_ignored(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        with open(c.journalfile, 'a') as jp:
+            jp.write('[{"op":"replace","pa')
+        c.cfg['Application']['width'] = 1
+        c.commit()
+
+        c2 = configjson.Config(cfgfile=JOURNAL_JSON_FILE)
+        self.assertEqual(c2.cfg['Logging']['level'], 'INFO')
+        self.assertEqual(c2.cfg['Application']['width'], 1)
+
+    def test_replay_after_interrupted_write(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        c.cfg['Logging']['extra'] = {'depth' : 1}
+        c.commit()
+        c.cfg['Logging']['extra']['depth'] = 2
+        c.commit()
+        del c.cfg['Logging']['extra']
+        del c.cfg['Application']
+        c.commit()
+
+        # the cfgfile is written, but the writer stops before removing the journal
+        with open(c.journalfile, 'rb') as jp:
+            journal = jp.read()
+        c.write()
+        with open(c.journalfile, 'wb') as jp:
+            jp.write(journal)
+
+        c2 = configjson.Config(cfgfile=JOURNAL_JSON_FILE)
+        self.assertEqual(c2.cfg, c.cfg)
+        self.assertNotIn('Application', c2.cfg)
+        self.assertFalse(os.path.exists(c.journalfile))
+
+    def test_stale_journal_does_not_undo_other_writes(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        with open(c.journalfile, 'rb') as jp:
+            journal = jp.read()
+        self.assertTrue(journal.startswith(b'{"base":'))
+
+        # another program writes the cfgfile, and the journal is left behind
+        other = configjson.Config(cfgfile=JOURNAL_JSON_FILE)
+        other.cfg['Logging']['level'] = 'ERROR'
+        other.write()
+        with open(c.journalfile, 'wb') as jp:
+            jp.write(journal)
+
+        self.assertEqual(configjson.Config(cfgfile=JOURNAL_JSON_FILE).cfg['Logging']['level'], 'ERROR')
+        self.assertFalse(os.path.exists(c.journalfile))
+
+    def test_corrupt_record_raises(self):
+        c = self.new_config()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+        configjournal.append(c.journalfile, [{'op' : 'remove', 'path' : '/Logging/missing'}])
+        with self.assertRaises(KeyError):
+            configjson.Config(cfgfile=JOURNAL_JSON_FILE)
+
+    def test_transaction_commits_one_record(self):
+        c = self.new_config()
+        with c.transaction():
+            c.cfg['Logging']['level'] = 'INFO'
+            c.cfg['Application']['width'] = 80
+
+        self.assertEqual(len(configjournal.records(c.journalfile)), 1)
+
+    def test_yaml_journal(self):
+        c = configyaml.Config(cfgobj=configsnapshot.thaw(configsnapshot.freeze(D)),
+                              cfgfile=JOURNAL_YAML_FILE, force=True)
+        c.journal = True
+        c.commit()
+        c.cfg['Logging']['level'] = 'INFO'
+        c.commit()
+
+        self.assertTrue(os.path.exists(c.journalfile))
+        self.assertEqual(configyaml.Config(cfgfile=JOURNAL_YAML_FILE).cfg['Logging']['level'], 'INFO')
+
+    def test_journal_property_type_error(self):
+        c = self.new_config()
+        with self.assertRaises(TypeError):
+            c.journal = 1
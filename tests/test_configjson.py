@@ -286,3 +286,123 @@ class ConfigJsonTest(unittest.TestCase):
         self.c.write(indent=8, sort_keys = False)
         self.assertEqual(self.c.cfg, self.c.DEFAULT_CFG_DICT)
 
+
+    def test_transaction_commits_with_one_write(self):
+        """
+        """
+        writes = []
+        self.c.writethru = True
+        self.c.write = lambda **kwargs: writes.append(dict(self.c.cfg))
+
+        with self.c.transaction():
+            self.c.cfg = {'width': 12}
+            self.c.cfg = dict(self.c.cfg, height=84)
+            self.c.cfg['depth'] = 3
+
+        self.assertEqual(writes, [{'width': 12, 'height': 84, 'depth': 3}])
+
+    def test_transaction_writes_cfgfile_on_commit(self):
+        """
+        """
+        with self.c.transaction():
+            self.c.cfg = dict(D)
+
+        self.assertEqual(self.c.read(), D)
+
+    def test_transaction_rolls_back_on_exception(self):
+        """
+        """
+        self.c.cfg = {'width': 12, 'nested': {'a': 1}}
+        before = self.c.cfg
+
+        with self.assertRaises(RuntimeError):
+            with self.c.transaction():
+                self.c.cfg['width'] = 99
+                self.c.cfg['nested']['a'] = 2
+                self.c.cfg = {'other': True}
+                raise RuntimeError("abandon")
+
+        self.assertIs(self.c.cfg, before)
+        self.assertEqual(self.c.cfg, {'width': 12, 'nested': {'a': 1}})
+
+    def test_transaction_rolls_back_on_validation_failure(self):
+        """
+        """
+        from config import ConfigValidationException
+
+        def validate(cfgdict):
+            if cfgdict.get('width', 0) < 0:
+                raise ConfigValidationException("width must not be negative")
+
+        self.c.validate = validate
+        self.c.cfg = {'width': 12}
+
+        with self.assertRaises(ConfigValidationException):
+            with self.c.transaction():
+                self.c.cfg['width'] = -1
+
+        self.assertEqual(self.c.cfg, {'width': 12})
+        self.assertEqual(self.c.read(), self.c.DEFAULT_CFG_DICT)
+
+    def test_transaction_rolls_back_compact_cfg(self):
+        """
+        """
+        configjson.Config({'width': 12, 'nested': {'a': 1}}, cfgfile=self.c.cfgfile, force=True)
+        c = configjson.Config(cfgfile=self.c.cfgfile, compact=True)
+        before = c.cfg
+
+        with self.assertRaises(RuntimeError):
+            with c.transaction():
+                c.cfg = {'width': 99}
+                raise RuntimeError("abandon")
+
+        self.assertIs(c.cfg, before)
+        self.assertEqual(c.cfg, {'width': 12, 'nested': {'a': 1}})
+
+        # a failed write is rolled back too
+        c.validate = lambda cfgdict: None
+        with self.assertRaises(TypeError):
+            with c.transaction():
+                c.cfg = {'width': object()}
+        self.assertEqual(c.cfg, {'width': 12, 'nested': {'a': 1}})
+        self.assertEqual(configjson.Config(cfgfile=self.c.cfgfile).cfg, {'width': 12, 'nested': {'a': 1}})
+
+    def test_nested_transaction_writes_once(self):
+        """
+        """
+        writes = []
+        self.c.write = lambda **kwargs: writes.append(dict(self.c.cfg))
+
+        with self.c.transaction():
+            with self.c.transaction():
+                self.c.cfg = {'width': 12}
+            self.assertEqual(writes, [])
+
+        self.assertEqual(writes, [{'width': 12}])
+
+    def test_render_cache_reuses_unchanged_output(self):
+        """
+        """
+        import configstats
+        self.assertFalse(self.c.render_cache)
+        self.c.render_cache = True
+        self.c.stats = configstats.Stats()
+        self.c.cfg = dict(D)
+
+        self.c.write()
+        self.c.write()
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+        self.c.cfg['verbose'] = False
+        self.c.write()
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+        self.assertEqual(self.c.read(), {'log' : D['log'], 'verbose' : False})
+
+        self.c.write(indent=2)
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+    def test_render_cache_setter_invalid_input(self):
+        """
+        """
+        with self.assertRaises(TypeError):
+            self.c.render_cache = 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configpreload unit tests
+"""
+import os
+import os.path
+import gc
+
+# module under test
+import configpreload
+
+import configjson
+import configyaml
+import configcompact
+from benchmarks import prefork
+
+# unit testing framweork
+import unittest
+
+PRELOAD_JSON_FILE = 'preload.json'
+PRELOAD_YAML_FILE = 'preload.yaml'
+
+CFG = {'routes' : [{'path' : '/a', 'port' : 1}, {'path' : '/b', 'port' : 2}]}
+
+HAS_FORK  = hasattr(os, 'fork')
+HAS_PROC  = os.path.exists('/proc/self/smaps')
+
+
+class ConfigPreloadTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        configjson.Config(CFG, cfgfile=PRELOAD_JSON_FILE, force=True)
+        configyaml.Config(CFG, cfgfile=PRELOAD_YAML_FILE, force=True)
+
+    def tearDown(self):
+        configpreload.release()
+        for name in (PRELOAD_JSON_FILE, PRELOAD_YAML_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def in_child(self, func):
+        # returns the byte string func() returns in a forked child
+        rfd, wfd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(rfd)
+            try:
+                os.write(wfd, func())
+            finally:
+                os._exit(0)
+        os.close(wfd)
+        with os.fdopen(rfd, 'rb') as fp:
+            data = fp.read()
+        os.waitpid(pid, 0)
+        return(data)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_preload_compacts_and_freezes(self):
+        configs = configpreload.preload([PRELOAD_JSON_FILE, PRELOAD_YAML_FILE])
+        self.assertEqual(len(configs), 2)
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+        c = configpreload.preloaded(PRELOAD_YAML_FILE)
+        self.assertIsInstance(c, configyaml.Config)
+        self.assertTrue(configcompact.is_compact(c.cfg))
+        self.assertEqual(c.cfg['routes'][1]['port'], 2)
+        self.assertEqual(set(configpreload.preloaded()), {os.path.abspath(PRELOAD_JSON_FILE),
+                                                          os.path.abspath(PRELOAD_YAML_FILE)})
+        with self.assertRaises(KeyError):
+            configpreload.preloaded('other.json')
+
+        configpreload.release()
+        self.assertEqual(gc.get_freeze_count(), 0)
+        self.assertEqual(configpreload.preloaded(), {})
+
+    def test_preload_options(self):
+        c = configpreload.preload([PRELOAD_JSON_FILE], compact=False, freeze=False)[os.path.abspath(PRELOAD_JSON_FILE)]
+        self.assertEqual(gc.get_freeze_count(), 0)
+        c.cfg['routes'].append({'path' : '/c', 'port' : 3})
+
+    @unittest.skipUnless(HAS_FORK, "requires os.fork")
+    def test_post_fork_hook(self):
+        configpreload.preload([PRELOAD_JSON_FILE])
+        hook = lambda configs: os.environ.__setitem__('PRELOAD_TEST', ','.join(os.path.basename(p) for p in configs))
+        configpreload.add_post_fork_hook(hook)
+        try:
+            result = self.in_child(lambda: os.environ['PRELOAD_TEST'].encode('utf-8'))
+        finally:
+            configpreload.remove_post_fork_hook(hook)
+        self.assertEqual(result, PRELOAD_JSON_FILE.encode('utf-8'))
+        self.assertNotIn('PRELOAD_TEST', os.environ)
+
+    @unittest.skipUnless(HAS_PROC, "requires /proc")
+    def test_memory_usage(self):
+        usage = configpreload.memory_usage()
+        self.assertGreater(usage['rss'], 0)
+        self.assertAlmostEqual(usage['shared'] + usage['private'], usage['rss'], delta=usage['rss'] * 0.05)
+
+    @unittest.skipUnless(HAS_FORK and HAS_PROC, "requires os.fork and /proc")
+    def test_prefork_benchmark(self):
+        results = prefork.run(size='1KB', depth=1)
+        self.assertEqual([(r['compact'], r['freeze']) for r in results], list(prefork.SCENARIOS))
+        self.assertTrue(all(r['shared'] > 0 for r in results))
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
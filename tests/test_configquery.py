@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configquery unit tests
+"""
+import os
+import os.path
+import types
+import shutil
+
+# module under test
+import configquery
+
+import configjson
+import configyaml
+import configshard
+import configsqlite
+import configsnapshot
+
+# unit testing framweork
+import unittest
+
+QUERY_JSON_FILE   = 'query_test.json'
+QUERY_YAML_FILE   = 'query_test.yaml'
+QUERY_SQLITE_FILE = 'query_test.sqlite'
+QUERY_SHARD_DIR   = 'query_test.d'
+
+CFG = {'services' : {'web' : {'endpoints' : [{'path' : '/', 'timeout' : 5}, {'path' : '/health', 'timeout' : 1}],
+                              'port'      : 80,
+                              'tls'       : {'enabled' : True}},
+                     'api' : {'endpoints' : [{'path' : '/v1', 'timeout' : 30}],
+                              'port'      : 8080,
+                              'tls_cert'  : 'api.pem'}},
+       'api.v2'   : {'port' : 8082},
+       'a/b'      : {'~c' : 1},
+       'timeout'  : 60}
+
+
+class ConfigQueryTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        for name in (QUERY_JSON_FILE, QUERY_YAML_FILE, QUERY_SQLITE_FILE, QUERY_SQLITE_FILE + '-wal', QUERY_SQLITE_FILE + '-shm'):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+        shutil.rmtree(QUERY_SHARD_DIR, ignore_errors=True)
+
+    def find(self, selector, tree=CFG):
+        return(list(configquery.find(selector, tree)))
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_selectors(self):
+        timeouts = [('/services/web/endpoints/0/timeout', 5), ('/services/web/endpoints/1/timeout', 1),
+                    ('/services/api/endpoints/0/timeout', 30)]
+        self.assertEqual(self.find('services.*.endpoints[*].timeout'), timeouts)
+        self.assertEqual(self.find('$.services.*.endpoints.*.timeout'), timeouts)
+        self.assertEqual(self.find('/services/*/endpoints/*/timeout'), timeouts)
+        self.assertEqual(self.find('**.timeout'), timeouts + [('/timeout', 60)])
+        self.assertEqual(self.find('..timeout'), self.find('**.timeout'))
+        self.assertEqual(self.find('services.**.timeout'), timeouts)
+
+        self.assertEqual(self.find('services.web.port'), [('/services/web/port', 80)])
+        self.assertEqual(self.find('services.web.endpoints[1].path'), [('/services/web/endpoints/1/path', '/health')])
+        self.assertEqual(self.find('services.web.endpoints.1.path'), [('/services/web/endpoints/1/path', '/health')])
+        self.assertEqual(self.find('services.*.tls*'), [('/services/web/tls', {'enabled' : True}),
+                                                        ('/services/api/tls_cert', 'api.pem')])
+        self.assertEqual(self.find("['api.v2'].port"), [('/api.v2/port', 8082)])
+        self.assertEqual(self.find('$["a/b"]["~c"]'), [('/a~1b/~0c', 1)])
+        self.assertEqual(self.find('/a~1b/~0c'), [('/a~1b/~0c', 1)])
+
+        # a value comes before the values under it
+        self.assertEqual([p for p, _ in self.find('services.web.**')][:3],
+                         ['/services/web', '/services/web/endpoints', '/services/web/endpoints/0'])
+        self.assertEqual(self.find(''), [('', CFG)])
+        self.assertEqual(self.find('services.web.port.*'), [])
+        self.assertEqual(self.find('services.web.endpoints[5]'), [])
+        self.assertEqual(self.find('services.missing.port'), [])
+
+        # YAML's integer keys, and snapshots
+        self.assertEqual(self.find('codes.404', {'codes' : {404 : 'missing'}}), [('/codes/404', 'missing')])
+        self.assertEqual(self.find('services.api.port', configsnapshot.freeze(CFG)), [('/services/api/port', 8080)])
+
+    def test_invalid_selectors(self):
+        for selector in ('services.', 'services...port', 'services[0', 'services[x]', 'a[0]b', 'a.[*'):
+            with self.assertRaises(configquery.ConfigQueryException):
+                configquery.compile(selector)
+        with self.assertRaises(configquery.ConfigQueryException):
+            configquery.compile(None)
+
+    def test_compiled_once(self):
+        query = configquery.compile('services.*.port')
+        self.assertIs(configquery.compile('services.*.port'), query)
+        self.assertEqual(query.prefix, ('services',))
+        self.assertTrue(query.match(('services', 'web', 'port')))
+        self.assertFalse(query.match(('services', 'web')))
+        self.assertFalse(query.match(('other', 'web', 'port')))
+        self.assertEqual(configquery.compile('services.web.endpoints[0]').prefix, ('services', 'web', 'endpoints'))
+
+    def test_lazy(self):
+        c = configshard.Config(CFG['services'], cfgfile=QUERY_SHARD_DIR)
+        c = configshard.Config(cfgfile=QUERY_SHARD_DIR)
+        found = c.select('api.port')
+        self.assertIsInstance(found, types.GeneratorType)
+        self.assertFalse(c.cfg.loaded('api'))
+        self.assertEqual(list(found), [('/api/port', 8080)])
+        # only the section named is loaded
+        self.assertTrue(c.cfg.loaded('api'))
+        self.assertFalse(c.cfg.loaded('web'))
+
+        found = c.select('**')
+        self.assertEqual(next(found), ('', c.cfg))
+        self.assertFalse(c.cfg.loaded('web'))
+
+    def test_config_select(self):
+        for cls, cfgfile in ((configjson.Config, QUERY_JSON_FILE), (configyaml.Config, QUERY_YAML_FILE)):
+            c = cls(CFG, cfgfile=cfgfile)
+            self.assertEqual(list(c.select('services.*.port')), [('/services/web/port', 80), ('/services/api/port', 8080)])
+            c.cfg['services']['web']['port'] = 81
+            self.assertEqual(next(c.select('services.*.port')), ('/services/web/port', 81))
+
+    def test_sqlite_index(self):
+        c = configsqlite.Config(CFG, cfgfile=QUERY_SQLITE_FILE)
+        try:
+            for selector in ('services.*.endpoints[*].timeout', '**.timeout', 'services.web', 'services.*.tls*',
+                             'services.web.endpoints.1.path', '/a~1b/*', '**', 'missing.*'):
+                self.assertEqual(sorted(c.select(selector), key=repr), sorted(configquery.find(selector, CFG), key=repr))
+
+            # from the database, or from cfg, with its changes not yet written
+            c.cfg['services']['web']['port'] = 81
+            self.assertEqual(list(c.select('services.web.port')), [('/services/web/port', 80)])
+            self.assertEqual(list(c.select('services.web.port', database=False)), [('/services/web/port', 81)])
+            c.write()
+            self.assertEqual(list(c.select('services.web.port')), [('/services/web/port', 81)])
+        finally:
+            c.close()
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configshard unit tests
+"""
+import os
+import os.path
+import json
+import shutil
+import pickle
+
+# module under test
+import configshard
+
+import configyaml
+import configstats
+import configsnapshot
+
+# unit testing framweork
+import unittest
+
+SHARD_DIR = 'shard_test.d'
+
+CFG = {'Logging'  : {'level' : 'INFO', 'handlers' : ['console']},
+       'Database' : {'host' : 'localhost', 'port' : 5432},
+       'Cache'    : {'size' : 128}}
+
+
+class ConfigShardTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        shutil.rmtree(SHARD_DIR, ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(SHARD_DIR, ignore_errors=True)
+
+    def path(self, name):
+        return(os.path.join(SHARD_DIR, name))
+
+    def mtimes(self):
+        return({name : os.stat(self.path(name)).st_mtime_ns for name in os.listdir(SHARD_DIR)})
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_one_file_per_section(self):
+        c = configshard.Config(CFG, cfgfile=SHARD_DIR)
+        self.assertEqual(sorted(os.listdir(SHARD_DIR)), ['Cache.json', 'Database.json', 'Logging.json'])
+        with open(self.path('Database.json')) as fp:
+            self.assertEqual(json.load(fp), CFG['Database'])
+        self.assertEqual(set(c.files), set(CFG))
+
+        c = configshard.Config(cfgfile=SHARD_DIR)
+        self.assertIsInstance(c.cfg, configshard.ShardDict)
+        self.assertEqual(c.cfg, CFG)
+        self.assertEqual(configsnapshot.thaw(c.snapshot()), CFG)
+
+    def test_lazy_loading(self):
+        configshard.Config(CFG, cfgfile=SHARD_DIR)
+        c = configshard.Config(cfgfile=SHARD_DIR)
+        c.stats = configstats.Stats()
+        self.assertEqual(set(c.cfg), set(CFG))
+        self.assertIn('Cache', c.cfg)
+        self.assertEqual(len(c.cfg), 3)
+        self.assertFalse(any(c.cfg.loaded(name) for name in CFG))
+        self.assertIn('...', repr(c.cfg))
+
+        self.assertEqual(c.cfg['Logging']['level'], 'INFO')
+        self.assertTrue(c.cfg.loaded('Logging'))
+        self.assertFalse(c.cfg.loaded('Database'))
+        self.assertEqual(c.stats['reads'], 1)
+
+        self.assertEqual(c.cfg.get('Database')['port'], 5432)
+        self.assertIsNone(c.cfg.get('missing'))
+        self.assertEqual(c.stats['reads'], 2)
+
+        # a copy loads lazily too, a pickle loads everything
+        copied = c.cfg.copy()
+        self.assertFalse(copied.loaded('Cache'))
+        self.assertEqual(pickle.loads(pickle.dumps(c.cfg)), CFG)
+        self.assertEqual(dict(copied), CFG)
+
+    def test_write_changed_sections_only(self):
+        configshard.Config(CFG, cfgfile=SHARD_DIR)
+        c = configshard.Config(cfgfile=SHARD_DIR)
+        c.stats = configstats.Stats()
+        before = self.mtimes()
+
+        c.cfg['Logging']['level'] = 'DEBUG'
+        c.cfg['Database']                       # loaded, but unchanged
+        c.write()
+        self.assertEqual(c.stats['writes'], 1)
+        self.assertFalse(c.cfg.loaded('Cache'))
+        after = self.mtimes()
+        self.assertEqual(after['Database.json'], before['Database.json'])
+        self.assertEqual(after['Cache.json'], before['Cache.json'])
+        self.assertEqual(configshard.Config(cfgfile=SHARD_DIR).cfg['Logging']['level'], 'DEBUG')
+
+        # nothing changed since
+        c.write()
+        self.assertEqual(c.stats['writes'], 1)
+
+        # a new section, and one removed
+        c.cfg['Metrics'] = {'port' : 9100}
+        del c.cfg['Cache']
+        c.write()
+        self.assertEqual(sorted(os.listdir(SHARD_DIR)), ['Database.json', 'Logging.json', 'Metrics.json'])
+        self.assertEqual(configshard.Config(cfgfile=SHARD_DIR).cfg['Metrics'], {'port' : 9100})
+
+    def test_mixed_formats(self):
+        configshard.Config(CFG, cfgfile=SHARD_DIR)
+        os.remove(self.path('Cache.json'))
+        configyaml.Config({'size' : 256}, cfgfile=self.path('Cache.yaml'))
+        with open(self.path('README'), 'w') as fp:
+            fp.write("\x00not a configuration\n")
+
+        c = configshard.Config(cfgfile=SHARD_DIR, format='yaml')
+        self.assertEqual(c.format, 'yaml')
+        self.assertEqual(set(c.cfg), set(CFG))
+        c.cfg['Cache']['size'] = 512
+        c.cfg['Metrics'] = {'port' : 9100}
+        c.write()
+        self.assertEqual(configyaml.Config(cfgfile=self.path('Cache.yaml')).cfg, {'size' : 512})
+        self.assertTrue(os.path.isfile(self.path('Metrics.yaml')))
+
+        configyaml.Config({'size' : 1}, cfgfile=self.path('Cache.yml'))
+        with self.assertRaises(configshard.ConfigShardException):
+            c.read()
+
+    def test_errors(self):
+        with open(SHARD_DIR, 'w') as fp:
+            fp.write('{}')
+        try:
+            with self.assertRaises(configshard.ConfigShardException):
+                configshard.Config(CFG, cfgfile=SHARD_DIR)
+        finally:
+            os.remove(SHARD_DIR)
+
+        c = configshard.Config(CFG, cfgfile=SHARD_DIR)
+        c.cfg['workers'] = 4
+        with self.assertRaises(configshard.ConfigShardException):
+            c.write()
+        del c.cfg['workers']
+        c.cfg['../escape'] = {}
+        with self.assertRaises(configshard.ConfigShardException):
+            c.write()
+
+    def test_compact_and_force(self):
+        configshard.Config(CFG, cfgfile=SHARD_DIR)
+        c = configshard.Config(cfgfile=SHARD_DIR, compact=True)
+        with self.assertRaises(TypeError):
+            c.cfg['Logging']['level'] = 'DEBUG'
+        c.cfg['Logging'] = {'level' : 'DEBUG'}
+        c.write()
+        self.assertEqual(configshard.Config(cfgfile=SHARD_DIR).cfg['Logging'], {'level' : 'DEBUG'})
+
+        # force replaces the whole directory's contents
+        configshard.Config({'Only' : {'one' : 1}}, cfgfile=SHARD_DIR, force=True)
+        self.assertEqual(os.listdir(SHARD_DIR), ['Only.json'])
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configshm unit tests
+"""
+import os.path
+import multiprocessing
+
+# module under test
+import configshm
+
+import configjson
+import configstats
+import configsnapshot
+
+# unit testing framweork
+import unittest
+
+SHM_JSON_FILE = 'shm.json'
+
+CFG = {'Logging' : {'level' : 'DEBUG', 'handlers' : ['console']}, 'workers' : 4}
+
+
+def _child_cfg(name, queue):
+    # runs in another process
+    with configshm.Subscriber(name) as s:
+        queue.put((s.version, configsnapshot.thaw(s.cfg)))
+
+
+class ConfigShmTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.config    = configjson.Config(CFG, cfgfile=SHM_JSON_FILE, force=True)
+        self.publisher = configshm.Publisher(self.config)
+
+    def tearDown(self):
+        self.publisher.close()
+        f = os.path.abspath(SHM_JSON_FILE)
+        if os.path.exists(f):
+            os.remove(f)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_subscriber_reads_snapshot(self):
+        with configshm.Subscriber(self.publisher.name) as s:
+            self.assertEqual(s.version, 1)
+            self.assertIsInstance(s.cfg, configsnapshot.FrozenDict)
+            self.assertEqual(configsnapshot.thaw(s.cfg), CFG)
+            with self.assertRaises(TypeError):
+                s.cfg['workers'] = 8
+
+    @unittest.skipUnless(os.path.exists('/proc/self/maps'), "the system does not list a process's mappings")
+    def test_subscriber_maps_read_only(self):
+        def modes():
+            with open('/proc/self/maps') as maps:
+                return([line.split()[1] for line in maps if line.rstrip().endswith('/' + self.publisher.name)])
+        self.assertEqual(modes(), ['rw-s'])
+        with configshm.Subscriber(self.publisher.name) as s:
+            self.assertEqual(sorted(modes()), ['r--s', 'rw-s'])
+            with self.assertRaises(TypeError):
+                s._shm.buf[0] = 0
+        self.assertEqual(modes(), ['rw-s'])
+
+    def test_decodes_only_new_versions(self):
+        with configshm.Subscriber(self.publisher.name) as s:
+            first = s.cfg
+            self.assertIs(s.cfg, first)
+            self.assertFalse(s.changed)
+
+            self.assertFalse(self.publisher.publish())
+            self.assertIs(s.cfg, first)
+
+            self.config.cfg['Logging']['level'] = 'INFO'
+            self.assertTrue(self.publisher.publish())
+            self.assertTrue(s.changed)
+            self.assertEqual(s.version, 2)
+            self.assertEqual(s.cfg['Logging']['level'], 'INFO')
+            self.assertIsNot(s.cfg, first)
+
+    def test_other_process(self):
+        self.config.cfg['workers'] = 16
+        self.publisher.publish()
+        ctx   = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        child = ctx.Process(target=_child_cfg, args=(self.publisher.name, queue))
+        child.start()
+        version, cfg = queue.get(timeout=30)
+        child.join(timeout=30)
+        self.assertEqual(child.exitcode, 0)
+        self.assertEqual(version, 2)
+        self.assertEqual(cfg['workers'], 16)
+        # the child's exit left the segment in place
+        with configshm.Subscriber(self.publisher.name) as s:
+            self.assertEqual(s.cfg['workers'], 16)
+
+    def test_too_large(self):
+        self.config.cfg['big'] = 'x' * configshm.MIN_SIZE
+        with self.assertRaises(ValueError):
+            self.publisher.publish()
+        with self.assertRaises(ValueError):
+            configshm.Publisher(self.config, size=1024)
+
+    def test_not_a_publication(self):
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(create=True, size=1024)
+        try:
+            with self.assertRaises(ValueError):
+                configshm.Subscriber(shm.name)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_closed_subscriber_keeps_last_snapshot(self):
+        s = configshm.Subscriber(self.publisher.name)
+        cfg = s.cfg
+        s.close()
+        self.assertIs(s.cfg, cfg)
+
+    def test_publish_event(self):
+        stats = configstats.Stats()
+        events = []
+        stats.add_hook(lambda event, config, fields: events.append((event, fields)))
+        self.config.stats = stats
+        self.config.cfg['workers'] = 2
+        self.publisher.publish()
+        self.assertEqual(events[-1][0], 'publish')
+        self.assertGreater(events[-1][1]['bytes'], 0)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configsnapshot unit tests
+"""
+import os.path
+import threading
+
+# module under test
+import configsnapshot
+
+import configjson
+
+# unit testing framweork
+import unittest
+
+D = {'Logging'     : {'LogFileName' : 'logfile.log', 'FileLoggingLevel' : 'DEBUG'},
+     'Application' : {'width' : 225, 'media' : ['avi', '.mp4'], 'tags' : {'a', 'b'}}}
+
+SNAPSHOT_CFG_FILE = 'snapshot.json'
+
+
+class ConfigSnapshotTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        snapshot_cfg = os.path.abspath(SNAPSHOT_CFG_FILE)
+        if os.path.exists(snapshot_cfg):
+            os.remove(snapshot_cfg)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_freeze_is_immutable(self):
+        s = configsnapshot.freeze(D)
+        with self.assertRaises(TypeError):
+            s['Logging'] = {}
+        self.assertEqual(s['Application']['media'], ('avi', '.mp4'))
+        self.assertEqual(s['Application']['tags'], frozenset({'a', 'b'}))
+
+    def test_freeze_equals_and_hashes(self):
+        s1 = configsnapshot.freeze({'a' : {'b' : 1}})
+        s2 = configsnapshot.freeze({'a' : {'b' : 1}})
+        self.assertEqual(s1, s2)
+        self.assertEqual(hash(s1), hash(s2))
+        self.assertEqual(s1, {'a' : {'b' : 1}})
+
+    def test_unchanged_subtrees_are_shared(self):
+        cfg = configsnapshot.thaw(configsnapshot.freeze(D))
+        s1  = configsnapshot.freeze(cfg)
+        cfg['Logging']['FileLoggingLevel'] = 'INFO'
+        s2  = configsnapshot.freeze(cfg, s1)
+
+        self.assertIsNot(s1, s2)
+        self.assertIs(s2['Application'], s1['Application'])
+        self.assertIsNot(s2['Logging'], s1['Logging'])
+        self.assertEqual(s1['Logging']['FileLoggingLevel'], 'DEBUG')
+        self.assertEqual(s2['Logging']['FileLoggingLevel'], 'INFO')
+
+    def test_unchanged_snapshot_is_reused(self):
+        s1 = configsnapshot.freeze(D)
+        self.assertIs(configsnapshot.freeze(D, s1), s1)
+
+    def test_unchanged_snapshot_allocates_nothing(self):
+        import tracemalloc
+        cfg = {'section%d' % i : {'values' : [i, {'x' : i}], 'name' : 'n%d' % i} for i in range(1000)}
+        s1  = configsnapshot.freeze(cfg)
+        tracemalloc.start()
+        try:
+            s2   = configsnapshot.freeze(cfg, s1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertIs(s2, s1)
+        # a copy of the top level alone would take tens of kilobytes
+        self.assertLess(peak, 8192)
+
+        # after a change, the values around it are still shared
+        cfg['section500']['values'][1]['x'] = -1
+        s3 = configsnapshot.freeze(cfg, s1)
+        self.assertEqual(s3['section500']['values'][1]['x'], -1)
+        self.assertIs(s3['section500']['values'][0], s1['section500']['values'][0])
+        self.assertIs(s3['section0'], s1['section0'])
+        self.assertEqual(list(s3), list(cfg))
+        self.assertEqual(configsnapshot.thaw(s3), cfg)
+
+    def test_thaw(self):
+        self.assertEqual(configsnapshot.thaw(configsnapshot.freeze(D)), D)
+
+    def test_config_snapshot_isolated_from_mutation(self):
+        c = configjson.Config(cfgdict={'a' : {'b' : 1}, 'c' : {'d' : 2}}, cfgfile=SNAPSHOT_CFG_FILE, force=True)
+        s1 = c.snapshot()
+        c.cfg['a']['b'] = 10
+        s2 = c.snapshot()
+
+        self.assertEqual(s1['a']['b'], 1)
+        self.assertEqual(s2['a']['b'], 10)
+        self.assertIs(s1['c'], s2['c'])
+
+    def test_config_snapshot_shared_across_threads(self):
+        c = configjson.Config(cfgdict={'a' : list(range(100))}, cfgfile=SNAPSHOT_CFG_FILE, force=True)
+        s = c.snapshot()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(sum(s['a']))) for i in range(4)]
+        for t in threads:
+            t.start()
+        c.cfg = {'a' : []}
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [4950] * 4)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configsplice unit tests
+"""
+import os.path
+
+# module under test
+import configsplice
+
+import configyaml
+
+# unit testing framweork
+import unittest
+
+SPLICE_FILE = 'splice.yaml'
+
+DOC = """\
+# application settings
+name: demo          # the name shown in the title bar
+version: 3
+
+# logging
+logging:
+    level: DEBUG    # DEBUG while we test
+    file: 'app.log'
+    handlers:
+      - console
+      - file
+
+# network
+network:
+    host: localhost
+    port: 8080
+    retry:
+        count: 3
+        delay: 0.5
+"""
+
+
+class ConfigSpliceTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        with open(SPLICE_FILE, mode='w') as fp:
+            fp.write(DOC)
+
+    def tearDown(self):
+        f = os.path.abspath(SPLICE_FILE)
+        if os.path.exists(f):
+            os.remove(f)
+
+    def new_config(self):
+        return(configyaml.Config(cfgfile=SPLICE_FILE, typ='rt', incremental=True))
+
+    def text(self):
+        with open(SPLICE_FILE) as fp:
+            return(fp.read())
+
+    def reread(self):
+        return(configyaml.Config(cfgfile=SPLICE_FILE).cfg)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_incremental_setter_type_error(self):
+        c = self.new_config()
+        with self.assertRaises(TypeError):
+            c.incremental = 'yes'
+
+    def test_unchanged_write_is_identical(self):
+        c = self.new_config()
+        c.write()
+        self.assertEqual(self.text(), DOC)
+
+    def test_scalar_edit_keeps_comment(self):
+        c = self.new_config()
+        c.cfg['logging']['level'] = 'INFO'
+        c.write()
+        self.assertEqual(self.text(), DOC.replace('level: DEBUG    #', 'level: INFO    #'))
+
+    def test_quoted_scalar_edit(self):
+        c = self.new_config()
+        c.cfg['logging']['file'] = 'other.log'
+        c.write()
+        self.assertEqual(self.text(), DOC.replace("file: 'app.log'", "file: other.log"))
+
+    def test_nested_edit_touches_only_its_entry(self):
+        c = self.new_config()
+        c.cfg['logging']['handlers'].append('syslog')
+        c.write()
+        text = self.text()
+        self.assertIn('# application settings\nname: demo          # the name shown in the title bar\n', text)
+        self.assertIn('# network\nnetwork:\n    host: localhost\n', text)
+        self.assertEqual(self.reread()['logging']['handlers'], ['console', 'file', 'syslog'])
+
+    def test_add_and_remove(self):
+        c = self.new_config()
+        c.cfg['network']['retry']['backoff'] = 2
+        c.cfg['owner'] = 'ops'
+        del c.cfg['version']
+        c.write()
+        text = self.text()
+        self.assertNotIn('version', text)
+        self.assertIn('# logging\n', text)
+        cfg = self.reread()
+        self.assertEqual(cfg['network']['retry'], {'count' : 3, 'delay' : 0.5, 'backoff' : 2})
+        self.assertEqual(cfg['owner'], 'ops')
+
+    def test_repeated_writes(self):
+        c = self.new_config()
+        expected = self.reread()
+        edits = [
+            lambda cfg: cfg['network']['retry'].__setitem__('count', 5),
+            lambda cfg: cfg['network'].__setitem__('extra', {'a' : 1}),
+            lambda cfg: cfg['network']['extra'].__setitem__('b', 2),
+            lambda cfg: cfg.__setitem__('name', 'renamed'),
+            lambda cfg: cfg['network'].__delitem__('host'),
+            lambda cfg: cfg['network']['extra'].__delitem__('a'),
+            lambda cfg: cfg.__setitem__('tail', [1, 2]),
+            lambda cfg: cfg.__delitem__('logging'),
+        ]
+        for edit in edits:
+            edit(c.cfg)
+            edit(expected)
+            c.write()
+            self.assertEqual(self.reread(), expected)
+        self.assertIn('# the name shown in the title bar', self.text())
+
+    def test_flow_style_rerenders_entry(self):
+        with open(SPLICE_FILE, mode='w') as fp:
+            fp.write("# top\na: {b: 1, c: 2}\nd: 4   # four\n")
+        c = self.new_config()
+        c.cfg['a']['b'] = 9
+        c.write()
+        self.assertIsNotNone(c._splicer)
+        self.assertTrue(self.text().startswith('# top\n'))
+        self.assertTrue(self.text().endswith('d: 4   # four\n'))
+        self.assertEqual(self.reread(), {'a' : {'b' : 9, 'c' : 2}, 'd' : 4})
+
+    def test_emptied_mapping(self):
+        c = self.new_config()
+        for k in list(c.cfg['network']['retry']):
+            del c.cfg['network']['retry'][k]
+        c.write()
+        self.assertEqual(self.reread()['network']['retry'], {})
+
+    def test_cfg_assignment_falls_back(self):
+        c = self.new_config()
+        c.cfg = {'x' : 1}
+        c.write()
+        self.assertIsNone(c._splicer)
+        self.assertEqual(self.reread(), {'x' : 1})
+
+    def test_splicer_without_changes(self):
+        yaml = configyaml._ruamel_yaml().YAML(typ='rt')
+        cfgdict = yaml.load(DOC)
+        self.assertEqual(configsplice.Splicer(yaml, DOC, cfgdict).render(cfgdict), DOC)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configsqlite unit tests
+"""
+import os
+import os.path
+import json
+import sqlite3
+
+# module under test
+import configsqlite
+
+import config
+import configjson
+import configyaml
+import configstats
+
+# unit testing framweork
+import unittest
+
+SQLITE_FILE      = 'sqlite_test.sqlite'
+SQLITE_JSON_FILE = 'sqlite_test.json'
+SQLITE_YAML_FILE = 'sqlite_test.yaml'
+
+CFG = {'flags'   : {'checkout' : {'enabled' : True, 'rollout' : 0.25},
+                    'search'   : {'enabled' : False, 'regions' : ['eu', 'us']}},
+       'owners'  : {},
+       'version' : 3}
+
+
+class ConfigSQLiteTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def setUp(self):
+        self.configs = []
+
+    def tearDown(self):
+        for c in self.configs:
+            c.close()
+        for name in (SQLITE_FILE, SQLITE_FILE + '-wal', SQLITE_FILE + '-shm', SQLITE_JSON_FILE, SQLITE_YAML_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    def open(self, *args, **kwargs):
+        c = configsqlite.Config(*args, cfgfile=SQLITE_FILE, **kwargs)
+        self.configs.append(c)
+        return(c)
+
+    def rows(self):
+        with sqlite3.connect(SQLITE_FILE) as conn:
+            return(dict(conn.execute("SELECT path, value FROM config")))
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_flattened_rows(self):
+        self.open(CFG)
+        self.assertEqual(self.rows(), {'/flags/checkout/enabled' : 'true', '/flags/checkout/rollout' : '0.25',
+                                       '/flags/search/enabled' : 'false', '/flags/search/regions' : '["eu","us"]',
+                                       '/owners' : '{}', '/version' : '3'})
+        with sqlite3.connect(SQLITE_FILE) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+        c = self.open()
+        self.assertEqual(c.cfg, CFG)
+        self.assertIsInstance(config.open(SQLITE_FILE), configsqlite.Config)
+
+    def test_lazy_sections(self):
+        self.open(CFG)
+        c = self.open()
+        self.assertEqual(sorted(c.cfg), ['flags', 'owners', 'version'])
+        self.assertFalse(c.cfg.loaded('flags'))
+        self.assertEqual(c.cfg['version'], 3)
+        self.assertFalse(c.cfg.loaded('flags'))
+
+    def test_write_changes_only(self):
+        self.open(CFG)
+        c = self.open()
+        c.stats = configstats.Stats()
+        hook_rows = []
+        c.stats.add_hook(lambda event, cfg, fields: hook_rows.append(fields.get('rows')) if event == 'write' else None)
+
+        c.cfg['flags']['checkout']['rollout'] = 0.5
+        c.cfg['flags']['search']['regions'].append('ap')
+        del c.cfg['flags']['checkout']['enabled']
+        c.cfg['owners']['flags'] = 'team'
+        del c.cfg['version']
+        c.write()
+        self.assertEqual(c.stats['writes'], 1)
+        rows = self.rows()
+        self.assertEqual(rows['/flags/checkout/rollout'], '0.5')
+        self.assertEqual(rows['/flags/search/regions'], '["eu","us","ap"]')
+        self.assertEqual(rows['/owners/flags'], '"team"')
+        self.assertNotIn('/owners', rows)
+        self.assertNotIn('/version', rows)
+        self.assertNotIn('/flags/checkout/enabled', rows)
+
+        # nothing changed since: nothing written
+        c.write()
+        self.assertEqual(hook_rows[-1], 0)
+
+        # a dictionary emptied keeps a row of its own
+        del c.cfg['owners']['flags']
+        c.write()
+        self.assertEqual(self.rows()['/owners'], '{}')
+        self.assertEqual(self.open().cfg['owners'], {})
+
+    def test_point_operations(self):
+        c = self.open(CFG)
+        self.assertEqual(c.get('/flags/checkout/rollout'), 0.25)
+        self.assertEqual(c.get(['flags', 'search', 'regions', 1]), 'us')
+        self.assertEqual(c.get('/flags/search'), CFG['flags']['search'])
+        self.assertEqual(c.get(''), CFG)
+        with self.assertRaises(KeyError):
+            c.get('/flags/missing')
+
+        c.set('/flags/new/enabled', True)
+        self.assertTrue(c.get('/flags/new/enabled'))
+        c.set('/version/major', 4)                  # replaces the scalar above it
+        self.assertEqual(c.get('/version'), {'major' : 4})
+        self.assertEqual(c.cfg['version'], 3)       # cfg is not changed
+        self.assertEqual(self.open().cfg['version'], {'major' : 4})
+
+        c.delete('/flags/checkout/rollout')
+        c.delete('/flags/checkout/enabled')
+        self.assertEqual(c.get('/flags/checkout'), {})
+        with self.assertRaises(KeyError):
+            c.delete('/flags/checkout/enabled')
+        with self.assertRaises(configsqlite.ConfigSQLiteException):
+            c.set('', {})
+
+        self.assertEqual(list(c.query('/flags/search')), [('/flags/search/enabled', False),
+                                                           ('/flags/search/regions', ['eu', 'us'])])
+        self.assertEqual(c.count('/flags'), 4)
+        self.assertEqual(c.count(), 6)
+
+    def test_set_inside_list(self):
+        c = self.open(dict(CFG, hosts=[{'name' : 'a', 'port' : 1}]))
+        c.set('/flags/search/regions/0', 'xx')
+        self.assertEqual(c.get('/flags/search/regions'), ['xx', 'us'])
+        self.assertEqual(c.get('/flags/search/regions/1'), 'us')
+        self.assertEqual(self.rows()['/flags/search/regions'], '["xx","us"]')
+        c.set(['hosts', 0, 'port'], 2)
+        self.assertEqual(c.get('/hosts'), [{'name' : 'a', 'port' : 2}])
+
+        for path in ('/flags/search/regions/2', '/flags/search/regions/x', '/flags/search/regions/0/deeper'):
+            with self.assertRaises(configsqlite.ConfigSQLiteException):
+                c.set(path, 'yy')
+        self.assertEqual(c.get('/flags/search/regions'), ['xx', 'us'])
+
+    def test_read_cache_hands_out_copies(self):
+        c = self.open(CFG)
+        c.get('/flags/search/regions').append('HACK')
+        self.assertEqual(c.get('/flags/search/regions'), ['eu', 'us'])
+        c.get('/flags/search/regions').append('HACK')
+        self.assertEqual(c.get('/flags/search/regions'), ['eu', 'us'])
+
+    def test_read_cache(self):
+        c = self.open(CFG)
+        c.stats = configstats.Stats()
+        c.get('/version')
+        c.get('/version')
+        self.assertEqual(c.stats['cache_hits'], 1)
+        c.set('/version', 4)
+        self.assertEqual(c.get('/version'), 4)
+
+        # another connection's change empties the cache
+        other = self.open()
+        other.set('/version', 5)
+        self.assertEqual(c.get('/version'), 5)
+        self.assertEqual(c.stats['cache_hits'], 1)
+
+        c.cache_size = 0
+        c.get('/version')
+        c.get('/version')
+        self.assertEqual(c.stats['cache_hits'], 1)
+        with self.assertRaises(TypeError):
+            c.cache_size = 'big'
+
+    def test_import_export(self):
+        configyaml.Config(CFG, cfgfile=SQLITE_YAML_FILE)
+        c = self.open({'old' : {'a' : 1}})
+        c.import_file(SQLITE_YAML_FILE)
+        self.assertEqual(c.cfg, CFG)
+        self.assertNotIn('/old/a', self.rows())
+
+        c.export_file(SQLITE_JSON_FILE)
+        with open(SQLITE_JSON_FILE) as fp:
+            self.assertEqual(json.load(fp), CFG)
+        self.assertEqual(configjson.Config(cfgfile=SQLITE_JSON_FILE).cfg, CFG)
+
+
+#------------------------------------------------------------------------------
+#------------------------------------------------------------------------------
+if __name__ == "__main__": # pragma: no cover
+
+    unittest.main(verbosity=2)
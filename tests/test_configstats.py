@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configstats unit tests
+"""
+import os.path
+
+# module under test
+import configstats
+
+import configjson
+import configyaml
+
+# unit testing framweork
+import unittest
+
+D = {'log' : 'whatever-log-filename.log', 'verbose' : True}
+
+STATS_JSON_FILE = 'stats.json'
+STATS_YAML_FILE = 'stats.yaml'
+
+
+class FakeMetricsClient(object):
+
+    def __init__(self):
+        self.counts  = {}
+        self.timings = {}
+
+    def incr(self, name, count):
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    def timing(self, name, ms):
+        self.timings[name] = ms
+
+
+class ConfigStatsTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        configstats.disable()
+        for name in (STATS_JSON_FILE, STATS_YAML_FILE):
+            f = os.path.abspath(name)
+            if os.path.exists(f):
+                os.remove(f)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_disabled_by_default(self):
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True)
+        self.assertIsNone(c.stats)
+        self.assertIsNone(configstats.GLOBAL)
+
+    def test_per_instance_read_and_write(self):
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True)
+        c.stats = configstats.Stats()
+        c.write()
+        c.read()
+
+        s = c.stats
+        self.assertEqual(s['writes'], 1)
+        self.assertEqual(s['reads'], 1)
+        self.assertEqual(s['bytes_written'], os.path.getsize(STATS_JSON_FILE))
+        self.assertEqual(s['bytes_read'], os.path.getsize(STATS_JSON_FILE))
+        self.assertGreater(s['parse_time'], 0)
+        self.assertGreater(s['serialize_time'], 0)
+
+    def test_write_thru_and_cache_hits(self):
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True, write_thru=True)
+        c.stats = configstats.Stats()
+        c.cfg = {'width' : 12}
+        c.view
+        c.view
+
+        self.assertEqual(c.stats['write_thrus'], 1)
+        self.assertEqual(c.stats['writes'], 1)
+        self.assertEqual(c.stats['cache_hits'], 1)
+
+    def test_global_stats(self):
+        stats = configstats.enable()
+        configyaml.Config(D, cfgfile=STATS_YAML_FILE, force=True)
+        configyaml.Config(cfgfile=STATS_YAML_FILE)
+
+        self.assertIs(configstats.GLOBAL, stats)
+        self.assertEqual(stats['writes'], 1)
+        self.assertEqual(stats['reads'], 1)
+
+    def test_hooks(self):
+        events = []
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True)
+        c.stats = configstats.Stats(hooks=[lambda event, config, fields: events.append((event, config))])
+        c.write()
+        self.assertEqual(events, [('write', c)])
+
+    def test_metrics_adapter(self):
+        client = FakeMetricsClient()
+        configstats.enable(hooks=[configstats.MetricsAdapter(client, prefix='app')])
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True)
+
+        self.assertEqual(client.counts['app.write'], 1)
+        self.assertEqual(client.counts['app.write.bytes'], os.path.getsize(STATS_JSON_FILE))
+        self.assertIn('app.write.serialize_time', client.timings)
+
+    def test_summary(self):
+        stats = configstats.Stats()
+        stats.record('read', bytes=10, io_time=0.5, parse_time=0.25)
+        text = configstats.summary(stats)
+        self.assertIn('reads           : 1 (10 bytes', text)
+
+    def test_invalid_stats_assignment(self):
+        c = configjson.Config(cfgdict=D, cfgfile=STATS_JSON_FILE, force=True)
+        with self.assertRaises(TypeError):
+            c.stats = {}
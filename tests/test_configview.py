@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+#coding=utf-8
+"""
+configview unit tests
+"""
+import os.path
+import dataclasses
+
+# module under test
+import configview
+
+import configjson
+
+# unit testing framweork
+import unittest
+
+D = {'Logging'     : {'LogFileName' : 'logfile.log', 'FileLoggingLevel' : 'DEBUG'},
+     'Application' : {'width' : 225, 'media' : ['avi', '.mp4']}}
+
+VIEW_CFG_FILE = 'view.json'
+
+
+class ConfigViewTest(unittest.TestCase):
+
+    #--------------------------------------------------------------------------
+    # Test Fixtures
+    #--------------------------------------------------------------------------
+
+    def tearDown(self):
+        view_cfg = os.path.abspath(VIEW_CFG_FILE)
+        if os.path.exists(view_cfg):
+            os.remove(view_cfg)
+
+    #--------------------------------------------------------------------------
+    # Test Cases
+    #--------------------------------------------------------------------------
+
+    def test_attribute_access(self):
+        v = configview.build(D)
+        self.assertEqual(v.Logging.LogFileName, 'logfile.log')
+        self.assertEqual(v.Application.media, ('avi', '.mp4'))
+
+    def test_sections_are_slotted_and_frozen(self):
+        v = configview.build(D)
+        self.assertFalse(hasattr(v.Logging, '__dict__'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            v.Logging.LogFileName = 'other.log'
+
+    def test_to_dict_round_trip(self):
+        v = configview.build(D)
+        self.assertEqual(v.to_dict(), D)
+
+    def test_classes_are_cached_by_shape(self):
+        v1 = configview.build(D)
+        v2 = configview.build({'Logging' : {'LogFileName' : 'x', 'FileLoggingLevel' : 'INFO'}})
+        self.assertIs(type(v1.Logging), type(v2.Logging))
+
+    def test_non_identifier_keys_become_read_only_mapping(self):
+        v = configview.build({'hosts' : {'db-1' : 5432}})
+        self.assertEqual(v.hosts['db-1'], 5432)
+        with self.assertRaises(TypeError):
+            v.hosts['db-1'] = 1
+        self.assertEqual(v.to_dict(), {'hosts' : {'db-1' : 5432}})
+
+        # and at the top level too
+        v = configview.build({'a-b' : {'c' : 1}, 'd' : 2})
+        self.assertEqual(v['a-b'].c, 1)
+        self.assertEqual(v.to_dict(), {'a-b' : {'c' : 1}, 'd' : 2})
+        self.assertEqual(configview.thaw(v), v.to_dict())
+        self.assertEqual(v, {'a-b' : v['a-b'], 'd' : 2})
+
+    def test_class_cache_bounded(self):
+        self.addCleanup(setattr, configview, 'CACHE_SIZE', configview.CACHE_SIZE)
+        configview.CACHE_SIZE = 4
+        first = configview.view_class('Section', ('k0',))
+        for i in range(1, 10):
+            configview.view_class('Section', ('k%d' % i,))
+        self.assertEqual(len(configview._view_classes), 4)
+        self.assertIsNot(configview.view_class('Section', ('k0',)), first)
+        # the most recently used class is kept
+        latest = configview.view_class('Section', ('k9',))
+        for i in range(10, 13):
+            configview.view_class('Section', ('k%d' % i,))
+        self.assertIs(configview.view_class('Section', ('k9',)), latest)
+
+    def test_config_view_rebuilt_on_assignment(self):
+        c = configjson.Config(cfgdict=D, cfgfile=VIEW_CFG_FILE, force=True)
+        v = c.view
+        self.assertIs(c.view, v)
+        self.assertEqual(v.Application.width, 225)
+
+        c.cfg = {'Application' : {'width' : 80}}
+        self.assertEqual(c.view.Application.width, 80)
+
+    def test_config_view_rebuilt_on_read(self):
+        c = configjson.Config(cfgdict=D, cfgfile=VIEW_CFG_FILE, force=True)
+        version = c.cfgversion
+        v = c.view
+        c.read()
+        self.assertGreater(c.cfgversion, version)
+        self.assertIsNot(c.view, v)
+        self.assertEqual(c.view.to_dict(), v.to_dict())
+
+    def test_config_view_written_back(self):
+        c = configjson.Config(cfgdict=D, cfgfile=VIEW_CFG_FILE, force=True)
+        c.cfg = c.view.to_dict()
+        c.write()
+        self.assertEqual(c.read(), D)
@@ -7,6 +7,8 @@ import os.path
 import shutil
 from pathlib import Path
 import filecmp
+import subprocess
+import sys
 
 # module under test
 import configyaml
@@ -382,7 +384,15 @@ class ConfigYamlTest(unittest.TestCase):
         # now the default config file and the PATH_LIB_1 should be identical
         self.assertTrue(filecmp.cmp(p, c.cfgfile, shallow=False))
 
-       
+    def test_stream_path_obj_written_in_encoding(self):
+        p = Path(PATH_LIB_1)
+
+        c = configyaml.Config(cfgobj={'name' : 'caf\u00e9'}, encoding='latin-1', force=True)
+        c.write(stream=p)
+
+        with open(p, 'rb') as fp:
+            self.assertIn('caf\u00e9'.encode('latin-1'), fp.read())
+
     def test_cfgdict_passed_to_write(self):
         """
         """
@@ -395,5 +405,79 @@ class ConfigYamlTest(unittest.TestCase):
         # now the default config file and the PATH_LIB_1 should be identical
         self.assertTrue(filecmp.cmp(p, c.cfgfile, shallow=False))
 
+    def test_import_does_not_load_ruamel(self):
+        """
+        ruamel.yaml is imported on first use, not when configyaml is imported
+        """
+        code = "import sys, configyaml; print('ruamel.yaml' in sys.modules)"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out  = subprocess.run([sys.executable, '-c', code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(out.stdout.strip(), 'False')
 
-
+    def test_ruamel_classes_left_alone(self):
+        """
+        the !include tag and copy-on-write dictionaries are known to the YAML instances
+        of configyaml only, not to every user of ruamel.yaml
+        """
+        import io
+        import configcow
+        import configinclude
+        import ruamel.yaml
+        c = configyaml.Config(cfgobj=INP_STR_1_DICT, force=True)
+        for typ in ('safe', 'rt'):
+            with self.subTest(typ=typ):
+                other = ruamel.yaml.YAML(typ=typ)
+                try:
+                    self.assertNotIsInstance(other.load("log: !include log.yaml")['log'], configinclude.Include)
+                except ruamel.yaml.constructor.ConstructorError:
+                    pass
+                with self.assertRaises(ruamel.yaml.representer.RepresenterError):
+                    other.dump(configcow.CowDict({'a' : 1}), io.StringIO())
+
+                own = configyaml._new_yaml(typ=typ)
+                self.assertEqual(own.load("log: !include log.yaml")['log'].path, 'log.yaml')
+                buf = io.StringIO()
+                own.dump(configcow.CowDict({'a' : 1}), buf)
+                self.assertEqual(own.load(buf.getvalue()), {'a' : 1})
+        self.assertIsNot(c.yaml.Representer, ruamel.yaml.YAML(typ='safe').Representer)
+
+    def test_stream_export_uses_render_cache(self):
+        """
+        an unchanged cfg written to several streams is serialized once
+        """
+        import io
+        import configstats
+        self.c.stats = configstats.Stats()
+        self.c.cfg = dict(D)
+
+        first, second = io.StringIO(), io.StringIO()
+        self.c.write(stream=first)
+        self.c.write(stream=second)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+        self.c.cfg['verbose'] = False
+        third = io.StringIO()
+        self.c.write(stream=third)
+        self.assertIn('verbose: false', third.getvalue())
+        self.assertEqual(self.c.stats['cache_hits'], 1)
+
+    def test_render_cache_follows_yaml_settings(self):
+        """
+        changing the settings of the YAML subsystem changes the text written
+        """
+        import io
+        self.c.cfg = {'Logging': {'level': 'INFO', 'handlers': ['console']}}
+        first = io.StringIO()
+        self.c.write(stream=first)
+        self.assertIn('    level: INFO', first.getvalue())
+
+        self.c.yaml.indent = 2
+        second = io.StringIO()
+        self.c.write(stream=second)
+        self.assertIn('\n  level: INFO', second.getvalue())
+
+        self.c.render_cache = False
+        third = io.StringIO()
+        self.c.write(stream=third)
+        self.assertEqual(second.getvalue(), third.getvalue())